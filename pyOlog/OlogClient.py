@@ -8,6 +8,7 @@ Created on Jan 10, 2013
 '''
 from __future__ import (print_function, absolute_import)
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
@@ -23,15 +24,21 @@ else:
 
 from getpass import getpass
 
-import requests
 from requests.packages import urllib3
 # Disable warning for non verified HTTPS requests
 urllib3.disable_warnings()
 
+import six
+import time
 from json import JSONEncoder, JSONDecoder
-from collections import OrderedDict
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 
 from .OlogDataTypes import LogEntry, Logbook, Tag, Property, Attachment
+from .collection import LogEntryCollection
+from .utils import LRUCache, BulkResult, SingleFlight
+from .transport import Transport, get_transport
+from .credentials import CredentialCache
 from .conf import _conf
 
 
@@ -44,7 +51,15 @@ class OlogClient(object):
     logbooks_resource = '/resources/logbooks'
     attachments_resource = '/resources/attachments'
 
-    def __init__(self, url=None, username=None, password=None, ask=True):
+    #: Default number of concurrent requests made by a single call
+    max_workers = 4
+    #: Number of log entries kept by get and get_many
+    cache_size = 1000
+    #: Share one request between concurrent identical GETs
+    coalesce = True
+
+    def __init__(self, url=None, username=None, password=None, ask=True,
+                 transport=None, cache_credentials=None):
         '''
         Initialize OlogClient and configure session
 
@@ -59,12 +74,34 @@ class OlogClient(object):
         If  :param ask: is True, then the olog will try using both
         the keyring module and askpass to get a password.
 
+        :param transport: A Transport instance or the name of one
+                          ('requests' or 'httpx'), by default read from
+                          the config file or 'requests'.
+
+        If :param cache_credentials: is True, the password and the
+        server's session cookies are kept in the credential cache (see
+        :mod pyOlog.credentials:) and reused by later clients instead of
+        asking the keyring, by default this is read from the config file
+        key 'credential cache'.
+
         '''
         self._url = _conf.get_value('url', url)
         self.verify = False
         username = _conf.get_username(username)
         password = _conf.get_value('password', password)
 
+        cookies = None
+        self._credentials = None
+        if _conf.get_bool('credential cache', cache_credentials, False) \
+                and username:
+            self._credentials = CredentialCache()
+            cached = self._credentials.load(self._url, username)
+            if cached is not None and password in (None, cached['password']):
+                logger.info("Using cached credentials")
+                password = cached['password']
+                cookies = cached['cookies']
+        self._cached_cookies = cookies
+
         if username and not password and ask:
             # try methods for a password
             if keyring:
@@ -89,25 +126,138 @@ class OlogClient(object):
             logger.info("No authentiation configured.")
             _auth = None
 
-        self._session = requests.Session()
-        self._session.auth = _auth
-        # self._session.headers.update(self.json_header)
-        self._session.verify = self.verify
+        self.max_workers = _conf.get_int('max workers',
+                                         default=self.max_workers)
+
+        self._entry_cache = LRUCache(self.cache_size)
+        self._inflight = SingleFlight()
+        self._username = username
+        self._password = password
+
+        if transport is None:
+            transport = _conf.get_value('transport') or 'requests'
+        if not isinstance(transport, Transport):
+            transport = get_transport(
+                transport, auth=_auth, verify=self.verify,
+                pool_connections=_conf.get_int('pool connections',
+                                               default=10),
+                pool_maxsize=_conf.get_int('pool maxsize',
+                                           default=max(10, self.max_workers)),
+                pool_block=_conf.get_bool('pool block', default=False),
+                keepalive_timeout=_conf.get_float('keepalive timeout'),
+                cookies=cookies,
+                lazy_auth=self._credentials is not None)
+        self._transport = transport
+
+        prewarm = _conf.get_int('prewarm connections', default=0)
+        if prewarm:
+            self._transport.prewarm(self._url, prewarm)
+
+    _shared = dict()
+    _shared_kwargs = dict()
+    _shared_lock = threading.Lock()
+    _shared_flight = SingleFlight()
+
+    @classmethod
+    def shared(cls, url=None, username=None, password=None, **kwargs):
+        '''
+        Return the client shared by the process for a url and user
+
+        :param url: The base URL of the Olog glassfish server.
+        :param username: The username for authentication.
+        :param password: The password for authentication.
+
+        The url and username are resolved from the config file as for
+        the constructor and the first call for a (url, username) pair
+        creates the client, passing on any other keyword arguments.
+        Later calls return the same client, so its connection pool and
+        credentials are reused by all the components of a process.
+
+        Only concurrent first calls for the same url and username wait
+        while the client is created (which may ask for a password).
+        Arguments differing from those the client was created with are
+        ignored with a warning.
+        '''
+        key = (cls, _conf.get_value('url', url), _conf.get_username(username))
+        if password is not None:
+            kwargs['password'] = password
+        with cls._shared_lock:
+            client = cls._shared.get(key)
+        if client is None:
+            client = cls._shared_flight.do(key, cls._new_shared, key, url,
+                                           username, kwargs)
+        with cls._shared_lock:
+            created = cls._shared_kwargs.get(key, kwargs)
+        ignored = sorted(k for k in kwargs
+                         if k not in created or created[k] != kwargs[k])
+        if ignored:
+            logger.warning("Shared client for %s already created, ignoring "
+                           "the arguments %s", key[1], ', '.join(ignored))
+        return client
+
+    @classmethod
+    def _new_shared(cls, key, url, username, kwargs):
+        with cls._shared_lock:
+            if key in cls._shared:
+                # Created since the caller looked
+                return cls._shared[key]
+        client = cls(url=url, username=username, **kwargs)
+        with cls._shared_lock:
+            cls._shared[key] = client
+            cls._shared_kwargs[key] = kwargs
+        return client
+
+    @classmethod
+    def clear_shared(cls):
+        """Forget all the shared clients"""
+        with cls._shared_lock:
+            cls._shared.clear()
+            cls._shared_kwargs.clear()
 
     def _get(self, url, **kwargs):
-        """Do an http GET request"""
+        """Do an http GET request
+
+        Concurrent GETs of the same url with the same params share a
+        single request, unless coalesce is False or other keyword
+        arguments are given.
+        """
+        if not self.coalesce or set(kwargs) - set(['params']):
+            return self._do_get(url, **kwargs)
+        params = kwargs.get('params') or {}
+        try:
+            key = (url, tuple(sorted((k, tuple(v) if isinstance(v, list)
+                                      else v) for k, v in params.items())))
+            hash(key)
+        except TypeError:
+            return self._do_get(url, **kwargs)
+        return self._inflight.do(key, self._do_get, url, **kwargs)
+
+    def _do_get(self, url, **kwargs):
         logger.debug("HTTP GET to %s", self._url + url)
         kwargs.update({'headers': self.json_header})
-        resp = self._session.get(self._url + url, **kwargs)
-        resp.raise_for_status()
+        resp = self._transport.request('GET', self._url + url, **kwargs)
+        self._check_response(resp)
         return resp
 
+    def _check_response(self, resp):
+        """Raise for HTTP errors and keep the credential cache in step"""
+        if self._credentials is not None and resp.status_code == 401:
+            self._credentials.clear(self._url, self._username)
+        resp.raise_for_status()
+        if self._credentials is None or self._password is None:
+            return
+        cookies = self._transport.cookies
+        if cookies != self._cached_cookies:
+            self._credentials.store(self._url, self._username,
+                                    self._password, cookies)
+            self._cached_cookies = cookies
+
     def _put(self, url, **kwargs):
         """Do an http put request"""
         logger.debug("HTTP PUT to %s", self._url + url)
         kwargs.update({'headers': self.json_header})
-        resp = self._session.put(self._url + url, **kwargs)
-        resp.raise_for_status()
+        resp = self._transport.request('PUT', self._url + url, **kwargs)
+        self._check_response(resp)
         return resp
 
     def _post(self, url, json=True, **kwargs):
@@ -115,16 +265,17 @@ class OlogClient(object):
         logger.debug("HTTP POST to %s", self._url + url)
         if json:
             kwargs.update({'headers': self.json_header})
-        resp = self._session.post(self._url + url, **kwargs)
-        resp.raise_for_status()
+        resp = self._transport.request('POST', self._url + url, **kwargs)
+        self._check_response(resp)
         return resp
 
     def _delete(self, url, **kwargs):
         """Do an http delete request"""
         logger.debug("HTTP DELETE to %s", self._url + url)
         kwargs.update({'headers': self.json_header})
-        resp = self._session.delete(self._url + url, **kwargs)
-        resp.raise_for_status()
+        resp = self._transport.request('DELETE', self._url + url,
+                                       **kwargs)
+        self._check_response(resp)
         return resp
 
     def log(self, log_entry):
@@ -134,18 +285,57 @@ class OlogClient(object):
         :param log_entry: An instance of LogEntry to add to the Olog
 
         '''
-        resp = self._post(self.logs_resource,
-                          data=LogEntryEncoder().encode(log_entry))
-        id = LogEntryDecoder().dictToLogEntry(resp.json()[0]).id
+        return self.log_many([log_entry])[0]
+
+    def log_many(self, log_entries, max_workers=None):
+        '''
+        Create several log entries with a single request
+
+        :param log_entries: Instances of LogEntry to add to the Olog
+        :param max_workers: Maximum number of concurrent attachment
+                            uploads, defaults to the max_workers of the
+                            client.
+
+        The entries are posted together and their attachments are then
+        uploaded concurrently.
+
+        :returns: The ids of the new entries, in the order of
+                  :param log_entries:
+        '''
+        if max_workers is None:
+            max_workers = self.max_workers
+
+        data = JSONEncoder().encode([LogEntryEncoder().default(e)[0]
+                                     for e in log_entries])
+        resp = self._post(self.logs_resource, data=data)
+        ids = [LogEntryDecoder().dictToLogEntry(r).id for r in resp.json()]
 
         # Handle attachments
 
-        for attachment in log_entry.attachments:
-            url = "{0}/{1}".format(self.attachments_resource, id)
-            resp = self._post(url, json=False,
-                              files={'file': attachment.get_file_post()})
+        uploads = [(id, attachment)
+                   for id, log_entry in zip(ids, log_entries)
+                   for attachment in log_entry.attachments]
+        if len(uploads) == 1:
+            self.attach(*uploads[0])
+        elif uploads:
+            with ThreadPoolExecutor(min(max_workers, len(uploads))) as pool:
+                futures = [pool.submit(self.attach, id, attachment)
+                           for id, attachment in uploads]
+                for future in futures:
+                    future.result()
+
+        return ids
+
+    def attach(self, log_entry_id, attachment):
+        '''
+        Upload an attachment to an existing log entry
 
-        return id
+        :param log_entry_id: The ID of the log entry.
+        :param attachment: The Attachment to upload.
+        '''
+        url = "{0}/{1}".format(self.attachments_resource, log_entry_id)
+        return self._post(url, json=False,
+                          files={'file': attachment.get_file_post()})
 
     def createLogbook(self, logbook):
         '''
@@ -175,7 +365,109 @@ class OlogClient(object):
         p = PropertyEncoder().encode(property)
         self._put(url, data=p)
 
-    def find(self, **kwds):
+    def add_tag_to_entries(self, tag, ids, chunk_size=500, max_workers=None):
+        '''
+        Add a tag to existing log entries
+
+        :param tag: The Tag, or its name.
+        :param ids: The IDs of the log entries.
+        :param chunk_size: Number of entries tagged per request.
+        :param max_workers: Maximum number of concurrent requests,
+                            defaults to the max_workers of the client.
+
+        The entries are tagged with a POST of the tag with a list of logs
+        per chunk of ids, the chunks are sent concurrently.
+
+        >> add_tag_to_entries('Fault', [e.id for e in find(start=t0,
+                                                           end=t1)])
+
+        :returns: List of BulkResult(key, value, error) in the order of
+                  :param ids:, value is True if the entry was tagged and
+                  error the exception raised tagging its chunk.
+        '''
+        if not isinstance(tag, Tag):
+            tag = Tag(tag)
+        url = "/".join((self.tags_resource, tag.name))
+        body = TagEncoder().default(tag)
+        return self._add_to_entries(self._post_logs(url, body), ids,
+                                    chunk_size, max_workers)
+
+    def add_logbook_to_entries(self, logbook, ids, chunk_size=500,
+                               max_workers=None):
+        '''
+        Add existing log entries to a logbook
+
+        :param logbook: The Logbook, or its name.
+
+        Takes the same arguments and returns the same results as
+        :func add_tag_to_entries:
+        '''
+        if not isinstance(logbook, Logbook):
+            logbook = Logbook(logbook, owner=self._username)
+        url = "/".join((self.logbooks_resource, logbook.name))
+        body = LogbookEncoder().default(logbook)
+        return self._add_to_entries(self._post_logs(url, body), ids,
+                                    chunk_size, max_workers)
+
+    def add_property_to_entries(self, property, ids, max_workers=None):
+        '''
+        Add a property to existing log entries
+
+        :param property: The Property with the attribute values to set.
+        :param ids: The IDs of the log entries.
+        :param max_workers: Maximum number of concurrent requests,
+                            defaults to the max_workers of the client.
+
+        The Olog only sets properties one log entry at a time, so the
+        entries are updated with concurrent PUTs.
+
+        :returns: List of BulkResult(key, value, error) in the order of
+                  :param ids:
+        '''
+        data = PropertyEncoder().encode(property)
+
+        def put(chunk):
+            url = "/".join((self.properties_resource, property.name,
+                            str(chunk[0])))
+            self._put(url, data=data)
+
+        return self._add_to_entries(put, ids, 1, max_workers)
+
+    def _post_logs(self, url, body):
+        """Request adding a chunk of log entries to a tag or logbook"""
+        def post(chunk):
+            data = dict(body, logs=[{'id': i} for i in chunk])
+            self._post(url, data=JSONEncoder().encode(data))
+        return post
+
+    def _add_to_entries(self, request, ids, chunk_size, max_workers):
+        """Make request for each chunk of ids concurrently"""
+        if max_workers is None:
+            max_workers = self.max_workers
+        ids = list(ids)
+        chunks = [ids[i:i + chunk_size]
+                  for i in range(0, len(ids), chunk_size)]
+
+        def send(chunk):
+            try:
+                request(chunk)
+                return [BulkResult(i, True, None) for i in chunk]
+            except Exception as e:
+                logger.debug("Failed to update log entries %s: %s",
+                             chunk, e)
+                return [BulkResult(i, None, e) for i in chunk]
+
+        results = []
+        if chunks:
+            with ThreadPoolExecutor(min(max_workers, len(chunks))) as pool:
+                for chunk_results in pool.map(send, chunks):
+                    results.extend(chunk_results)
+        # The cached entries are out of date
+        for i in ids:
+            self._entry_cache.discard(i)
+        return results
+
+    def find(self, query=None, **kwds):
         '''
         Search for logEntries based on one or many search criteria
         >> find(search='*Timing*')
@@ -200,27 +492,341 @@ class OlogClient(object):
         >>find(logbook='contorls', tag='magnets')
         find all the log entries in logbook 'controls' AND with tag
         named 'magnets'
+
+        Returning a columnar result set
+        >>find(logbook='controls', as_frame=True)
+        return a LogEntryFrame rather than a list of LogEntry objects
+        >>find(logbook='controls', as_frame=True,
+               frame_columns=[('Ticket', 'Id')])
+        also store the attribute 'Id' of the property 'Ticket' as a column
+
+        Refining results locally
+        >>find(start=time.time() - 86400, as_collection=True)
+        return a LogEntryCollection which can be filtered, sliced in time
+        and grouped without further requests to the server
+
+        Searching for several values or alternatives
+        >>find(Query(tag=['magnets', 'RF'], logbook=['controls', 'ops']))
+        find the log entries with tag 'magnets' OR 'RF' AND in logbook
+        'controls' OR 'ops'
+        >>find(Query(tag='magnets') | Query(logbook='controls'),
+               start=time.time() - 3600)
+        find the log entries made in the last hour with tag 'magnets' OR
+        in logbook 'controls'
+        The query is planned into as few server requests as possible
+        which are made concurrently, the merged results are sorted newest
+        first.
         '''
-        resp = self._get(self.logs_resource, params=OrderedDict(kwds))
+        as_frame = kwds.pop('as_frame', False)
+        frame_columns = kwds.pop('frame_columns', None)
+        as_collection = kwds.pop('as_collection', False)
+
+        if query is None:
+            records = self._find_json(kwds)
+        else:
+            records = self._find_query(query, kwds)
+
+        if as_frame:
+            from .frame import LogEntryFrame
+            return LogEntryFrame.from_json(records, frame_columns)
 
         logs = []
-        for json_log_entry in resp.json():
+        for json_log_entry in records:
             logs.append(LogEntryDecoder().dictToLogEntry(json_log_entry))
 
+        if as_collection:
+            return LogEntryCollection(logs)
         return logs
 
+    def _find_json(self, params):
+        """Search for logEntries returning the decoded JSON"""
+        return self._get(self.logs_resource, params=OrderedDict(params)).json()
+
+    def _find_query(self, query, params):
+        """Search for the logEntries matching a Query"""
+        plan = query.plan(**params)
+        if len(plan) == 1:
+            return self._find_json(plan[0])
+
+        logger.debug("Query planned into %d requests", len(plan))
+        records = dict()
+        with ThreadPoolExecutor(min(self.max_workers, len(plan))) as pool:
+            for result in pool.map(self._find_json, plan):
+                for r in result:
+                    records[r['id']] = r
+        return sorted(records.values(),
+                      key=lambda r: (r.get('createdDate') or 0, r['id']),
+                      reverse=True)
+
+    def iter_find(self, page_size=100, **kwds):
+        '''
+        Search for logEntries a page at a time
+
+        :param page_size: Number of entries requested per page.
+
+        Takes the same search criteria as :func find: and fetches the
+        results with the Olog 'page' and 'limit' parameters. This is a
+        generator yielding each entry as soon as its page is decoded, so
+        only one page is held in memory. The search stops at a page
+        holding only entries of the page before, as from a server which
+        ignores the 'page' parameter.
+
+        >> for entry in iter_find(logbook='Operations', page_size=500):
+        '''
+        page = 1
+        previous = set()
+        while True:
+            params = dict(kwds, page=page, limit=page_size)
+            records = self._find_json(params)
+            current = set()
+            for r in records:
+                current.add(r['id'])
+                # Skip entries shifted onto this page by new entries
+                if r['id'] not in previous:
+                    yield LogEntryDecoder().dictToLogEntry(r)
+            if len(records) < page_size:
+                return
+            if current <= previous:
+                # Nothing new, the server does not page the results
+                logger.warning("Search returned page %d again, stopping",
+                               page - 1)
+                return
+            previous = current
+            page += 1
+
+    def find_sharded(self, start, end=None, window=86400, max_results=1000,
+                     min_window=1, max_workers=None, **kwds):
+        '''
+        Search for logEntries over a long time range in parallel
+
+        :param start: Start of the time range (seconds since the epoch).
+        :param end: End of the time range, defaults to now.
+        :param window: Initial length of the time windows in seconds.
+        :param max_results: A window returning this many entries or more
+                            is split in two and fetched again.
+        :param min_window: Windows are never split below this length.
+        :param max_workers: Maximum number of concurrent requests,
+                            defaults to the max_workers of the client.
+
+        The range is split into time windows which are searched
+        concurrently with the other search criteria in **kwds (as for
+        :func find:). Window lengths adapt: windows returning too many
+        entries are halved, windows returning few entries let the
+        following windows grow back to :param window:.
+
+        This is a generator, entries are yielded in order of creation
+        time as soon as their window (and all earlier ones) completed.
+        Entries on the boundary of two windows are only yielded once.
+        Closing the generator early cancels the windows not yet started
+        and waits for the running ones.
+
+        >> for entry in find_sharded(start=time.time() - 90 * 86400,
+                                     logbook='Operations'):
+        '''
+        if end is None:
+            end = time.time()
+        if max_workers is None:
+            max_workers = self.max_workers
+
+        pending = deque()
+        state = {'next': start, 'window': window}
+        previous = set()
+
+        with ThreadPoolExecutor(max_workers) as pool:
+            def submit(s, e):
+                return (s, e, pool.submit(self.find, start=s, end=e, **kwds))
+
+            def fill():
+                while len(pending) < max_workers and state['next'] < end:
+                    s = state['next']
+                    e = min(s + state['window'], end)
+                    pending.append(submit(s, e))
+                    state['next'] = e
+
+            try:
+                fill()
+                while pending:
+                    s, e, future = pending.popleft()
+                    logs = future.result()
+
+                    if len(logs) >= max_results and \
+                            (e - s) / 2. >= min_window:
+                        logger.debug("Splitting window %s to %s (%d entries)",
+                                     s, e, len(logs))
+                        mid = s + (e - s) / 2.
+                        state['window'] = max(mid - s, min_window)
+                        pending.appendleft(submit(mid, e))
+                        pending.appendleft(submit(s, mid))
+                        continue
+
+                    if len(logs) < max_results // 4:
+                        state['window'] = min(state['window'] * 2, window)
+
+                    current = set()
+                    for log in sorted(logs,
+                                      key=lambda l: (l.create_time, l.id)):
+                        current.add(log.id)
+                        if log.id not in previous:
+                            yield log
+                    previous = current
+                    fill()
+            finally:
+                # Stopped early, only wait for the searches running
+                for _, _, future in pending:
+                    future.cancel()
+
+    def follow(self, start=None, interval=2, max_interval=30, overlap=60,
+               **kwds):
+        '''
+        Follow the Olog, yielding log entries as they arrive
+
+        :param start: Yield the entries made since this time (seconds
+                      since the epoch) first. By default only entries
+                      made after the call are yielded.
+        :param interval: Seconds between polls while entries arrive.
+        :param max_interval: The interval grows up to this many seconds
+                             while nothing changes.
+        :param overlap: Seconds before the newest entry seen which are
+                        searched again, to allow for clock skew and
+                        entries committed late.
+
+        Takes the same search criteria as :func find: (other than start
+        and end). Each poll is a single search from a high-water mark
+        just before the newest entry seen, so it only returns the few
+        latest entries. Entries already yielded are skipped, unless their
+        modification time changed.
+
+        The Olog can only be searched by creation time, so the high-water
+        mark is the creation time of the newest entry seen. Modifications
+        are only yielded for entries created less than :param overlap:
+        seconds before it, later edits of older entries are never seen.
+
+        This is a generator which never returns, entries are yielded
+        oldest first.
+
+        >> for entry in follow(logbook='Operations'):
+        '''
+        seen = dict()
+        if start is None:
+            # Only entries made from now on, the current ones are seen
+            start = time.time()
+            baseline = True
+        else:
+            baseline = False
+        mark = start
+        wait = interval
+
+        while True:
+            params = dict(kwds, start=int(mark - overlap))
+            try:
+                records = self._find_json(params)
+            except Exception as e:
+                logger.warning("Failed to poll the Olog: %s", e)
+                records = None
+                wait = max_interval
+
+            new = []
+            for r in records or []:
+                created = (r.get('createdDate') or 0) / 1000.
+                modified = r.get('modifiedDate') or r.get('createdDate')
+                if baseline and created < start:
+                    seen[r['id']] = modified
+                    continue
+                if created < start or seen.get(r['id']) == modified:
+                    continue
+                seen[r['id']] = modified
+                mark = max(mark, created)
+                new.append(LogEntryDecoder().dictToLogEntry(r))
+            baseline = False
+
+            # Only the ids within the window searched are needed
+            for id, modified in list(seen.items()):
+                if modified is not None and modified / 1000. < \
+                        mark - 2 * overlap:
+                    del seen[id]
+
+            for log in sorted(new, key=lambda l: (l.create_time, l.id)):
+                if log.id in self._entry_cache:
+                    self._entry_cache.put(log.id, log)
+                yield log
+
+            if new:
+                wait = interval
+            elif records is not None:
+                wait = min(wait * 1.5, max_interval)
+            time.sleep(wait)
+
+    def get(self, log_entry_id, use_cache=True):
+        '''
+        Get a log entry by id
+
+        :param log_entry_id: The ID of the log entry.
+        :param use_cache: If True, return the entry from the client's
+                          cache of recently fetched entries if present.
+        '''
+        if use_cache:
+            log = self._entry_cache.get(log_entry_id)
+            if log is not None:
+                return log
+        url = "{0}/{1}".format(self.logs_resource, log_entry_id)
+        log = LogEntryDecoder().dictToLogEntry(self._get(url).json())
+        self._entry_cache.put(log_entry_id, log)
+        return log
+
+    def get_many(self, ids, use_cache=True, max_workers=None):
+        '''
+        Get many log entries by id
+
+        :param ids: The IDs of the log entries.
+        :param use_cache: If True, serve entries from the client's cache
+                          of recently fetched entries where possible.
+        :param max_workers: Maximum number of concurrent requests,
+                            defaults to the max_workers of the client.
+
+        Duplicate ids are only fetched once and the entries which are not
+        cached are fetched concurrently.
+
+        :returns: List of BulkResult(key, value, error) in the order of
+                  :param ids:, value is the LogEntry or None and error the
+                  exception raised fetching it.
+        '''
+        if max_workers is None:
+            max_workers = self.max_workers
+
+        results = dict()
+        missing = []
+        for i in ids:
+            if i in results:
+                continue
+            log = self._entry_cache.get(i) if use_cache else None
+            if log is not None:
+                results[i] = BulkResult(i, log, None)
+            else:
+                results[i] = None
+                missing.append(i)
+
+        def fetch(i):
+            try:
+                return BulkResult(i, self.get(i, use_cache=False), None)
+            except Exception as e:
+                logger.debug("Failed to get log entry %s: %s", i, e)
+                return BulkResult(i, None, e)
+
+        if missing:
+            with ThreadPoolExecutor(min(max_workers, len(missing))) as pool:
+                for result in pool.map(fetch, missing):
+                    results[result.key] = result
+
+        return [results[i] for i in ids]
+
     def list_attachments(self, log_entry_id):
         '''
         Search for attachments on a logentry
 
         :param log_entry_id: The ID of the log entry to list the attachments.
         '''
-        url = "{0}/{1}".format(self.attachments_resource, log_entry_id)
-        resp = self._get(url)
-
         attachments = []
-        for jsonAttachment in resp.json().pop('attachment'):
-            filename = jsonAttachment.pop('filename')
+        for filename in self.list_attachment_names(log_entry_id):
             url = "{0}/{1}/{2}".format(self.attachments_resource, log_entry_id,
                                        filename)
             f = self._get(url)
@@ -228,6 +834,46 @@ class OlogClient(object):
 
         return attachments
 
+    def list_attachment_names(self, log_entry_id):
+        '''
+        List the filenames of the attachments on a logentry
+
+        :param log_entry_id: The ID of the log entry to list the attachments.
+        '''
+        url = "{0}/{1}".format(self.attachments_resource, log_entry_id)
+        resp = self._get(url)
+        return [a['filename'] for a in resp.json().pop('attachment')]
+
+    def download_attachment(self, log_entry_id, filename, fileobj,
+                            chunk_size=65536):
+        '''
+        Stream an attachment into a file
+
+        :param log_entry_id: The ID of the log entry.
+        :param filename: The filename of the attachment.
+        :param fileobj: File object opened for binary writing.
+        :param chunk_size: Number of bytes read at a time.
+
+        The attachment is written as it is received, so it is never held
+        in memory as a whole.
+
+        :returns: The number of bytes written.
+        '''
+        url = "{0}/{1}/{2}".format(self.attachments_resource, log_entry_id,
+                                   filename)
+        resp = self._get(url, stream=True)
+        chunks = self._transport.iter_content(resp, chunk_size)
+        size = 0
+        try:
+            for chunk in chunks:
+                fileobj.write(chunk)
+                size += len(chunk)
+        finally:
+            # Releases the connection even if writing failed
+            chunks.close()
+            resp.close()
+        return size
+
     def list_tags(self):
         '''
         List all tags in the Olog.
@@ -289,42 +935,106 @@ class OlogClient(object):
         (it will be removed from all logEntries)
         '''
         if len(kwds) == 1:
-            self.__handleSingleDeleteParameter(**kwds)
+            key, value = kwds.popitem()
+            url, kwargs = self._delete_request(key, value)
+            self._delete(url, **kwargs)
+            self._invalidate([(key, value)])
         else:
             raise ValueError('Can only delete a single Logbook/tag/property')
 
-    def __handleSingleDeleteParameter(self, **kwds):
-        if 'logbookName' in kwds:
-            url = "/".join((self.logbooks_resource,
-                           kwds['logbookName'].strip()))
-            self._delete(url)
-
-        elif 'tagName' in kwds:
-            url = "/".join((self.logbooks_resource,
-                           kwds['tagName'].strip()))
-            self._delete(url)
-
-        elif 'propertyName' in kwds:
-            url = "/".join((self.logbooks_resource,
-                           kwds['propertyName'].strip()))
-            data = PropertyEncoder().encode(Property(
-                kwds['propertyName'].strip()))
-            self._delete(url, data=data)
-
-        elif 'logEntryId' in kwds:
-            url = "/".join((self.logbooks_resource,
-                           kwds['logEntryId'].strip()))
-            self._delete(url)
+    def delete_many(self, max_workers=None, **kwds):
+        '''
+        Delete many logEntries, logbooks, properties and tags
+
+        :param logEntryId: IDs of log entries to delete.
+        :param logbookName: Names of logbooks to delete.
+        :param tagName: Names of tags to delete.
+        :param propertyName: Names of properties to delete.
+        :param max_workers: Maximum number of concurrent requests,
+                            defaults to the max_workers of the client.
+
+        The deletes are made concurrently and a failed delete does not
+        stop the others. Cached log entries affected are dropped once all
+        deletes are done.
+
+        >>> delete_many(logEntryId=[1234, 1235], tagName=['old', 'test'])
+
+        :returns: List of BulkResult(key, value, error), one per item in
+                  the order given with the parameters in the order above.
+                  The key is the tuple (parameter, item), value is True
+                  if the item was deleted and error the exception raised
+                  deleting it.
+        '''
+        if max_workers is None:
+            max_workers = self.max_workers
+
+        items = []
+        for key in ('logEntryId', 'logbookName', 'tagName', 'propertyName'):
+            values = kwds.pop(key, None) or []
+            if isinstance(values, (six.string_types, int)):
+                values = [values]
+            items.extend((key, value) for value in values)
+        if kwds:
+            raise ValueError('Unknown Key {}'.format(', '.join(kwds)))
+
+        # Check all the items before deleting any
+        prepared = [self._delete_request(key, value) for key, value in items]
+
+        def delete(i):
+            url, kwargs = prepared[i]
+            try:
+                self._delete(url, **kwargs)
+                return BulkResult(items[i], True, None)
+            except Exception as e:
+                logger.debug("Failed to delete %s %s: %s", items[i][0],
+                             items[i][1], e)
+                return BulkResult(items[i], None, e)
+
+        results = []
+        if items:
+            with ThreadPoolExecutor(min(max_workers, len(items))) as pool:
+                results = list(pool.map(delete, range(len(items))))
+        self._invalidate(r.key for r in results if r.error is None)
+        return results
+
+    def _delete_request(self, key, value):
+        """The url and arguments of the request deleting an item"""
+        if key == 'logbookName':
+            url = "/".join((self.logbooks_resource, value.strip()))
+            return url, {}
+
+        elif key == 'tagName':
+            url = "/".join((self.tags_resource, value.strip()))
+            return url, {}
+
+        elif key == 'propertyName':
+            url = "/".join((self.properties_resource, value.strip()))
+            data = PropertyEncoder().encode(Property(value.strip()))
+            return url, {'data': data}
+
+        elif key == 'logEntryId':
+            url = "/".join((self.logs_resource, str(value).strip()))
+            return url, {}
 
         else:
             raise ValueError('Unknown Key')
 
+    def _invalidate(self, deleted):
+        """Drop the cached log entries affected by deletes"""
+        for key, value in deleted:
+            if key == 'logEntryId':
+                self._entry_cache.discard(value)
+            else:
+                # Removed from all the log entries which had it
+                self._entry_cache.clear()
+                break
+
 
 class PropertyEncoder(JSONEncoder):
     def default(self, obj):
         if isinstance(obj, Property):
             attributes = dict()
-            for key, value in obj.attributes.iteritems():
+            for key, value in six.iteritems(obj.attributes):
                 attributes[str(key)] = value
             prop = OrderedDict()
             prop["name"] = obj.name
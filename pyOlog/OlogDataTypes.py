@@ -218,7 +218,8 @@ class Attachment(object):
         else:
             basename = os.path.basename(self.filename)
 
-        if self.mime_type is None:
+        mtype = self.mime_type
+        if mtype is None:
             mtype = mimetypes.guess_type(basename)[0]
             if mtype is None:
                 mtype = self.default_mime_type
@@ -11,7 +11,7 @@ class OlogHandler(logging.Handler):
         :param tags: list of strings of tags to add to all messages
         """
         super(OlogHandler, self).__init__()
-        self.session = SimpleOlogClient()
+        self.session = SimpleOlogClient(shared=True)
         self.logbooks = logbooks
         self.tags = tags
 
@@ -3,6 +3,8 @@ __author__ = "swilkins"
 A simple API to the Olog client in python
 """
 
+import six
+
 from .OlogClient import OlogClient
 from .OlogDataTypes import LogEntry, Logbook, Tag, Attachment, Property
 
@@ -61,13 +63,22 @@ class SimpleOlogClient(object):
         and `kwargs` are passed onto the `OlogClient` as the initialization
         parameters.
 
+        Parameters
+        ----------
+        shared : bool, optional
+            Use the `OlogClient` shared by the process for the url and
+            username rather than creating a new one.
+
         See Also
         --------
 
         OlogClient : Client interface to the Olog
 
         """
-        self.session = OlogClient(*args, **kwargs)
+        if kwargs.pop('shared', False):
+            self.session = OlogClient.shared(*args, **kwargs)
+        else:
+            self.session = OlogClient(*args, **kwargs)
 
     @property
     def tags(self):
@@ -262,13 +273,14 @@ class SimpleOlogClient(object):
             verify = False
 
         if logbooks:
-            if isinstance(logbooks, basestring):
+            if isinstance(logbooks, six.string_types):
                 logbooks = [logbooks]
         if tags:
-            if isinstance(tags, basestring):
+            if isinstance(tags, six.string_types):
                 tags = [tags]
         if attachments:
-            if isinstance(attachments, (Attachment, file)):
+            if isinstance(attachments, Attachment) or \
+                    hasattr(attachments, 'read'):
                 attachments = [attachments]
 
         if logbooks:
@@ -294,7 +306,7 @@ class SimpleOlogClient(object):
             tags = [Tag(n) for n in tags]
 
         if properties:
-            for x, y in properties.iteritems():
+            for x, y in six.iteritems(properties):
                 if x not in self.properties:
                     if ensure:
                         self.create_property(x, y.keys())
@@ -302,14 +314,15 @@ class SimpleOlogClient(object):
                         raise ValueError("Property {} does not exist in Olog".
                                          format(x))
 
-            properties = [Property(a, b) for a, b in properties.iteritems()]
+            properties = [Property(a, b)
+                          for a, b in six.iteritems(properties)]
 
         toattach = []
         if attachments:
             for a in attachments:
                 if isinstance(a, Attachment):
                     toattach.append(a)
-                elif isinstance(a, file):
+                elif hasattr(a, 'read'):
                     toattach.append(Attachment(a))
                 else:
                     raise ValueError("Attachments must be file objects or \
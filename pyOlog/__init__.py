@@ -12,5 +12,7 @@ handler.setFormatter(formatter)
 logger.addHandler(handler)
 
 from .OlogDataTypes import LogEntry, Logbook, Tag, Property, Attachment
+from .collection import LogEntryCollection
+from .query import Query
 from .OlogClient import OlogClient
 from .SimpleOlogClient import SimpleOlogClient
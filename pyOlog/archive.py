@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+"""
+Export of log entries and their attachments to a single archive.
+
+The archive (tar, compressed tar or zip, chosen by the extension of its
+filename) holds a manifest.jsonl with one line per entry, in the format
+written by 'olog export', and the attachments of each entry under
+attachments/<id>/<filename>. The 'attachments' of a manifest line are
+the paths of its files relative to the manifest, so an extracted archive
+can be loaded again with 'olog import manifest.jsonl'.
+
+Entries are streamed from the Olog a page at a time. The attachments of
+several entries are downloaded concurrently, each into a temporary file
+which only stays in memory while it is small, and are copied into the
+archive in the order of the entries.
+
+While the export runs, the manifest is kept next to the archive in
+<archive>.partial. When an export is interrupted, running it again
+skips the entries already in the archive. Compressed tar archives
+cannot be appended to and are exported again from the start.
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import logging
+import tarfile
+import zipfile
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .utils import entry_to_record
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = 'manifest.jsonl'
+
+
+def archive_format(path):
+    """The format of an archive from its filename: one of 'tar',
+    'tar.gz', 'tar.bz2' or 'zip'"""
+    name = path.lower()
+    if name.endswith('.zip'):
+        return 'zip'
+    if name.endswith(('.tar.gz', '.tgz')):
+        return 'tar.gz'
+    if name.endswith(('.tar.bz2', '.tbz2')):
+        return 'tar.bz2'
+    return 'tar'
+
+
+class _TarWriter(object):
+    def __init__(self, path, format, append):
+        mode = {'tar': 'w', 'tar.gz': 'w:gz', 'tar.bz2': 'w:bz2'}[format]
+        if append:
+            mode = 'a'
+        self.format = format
+        self.tar = tarfile.open(path, mode)
+
+    def names(self):
+        return set(self.tar.getnames())
+
+    def add(self, name, fileobj, size):
+        info = tarfile.TarInfo(name)
+        info.size = size
+        info.mtime = time.time()
+        self.tar.addfile(info, fileobj)
+
+    def offset(self):
+        if self.format != 'tar':
+            # Compressed archives are not resumed
+            return None
+        # The offset is only valid once the data before it is on disk
+        self.tar.fileobj.flush()
+        os.fsync(self.tar.fileobj.fileno())
+        return self.tar.offset
+
+    def close(self):
+        self.tar.close()
+
+
+class _ZipWriter(object):
+    def __init__(self, path, format, append):
+        self.zip = zipfile.ZipFile(path, 'a' if append else 'w',
+                                   zipfile.ZIP_DEFLATED, allowZip64=True)
+
+    def names(self):
+        return set(self.zip.namelist())
+
+    def add(self, name, fileobj, size):
+        info = zipfile.ZipInfo(name, time.localtime()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        if sys.version_info >= (3, 6):
+            with self.zip.open(info, 'w', force_zip64=True) as dest:
+                shutil.copyfileobj(fileobj, dest)
+        else:
+            self.zip.writestr(info, fileobj.read())
+
+    def offset(self):
+        return None
+
+    def close(self):
+        self.zip.close()
+
+
+class ArchiveExport(object):
+    """Export of log entries and attachments to an archive"""
+
+    def __init__(self, client, path, max_workers=None, spool_size=1 << 20,
+                 progress=None):
+        '''
+        :param client: The OlogClient to export from.
+        :param path: Filename of the archive.
+        :param max_workers: Maximum number of concurrent downloads,
+                            defaults to the max_workers of the client.
+        :param spool_size: Attachments larger than this many bytes are
+                           buffered on disk rather than in memory.
+        :param progress: Called with the number of entries exported so
+                         far after each entry.
+        '''
+        self.client = client
+        self.path = path
+        self.format = archive_format(path)
+        self.max_workers = max_workers or client.max_workers
+        self.spool_size = spool_size
+        self.progress = progress
+        self.partial = path + '.partial'
+        self.count = 0
+
+    def _resume(self):
+        """Read the entries already exported by an interrupted export
+
+        :returns: The set of their ids and the offset the archive is
+                  valid up to (tar only).
+        """
+        if self.format not in ('tar', 'zip') or \
+                not os.path.exists(self.partial) or \
+                not os.path.exists(self.path):
+            return None, None
+        done, offset = set(), 0
+        with open(self.partial) as f:
+            for line in f:
+                try:
+                    state = json.loads(line)
+                except ValueError:
+                    # The last line may be cut short
+                    break
+                done.add(state['record']['id'])
+                offset = state['offset']
+        return done, offset
+
+    def _open(self):
+        done, offset = self._resume()
+        if done is not None and self.format == 'tar':
+            # Drop anything written after the last complete entry and
+            # mark the end of the archive there
+            with open(self.path, 'r+b') as f:
+                f.truncate(offset)
+                f.seek(offset)
+                f.write(tarfile.NUL * tarfile.BLOCKSIZE * 2)
+        if done is not None and self.format == 'zip':
+            try:
+                zipfile.ZipFile(self.path).close()
+            except zipfile.BadZipfile:
+                logger.warning("Unable to resume %s, it is damaged. "
+                               "Exporting again.", self.path)
+                done = None
+
+        if done is None:
+            done = set()
+            open(self.partial, 'w').close()
+            append = False
+        else:
+            logger.info("Resuming export to %s, %d entries done", self.path,
+                        len(done))
+            append = True
+
+        writer_class = _ZipWriter if self.format == 'zip' else _TarWriter
+        return done, writer_class(self.path, self.format, append)
+
+    def _fetch(self, log):
+        """Download the attachments of an entry into temporary files"""
+        files = []
+        try:
+            for filename in self.client.list_attachment_names(log.id):
+                spool = tempfile.SpooledTemporaryFile(self.spool_size)
+                files.append((filename, spool))
+                self.client.download_attachment(log.id, filename, spool)
+        except Exception:
+            for _, spool in files:
+                spool.close()
+            raise
+        return files
+
+    def _write(self, writer, names, log, files, manifest):
+        record = entry_to_record(log)
+        record['attachments'] = []
+        for filename, spool in files:
+            name = "attachments/{}/{}".format(log.id,
+                                              os.path.basename(filename))
+            if name not in names:
+                size = spool.tell()
+                spool.seek(0)
+                writer.add(name, spool, size)
+                names.add(name)
+            spool.close()
+            record['attachments'].append(name)
+
+        # The entry only counts as exported once it is in the manifest
+        manifest.write(json.dumps({'record': record,
+                                   'offset': writer.offset()}))
+        manifest.write('\n')
+        manifest.flush()
+        self.count += 1
+        if self.progress is not None:
+            self.progress(self.count)
+
+    def _add_manifest(self, writer):
+        data = io.BytesIO()
+        with open(self.partial) as f:
+            for line in f:
+                data.write(json.dumps(json.loads(line)['record'])
+                           .encode('utf-8'))
+                data.write(b'\n')
+        size = data.tell()
+        data.seek(0)
+        writer.add(MANIFEST, data, size)
+
+    def run(self, **kwds):
+        '''
+        Export the entries matching a search
+
+        :param kwds: Search criteria as for :func OlogClient.iter_find:,
+                     e.g. start and end.
+
+        :returns: The number of entries exported by this run.
+        '''
+        done, writer = self._open()
+        names = writer.names()
+        pending = deque()
+        pool = ThreadPoolExecutor(self.max_workers)
+        try:
+            with open(self.partial, 'a') as manifest:
+                for log in self.client.iter_find(**kwds):
+                    if log.id in done:
+                        continue
+                    done.add(log.id)
+                    pending.append((log, pool.submit(self._fetch, log)))
+                    # Write finished entries in order, keeping a bounded
+                    # number of downloads ahead of the archive.
+                    while len(pending) >= 2 * self.max_workers or \
+                            (pending and pending[0][1].done()):
+                        log, future = pending.popleft()
+                        self._write(writer, names, log, future.result(),
+                                    manifest)
+                while pending:
+                    log, future = pending.popleft()
+                    self._write(writer, names, log, future.result(),
+                                manifest)
+            self._add_manifest(writer)
+        except BaseException:
+            for log, future in pending:
+                if not future.cancel() and future.exception() is None:
+                    for _, spool in future.result():
+                        spool.close()
+            pool.shutdown(wait=True)
+            writer.close()
+            raise
+        pool.shutdown(wait=True)
+        writer.close()
+        os.unlink(self.partial)
+        return self.count
+
+
+def export_archive(client, path, max_workers=None, **kwds):
+    '''
+    Export log entries and their attachments to an archive
+
+    :param client: The OlogClient to export from.
+    :param path: Filename of the archive, ending in .tar, .tar.gz, .tgz,
+                 .tar.bz2 or .zip
+    :param max_workers: Maximum number of concurrent downloads.
+    :param kwds: Search criteria as for :func OlogClient.iter_find:
+
+    An interrupted export is resumed when called again with the same
+    path.
+
+    >> export_archive(client, 'ops-2015.tar', logbook='Operations',
+    ..                start=1420070400, end=1451606400)
+
+    :returns: The number of entries exported.
+    '''
+    return ArchiveExport(client, path, max_workers).run(**kwds)
@@ -0,0 +1,71 @@
+"""
+The 'olog archive' command.
+
+Exports the matching log entries with their attachments to a tar or zip
+archive holding a manifest.jsonl and the attached files. Running the
+same command again resumes an interrupted export.
+"""
+from __future__ import print_function
+
+import sys
+import time
+import argparse
+
+from .. import OlogClient
+from ..archive import ArchiveExport
+from .find import parse_time, search_criteria
+
+
+def archive(argv):
+    """Export log entries and their attachments to an archive"""
+    parser = argparse.ArgumentParser(
+        prog='olog archive', description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('file',
+                        help="The archive, ending in .tar, .tar.gz, .tgz, "
+                             ".tar.bz2 or .zip")
+    parser.add_argument('search', nargs='?', default=None,
+                        help="Text to search for, '*' is a wildcard")
+    parser.add_argument('-l', '--logbook', dest='logbook', default=None,
+                        help="Logbook name")
+    parser.add_argument('-t', '--tag', dest='tag', default=None,
+                        help="Tag name")
+    parser.add_argument('--property', dest='property', default=None,
+                        help="Property name")
+    parser.add_argument('--owner', dest='owner', default=None,
+                        help="Owner of the entries")
+    parser.add_argument('--start', dest='start', type=parse_time,
+                        default=None,
+                        help="Entries created after this time (seconds "
+                             "since the epoch or YYYY-MM-DD [HH:MM[:SS]])")
+    parser.add_argument('--end', dest='end', type=parse_time, default=None,
+                        help="Entries created before this time")
+    parser.add_argument('-j', '--jobs', dest='jobs', type=int, default=None,
+                        help="Number of concurrent downloads")
+    parser.add_argument('--page-size', dest='page_size', type=int,
+                        default=100,
+                        help="Number of entries fetched per request")
+    parser.add_argument('-u', '--user', dest='username', default=None,
+                        help="Username for Olog Access")
+    parser.add_argument('--url', dest='url', default=None,
+                        help="Base URL for Olog Access")
+    parser.add_argument('-p', '--passwd', dest='passwd', default=None,
+                        help="Password for Olog Access")
+    parser.add_argument('-q', action='store_true', dest='quiet',
+                        help="Suppress all output", default=False)
+    args = parser.parse_args(argv)
+
+    started = time.time()
+    reported = [started]
+
+    def progress(n):
+        if not args.quiet and time.time() - reported[0] > 5:
+            print("Exported {} entries...".format(n), file=sys.stderr)
+            reported[0] = time.time()
+
+    client = OlogClient(args.url, args.username, args.passwd)
+    export = ArchiveExport(client, args.file, args.jobs, progress=progress)
+    n = export.run(page_size=args.page_size, **search_criteria(args))
+    if not args.quiet:
+        print("Exported {} entries to {} in {:.0f} s".format(
+            n, args.file, time.time() - started), file=sys.stderr)
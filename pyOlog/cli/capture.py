@@ -0,0 +1,129 @@
+"""
+Buffer for the output captured by the %log_add magic.
+
+The output is kept as a list of chunks while it is small. Above a
+threshold it is spilled to a gzip compressed temporary file, which is
+attached to the log entry, and only the start of it is kept in memory
+for the text of the entry. Output beyond a maximum size is dropped.
+
+The sizes are read from the config file:
+
+[DEFAULT]
+capture spill size=1048576
+capture max size=104857600
+"""
+
+import gzip
+import tempfile
+
+from .. import Attachment
+from ..conf import _conf
+
+
+class CaptureBuffer(object):
+    """Chunked buffer of captured text"""
+
+    def __init__(self, spill_size=None, max_size=None, head_size=65536):
+        '''
+        :param spill_size: Number of characters kept in memory before the
+                           buffer is spilled to a compressed file.
+        :param max_size: Number of characters after which further output
+                         is dropped.
+        :param head_size: Number of characters of a spilled buffer kept
+                          for the text of the entry.
+        '''
+        self.spill_size = _conf.get_int('capture spill size', spill_size,
+                                        1 << 20)
+        self.max_size = _conf.get_int('capture max size', max_size,
+                                      100 << 20)
+        self.head_size = head_size
+        self.size = 0
+        self.dropped = 0
+        self._chunks = []
+        self._head = None
+        self._file = None
+        self._gzip = None
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def spilled(self):
+        """Whether the buffer was spilled to a file"""
+        return self._file is not None
+
+    def write(self, text):
+        """Add text to the buffer"""
+        if not text:
+            return
+        room = self.max_size - self.size
+        if len(text) > room:
+            self.dropped += len(text) - max(room, 0)
+            text = text[:max(room, 0)]
+            if not text:
+                return
+        self.size += len(text)
+
+        if self._file is None:
+            self._chunks.append(text)
+            if self.size > self.spill_size:
+                self._spill()
+        else:
+            self._gzip.write(text.encode('utf-8'))
+
+    def _spill(self):
+        text = ''.join(self._chunks)
+        self._head = text[:self.head_size]
+        self._chunks = []
+        self._file = tempfile.TemporaryFile()
+        self._gzip = gzip.GzipFile('capture.txt', 'wb', fileobj=self._file)
+        self._gzip.write(text.encode('utf-8'))
+
+    def text(self):
+        '''
+        The text for the log entry
+
+        All of the captured text, or the start of it with a note of the
+        attachment holding the rest if the buffer was spilled.
+        '''
+        if self._file is None:
+            text = ''.join(self._chunks)
+        else:
+            text = self._head
+            text += ("\n... {} more characters in capture.txt.gz\n"
+                     .format(self.size - len(self._head)))
+        if self.dropped:
+            text += ("\n... {} characters of output dropped\n"
+                     .format(self.dropped))
+        return text
+
+    def attachment(self):
+        '''
+        The attachment holding all of the captured text
+
+        :returns: An Attachment of the gzip compressed text, or None if
+                  the buffer was not spilled.
+
+        The buffer is empty afterwards, the file now belongs to the
+        attachment.
+        '''
+        if self._file is None:
+            return None
+        self._gzip.close()
+        self._file.seek(0)
+        a = Attachment(self._file, 'capture.txt.gz')
+        self._file = self._gzip = None
+        self.clear()
+        return a
+
+    def clear(self):
+        """Empty the buffer"""
+        if self._file is not None:
+            self._gzip.close()
+            self._file.close()
+        self.size = 0
+        self.dropped = 0
+        self._chunks = []
+        self._head = None
+        self._file = None
+        self._gzip = None
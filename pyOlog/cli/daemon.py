@@ -0,0 +1,210 @@
+"""
+Local olog daemon.
+
+The daemon keeps a warm OlogClient (with its credentials and open
+connections) behind a Unix domain socket. The olog command forwards
+its entries to the daemon when it is running, which saves the config
+parsing, keyring lookup and TLS handshake of every invocation.
+
+Requests and replies are single lines of JSON. A request holds the
+arguments of :func SimpleOlogClient.log: plus the url and username the
+caller wants to use; attachments are given either as the path of a file
+or as base64 encoded data:
+
+{"url": null, "username": null, "text": "Beam is back",
+ "logbooks": ["Operations"], "tags": null,
+ "attachments": [{"path": "/tmp/image.png"},
+                 {"filename": "screenshot.png", "data": "iVBORw0..."}]}
+
+The reply is {"id": 1234} or {"error": "message"}.
+"""
+from __future__ import print_function
+
+import os
+import io
+import sys
+import json
+import errno
+import base64
+import socket
+import logging
+
+from six.moves import socketserver
+
+from .. import Attachment, SimpleOlogClient
+from ..conf import _conf
+
+logger = logging.getLogger(__name__)
+
+
+def socket_path():
+    """Path of the daemon's socket
+
+    Read from the config file key 'daemon socket', by default
+    $XDG_RUNTIME_DIR/pyOlog.sock or ~/.pyOlog.sock.
+    """
+    path = _conf.get_value('daemon socket')
+    if path is None:
+        if os.environ.get('XDG_RUNTIME_DIR'):
+            path = os.path.join(os.environ['XDG_RUNTIME_DIR'], 'pyOlog.sock')
+        else:
+            path = os.path.expanduser('~/.pyOlog.sock')
+    return path
+
+
+class DaemonError(Exception):
+    """The daemon could not make the log entry"""
+    pass
+
+
+def forward(request, path=None, timeout=60):
+    '''
+    Send a log entry to the daemon
+
+    :param request: The request (see the module documentation).
+    :param path: The socket, defaults to :func socket_path:
+
+    :returns: The id of the log entry, or None if no daemon is running
+              or it does not serve the requested url and username.
+    :raises DaemonError: If the daemon failed to make the log entry.
+    '''
+    if path is None:
+        path = socket_path()
+    if not hasattr(socket, 'AF_UNIX'):
+        return None
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        try:
+            sock.connect(path)
+        except socket.error as e:
+            if e.errno in (errno.ENOENT, errno.ECONNREFUSED):
+                return None
+            raise
+        sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        reply = sock.makefile('rb').readline()
+    finally:
+        sock.close()
+
+    if not reply:
+        raise DaemonError("No reply from the olog daemon")
+    reply = json.loads(reply.decode('utf-8'))
+    if reply.get('unserved'):
+        return None
+    if 'error' in reply:
+        raise DaemonError(reply['error'])
+    return reply['id']
+
+
+def _attachment(a):
+    if 'path' in a:
+        return Attachment(open(a['path'], 'rb'),
+                          filename=os.path.basename(a['path']))
+    return Attachment(io.BytesIO(base64.b64decode(a['data'])),
+                      filename=a['filename'])
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        server = self.server
+        line = self.rfile.readline()
+        if not line:
+            # Only checking the daemon is alive
+            return
+        try:
+            request = json.loads(line.decode('utf-8'))
+            key = (_conf.get_value('url', request.get('url')),
+                   _conf.get_username(request.get('username')))
+            if key != server.key:
+                reply = {'unserved': True}
+            else:
+                attachments = []
+                try:
+                    for a in request.get('attachments') or []:
+                        attachments.append(_attachment(a))
+                    id = server.client.log(request.get('text'),
+                                           logbooks=request.get('logbooks'),
+                                           tags=request.get('tags'),
+                                           attachments=attachments)
+                finally:
+                    # The daemon runs for long, never leak the files
+                    for a in attachments:
+                        a.file.close()
+                reply = {'id': id}
+        except Exception as e:
+            logger.exception("Failed to make log entry")
+            reply = {'error': "{}: {}".format(type(e).__name__, e)}
+        self.wfile.write(json.dumps(reply).encode('utf-8') + b'\n')
+
+
+class OlogDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Server making the log entries forwarded by the olog command"""
+    daemon_threads = True
+
+    def __init__(self, path=None, url=None, username=None, password=None,
+                 client=None):
+        '''
+        :param path: The socket, defaults to :func socket_path:
+        :param url: The base URL of the Olog.
+        :param username: The username for authentication.
+        :param password: The password for authentication.
+        :param client: The SimpleOlogClient making the entries, by
+                       default one is created for url and username.
+
+        The client is created (and the password looked up) here, so
+        the daemon only serves requests for this url and username.
+        '''
+        if path is None:
+            path = socket_path()
+        self.path = path
+
+        # Checked before the client may ask for a password
+        if os.path.exists(path):
+            if self._alive(path):
+                raise RuntimeError("An olog daemon is already running on {}"
+                                   .format(path))
+            os.unlink(path)
+
+        if client is None:
+            client = SimpleOlogClient(url, username, password, shared=True)
+        self.client = client
+        self.key = (_conf.get_value('url', url),
+                    _conf.get_username(username))
+
+        # Only our user may talk to the daemon, it holds our credentials
+        umask = os.umask(0o177)
+        try:
+            socketserver.UnixStreamServer.__init__(self, path, _Handler)
+        finally:
+            os.umask(umask)
+
+    @staticmethod
+    def _alive(path):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(path)
+        except socket.error:
+            return False
+        finally:
+            sock.close()
+        return True
+
+    def server_close(self):
+        socketserver.UnixStreamServer.server_close(self)
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+
+def run_daemon(url=None, username=None, password=None, quiet=False):
+    """Run the daemon until interrupted"""
+    server = OlogDaemon(url=url, username=username, password=password)
+    if not quiet:
+        print("olog daemon listening on {}".format(server.path),
+              file=sys.stderr)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
@@ -0,0 +1,212 @@
+"""
+The 'olog find', 'olog export' and 'olog tail' commands.
+
+All search the Olog a page at a time and write each entry as soon as
+it is decoded, so memory use stays flat and the output can be piped
+into other tools (e.g. jq) while the search is running.
+"""
+from __future__ import print_function
+
+import sys
+import csv
+import errno
+import json
+import time
+import argparse
+import datetime
+import itertools
+
+from .. import OlogClient
+from ..utils import entry_to_record
+
+csv_fields = ['id', 'create_time', 'modify_time', 'owner',
+              'logbooks', 'tags', 'text']
+
+
+def parse_time(value):
+    """Parse seconds since the epoch or a local date and time such as
+    '2015-01-31' or '2015-01-31 14:30'"""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M:%S',
+                '%Y-%m-%dT%H:%M', '%Y-%m-%d'):
+        try:
+            dt = datetime.datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        return time.mktime(dt.timetuple())
+    raise argparse.ArgumentTypeError("Invalid time {!r}".format(value))
+
+
+def search_parser(prog, description, default_format):
+    """Build the argument parser shared by find and export"""
+    parser = argparse.ArgumentParser(prog=prog, description=description)
+    parser.add_argument('search', nargs='?', default=None,
+                        help="Text to search for, '*' is a wildcard")
+    parser.add_argument('-l', '--logbook', dest='logbook', default=None,
+                        help="Logbook name")
+    parser.add_argument('-t', '--tag', dest='tag', default=None,
+                        help="Tag name")
+    parser.add_argument('--property', dest='property', default=None,
+                        help="Property name")
+    parser.add_argument('--owner', dest='owner', default=None,
+                        help="Owner of the entries")
+    parser.add_argument('--start', dest='start', type=parse_time,
+                        default=None,
+                        help="Entries created after this time (seconds "
+                             "since the epoch or YYYY-MM-DD [HH:MM[:SS]])")
+    parser.add_argument('--end', dest='end', type=parse_time, default=None,
+                        help="Entries created before this time")
+    parser.add_argument('-n', '--max', dest='max', type=int, default=None,
+                        help="Maximum number of entries")
+    parser.add_argument('--page-size', dest='page_size', type=int,
+                        default=100,
+                        help="Number of entries fetched per request")
+    parser.add_argument('-F', '--format', dest='format',
+                        choices=['text', 'jsonl', 'csv'],
+                        default=default_format,
+                        help="Output format (default %(default)s)")
+    parser.add_argument('-o', '--output', dest='output',
+                        type=argparse.FileType('w'), default=sys.stdout,
+                        help="Output file (default stdout)")
+    parser.add_argument('-u', '--user', dest='username', default=None,
+                        help="Username for Olog Access")
+    parser.add_argument('--url', dest='url', default=None,
+                        help="Base URL for Olog Access")
+    parser.add_argument('-p', '--passwd', dest='passwd', default=None,
+                        help="Password for Olog Access")
+    return parser
+
+
+def search_criteria(args):
+    """The OlogClient.find criteria given on the command line"""
+    criteria = dict()
+    for key in ('search', 'logbook', 'tag', 'property', 'owner',
+                'start', 'end'):
+        value = getattr(args, key)
+        if value is not None:
+            criteria[key] = value
+    return criteria
+
+
+def write_entries(entries, out, format, max=None):
+    '''
+    Write log entries to a file as they arrive
+
+    :param entries: Iterable of LogEntry
+    :param out: File to write to.
+    :param format: One of 'text', 'jsonl' or 'csv'.
+    :param max: Stop after this many entries.
+
+    :returns: Number of entries written.
+    '''
+    writer = None
+    if format == 'csv':
+        writer = csv.DictWriter(out, csv_fields, extrasaction='ignore')
+        writer.writeheader()
+
+    n = 0
+    for log in entries:
+        if max is not None and n >= max:
+            break
+        record = entry_to_record(log)
+        if format == 'jsonl':
+            out.write(json.dumps(record))
+            out.write('\n')
+        elif format == 'csv':
+            record['logbooks'] = '|'.join(record['logbooks'])
+            record['tags'] = '|'.join(record['tags'])
+            writer.writerow(record)
+        else:
+            created = ''
+            if log.create_time is not None:
+                created = time.strftime('%Y-%m-%d %H:%M:%S',
+                                        time.localtime(log.create_time
+                                                       / 1000.))
+            first = log.text.splitlines()[0] if log.text else ''
+            out.write("{} {} {} [{}] {}\n".format(
+                log.id, created, log.owner,
+                ', '.join(record['logbooks']), first))
+        out.flush()
+        n += 1
+    return n
+
+
+def _write(entries, args):
+    try:
+        write_entries(entries, args.output, args.format, args.max)
+    except IOError as e:
+        # Reader went away, e.g. piped into head
+        if getattr(e, 'errno', None) != errno.EPIPE:
+            raise
+
+
+def _run(argv, prog, description, default_format):
+    parser = search_parser(prog, description, default_format)
+    args = parser.parse_args(argv)
+    client = OlogClient(args.url, args.username, args.passwd)
+    entries = client.iter_find(page_size=args.page_size,
+                               **search_criteria(args))
+    _write(entries, args)
+
+
+def find(argv):
+    """Search the Olog and print the matching entries"""
+    _run(argv, 'olog find', "Search the Olog for log entries.", 'text')
+
+
+def export(argv):
+    """Export the matching entries as JSON Lines or CSV"""
+    _run(argv, 'olog export',
+         "Export log entries as JSON Lines (one entry per line) or CSV.",
+         'jsonl')
+
+
+def tail(argv):
+    """Print the latest entries, and with -f the new ones as they arrive"""
+    parser = search_parser('olog tail',
+                           "Print the latest log entries, oldest first.",
+                           'text')
+    parser.add_argument('-f', '--follow', action='store_true',
+                        dest='follow', default=False,
+                        help="Keep printing new entries, and modified "
+                             "entries created less than --overlap seconds "
+                             "before the newest one")
+    parser.add_argument('--interval', dest='interval', type=float,
+                        default=2,
+                        help="Seconds between polls with -f")
+    parser.add_argument('--overlap', dest='overlap', type=float,
+                        default=60,
+                        help="Seconds before the newest entry searched "
+                             "again by each poll with -f")
+    parser.set_defaults(max=10)
+    args = parser.parse_args(argv)
+    criteria = search_criteria(args)
+    criteria.pop('end', None)
+    client = OlogClient(args.url, args.username, args.passwd)
+
+    latest = list(itertools.islice(
+        client.iter_find(page_size=args.max or 1, **criteria), args.max))
+    latest.reverse()
+    entries = iter(latest)
+    if args.follow:
+        # Follow on from the newest entry printed without repeating it
+        start = criteria.pop('start', None)
+        if latest:
+            start = latest[-1].create_time / 1000.
+        shown = set(log.id for log in latest)
+
+        def new_entries():
+            for log in client.follow(start=start, interval=args.interval,
+                                     overlap=args.overlap, **criteria):
+                if log.id in shown:
+                    # Print it again if it is modified later
+                    shown.discard(log.id)
+                    continue
+                yield log
+
+        entries = itertools.chain(entries, new_entries())
+        args.max = None
+    _write(entries, args)
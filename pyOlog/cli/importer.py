@@ -0,0 +1,262 @@
+"""
+The 'olog import' command.
+
+Imports log entries from a JSON Lines file, one entry per line in the
+format written by 'olog export':
+
+{"text": "Beam is back", "owner": "swilkins", "logbooks": ["Operations"],
+ "tags": ["Beam"], "properties": {"Ticket": {"Id": "1234"}},
+ "attachments": ["images/beam.png"]}
+
+Attachments are paths relative to the directory of the JSON Lines file.
+Missing tags, logbooks and properties are created once before the
+first entry using them. Entries are posted in batches with a bounded
+number of batches in flight. Progress is checkpointed next to the input
+file, so an interrupted import resumes where it stopped. A batch is
+checkpointed once its entries are created, attachments which then fail
+to upload are retried by the next run without posting the entries again.
+"""
+from __future__ import print_function
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .. import OlogClient, LogEntry, Logbook, Tag, Property, Attachment
+
+
+class Checkpoint(object):
+    """Record of the lines of an input file already imported
+
+    All lines before 'done' are imported, as are the [start, end) ranges
+    in 'ranges' which completed out of order. The attachments of imported
+    lines still to be uploaded are listed in 'uploads' as [line, id, path].
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.done = 0
+        self.ranges = []
+        self.uploads = []
+        if os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+            self.done = state['done']
+            self.ranges = [tuple(r) for r in state['ranges']]
+            self.uploads = [tuple(u) for u in state.get('uploads', [])]
+
+    def imported(self, line):
+        if line < self.done:
+            return True
+        return any(start <= line < end for start, end in self.ranges)
+
+    def add(self, start, end, uploads=()):
+        self.ranges.append((start, end))
+        self.ranges.sort()
+        while self.ranges and self.ranges[0][0] <= self.done:
+            self.done = max(self.done, self.ranges.pop(0)[1])
+        self.uploads.extend(uploads)
+
+    def uploaded(self, upload):
+        self.uploads.remove(upload)
+
+    def save(self):
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'done': self.done, 'ranges': self.ranges,
+                       'uploads': self.uploads}, f)
+        os.rename(tmp, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class Importer(object):
+    """Import log entries from a JSON Lines file"""
+
+    def __init__(self, client, path, batch_size=50, jobs=4, quiet=False):
+        self.client = client
+        self.path = path
+        self.batch_size = batch_size
+        self.jobs = jobs
+        self.quiet = quiet
+        self.checkpoint = Checkpoint(path + '.checkpoint')
+        self.count = 0
+        self._lock = threading.Lock()
+        self._logbooks = None
+        self._tags = None
+        self._properties = None
+
+    def ensure(self, record):
+        """Create the tags, logbooks and properties of a record which are
+        not in the Olog"""
+        if self._logbooks is None:
+            self._logbooks = set(l.name for l in self.client.list_logbooks())
+            self._tags = set(t.name for t in self.client.list_tags())
+            self._properties = set(p.name
+                                   for p in self.client.list_properties())
+
+        for name in record.get('logbooks') or []:
+            if name not in self._logbooks:
+                self.client.createLogbook(Logbook(name))
+                self._logbooks.add(name)
+        for name in record.get('tags') or []:
+            if name not in self._tags:
+                self.client.createTag(Tag(name))
+                self._tags.add(name)
+        for name, attributes in (record.get('properties') or {}).items():
+            if name not in self._properties:
+                self.client.createProperty(
+                    Property(name, dict((k, '') for k in attributes)))
+                self._properties.add(name)
+
+    def entry(self, record):
+        """Create the LogEntry of a record, without its attachments"""
+        return LogEntry(text=record.get('text'), owner=record.get('owner'),
+                        logbooks=[Logbook(n)
+                                  for n in record.get('logbooks') or []],
+                        tags=[Tag(n) for n in record.get('tags') or []],
+                        properties=[Property(k, v) for k, v in
+                                    (record.get('properties') or {}).items()])
+
+    def batches(self):
+        """Yield (first line, end line, lines, records) of lines still
+        to do"""
+        start, lines, records = None, [], []
+        with open(self.path) as f:
+            for n, line in enumerate(f):
+                if self.checkpoint.imported(n) or not line.strip():
+                    if records:
+                        yield start, n, lines, records
+                        start, lines, records = None, [], []
+                    continue
+                if start is None:
+                    start = n
+                lines.append(n)
+                records.append(json.loads(line))
+                if len(records) >= self.batch_size:
+                    yield start, n + 1, lines, records
+                    start, lines, records = None, [], []
+        if records:
+            yield start, n + 1, lines, records
+
+    def post(self, start, end, lines, records):
+        '''
+        Post a batch of entries, then upload their attachments
+
+        The lines are checkpointed as soon as the entries exist, so a
+        failed upload never makes a resumed import post them again.
+        '''
+        ids = self.client.log_many([self.entry(r) for r in records])
+        uploads = [(line, id, path)
+                   for line, id, r in zip(lines, ids, records)
+                   for path in r.get('attachments') or []]
+        with self._lock:
+            self.count += len(ids)
+            self.checkpoint.add(start, end, uploads)
+            self.checkpoint.save()
+        self.upload(uploads)
+
+    def upload(self, uploads):
+        """Upload attachments given as (line, id, path)"""
+        base = os.path.dirname(os.path.abspath(self.path))
+        for upload in uploads:
+            line, id, path = upload
+            try:
+                with open(os.path.join(base, path), 'rb') as f:
+                    self.client.attach(id, Attachment(f))
+            except Exception as e:
+                if not self.quiet:
+                    print("Failed to attach {} to entry {} (line {}): {}"
+                          .format(path, id, line + 1, e), file=sys.stderr)
+                continue
+            with self._lock:
+                self.checkpoint.uploaded(upload)
+                self.checkpoint.save()
+
+    def report(self, started, final=False):
+        if self.quiet:
+            return
+        elapsed = max(time.time() - started, 1e-6)
+        print("{} {} entries in {:.0f} s ({:.1f} entries/s)".format(
+            "Imported" if final else "Importing...", self.count, elapsed,
+            self.count / elapsed), file=sys.stderr)
+
+    def run(self):
+        '''
+        Import the file
+
+        The attachments which failed to upload in an earlier run are
+        uploaded first. Attachments failing now are left in the
+        checkpoint, to be uploaded by the next run.
+
+        :returns: Number of entries imported.
+        '''
+        started = last_report = time.time()
+        pending = deque()
+
+        self.upload(list(self.checkpoint.uploads))
+
+        pool = ThreadPoolExecutor(self.jobs)
+        try:
+            for start, end, lines, records in self.batches():
+                for r in records:
+                    self.ensure(r)
+                pending.append(pool.submit(self.post, start, end, lines,
+                                           records))
+                while len(pending) >= 2 * self.jobs or \
+                        (pending and pending[0].done()):
+                    pending.popleft().result()
+                if time.time() - last_report > 5:
+                    self.report(started)
+                    last_report = time.time()
+            while pending:
+                pending.popleft().result()
+        finally:
+            # Batches already posting checkpoint themselves
+            for future in pending:
+                future.cancel()
+            pool.shutdown(wait=True)
+
+        self.report(started, final=True)
+        if self.checkpoint.uploads:
+            if not self.quiet:
+                print("{} attachments failed to upload, run the import "
+                      "again to retry them".format(
+                          len(self.checkpoint.uploads)),
+                      file=sys.stderr)
+        else:
+            self.checkpoint.remove()
+        return self.count
+
+
+def import_entries(argv):
+    """Import log entries from a JSON Lines file"""
+    parser = argparse.ArgumentParser(
+        prog='olog import', description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('file', help="JSON Lines file of log entries")
+    parser.add_argument('-b', '--batch-size', dest='batch_size', type=int,
+                        default=50,
+                        help="Number of entries posted per request")
+    parser.add_argument('-j', '--jobs', dest='jobs', type=int, default=4,
+                        help="Number of concurrent requests")
+    parser.add_argument('-u', '--user', dest='username', default=None,
+                        help="Username for Olog Access")
+    parser.add_argument('--url', dest='url', default=None,
+                        help="Base URL for Olog Access")
+    parser.add_argument('-p', '--passwd', dest='passwd', default=None,
+                        help="Password for Olog Access")
+    parser.add_argument('-q', action='store_true', dest='quiet',
+                        help="Suppress all output", default=False)
+    args = parser.parse_args(argv)
+
+    client = OlogClient(args.url, args.username, args.passwd)
+    Importer(client, args.file, args.batch_size, args.jobs,
+             args.quiet).run()
@@ -1,16 +1,76 @@
 from __future__ import print_function
 
+import sys
+import atexit
+import threading
+from concurrent import futures
+
 from IPython.core.magic import Magics, magics_class, line_magic
 from IPython.utils.io import capture_output
 
 from .. import SimpleOlogClient
 from .utils import save_pyplot_figure, get_screenshot, get_text_from_editor
+from .capture import CaptureBuffer
+
+olog_client = SimpleOlogClient(shared=True)
+
+#: Make the log entries in the background, set to False to block
+background = True
+
+# A single worker keeps the entries in the order they were made
+_executor = futures.ThreadPoolExecutor(1)
+_pending = set()
+_pending_lock = threading.Lock()
+
 
-olog_client = SimpleOlogClient()
+def _done(future):
+    with _pending_lock:
+        _pending.discard(future)
+    try:
+        id = future.result()
+    except Exception as e:
+        print("\nFailed to make Olog entry: {}".format(e), file=sys.stderr)
+    else:
+        print("\nOlog entry {} created".format(id), file=sys.stderr)
+
+
+def submit(*args, **kwargs):
+    """Make a log entry in the background
+
+    The arguments are those of :func SimpleOlogClient.log:
+
+    :returns: A Future of the id of the log entry.
+    """
+    future = _executor.submit(olog_client.log, *args, **kwargs)
+    with _pending_lock:
+        _pending.add(future)
+    future.add_done_callback(_done)
+    return future
+
+
+def flush(timeout=None):
+    """Wait for the log entries being made in the background
+
+    :returns: The number of entries not finished within timeout.
+    """
+    with _pending_lock:
+        pending = list(_pending)
+    if not pending:
+        return 0
+    print("Waiting for {} Olog entries...".format(len(pending)),
+          file=sys.stderr)
+    return len(futures.wait(pending, timeout).not_done)
+
+
+# Do not lose the entries still being made when the interpreter exits.
+# %reload_ext runs this module again in the same namespace, so flush is
+# only registered the first time.
+if '_flush_at_exit' not in globals():
+    _flush_at_exit = atexit.register(flush)
 
 
 def olog(msg=None, edit=False, logbooks=None, tags=None,
-         attachments=None, **kwargs):
+         attachments=None, wait=None, **kwargs):
     """Make a log entry to the Olog
 
     :param msg: Message for log entry.
@@ -21,33 +81,45 @@ def olog(msg=None, edit=False, logbooks=None, tags=None,
     :type tags: String or List of Strings.
     :param attachments: List of attachments to add to log entry.
     :type attachments: Attchment objects
+    :param wait: Block until the entry is made, by default the entry is
+                 made in the background unless :data background: is
+                 False.
+
+    :returns: A Future of the id of the log entry, or the id when
+              waiting.
     """
     if not msg:
         msg = get_text_from_editor()
-    olog_client.log(msg, logbooks=logbooks, tags=tags,
+    if wait is None:
+        wait = not background
+    future = submit(msg, logbooks=logbooks, tags=tags,
                     attachments=attachments)
-    return
+    if wait:
+        return future.result()
+    return future
 
 
 def olog_savefig(**kwargs):
     """Save a pyplot figure and place it in tho Olog
 
-    The **kwargs are all passed onto the :func savefig: function
-    and then onto the :func olog" function
+    The **kwargs of :func olog: are passed onto it, the others onto
+    the :func save_pyplot_figure: function (e.g. formats=['pdf', 'png'])
+    and from there to :func savefig:
 
-    :returns: None
+    :returns: As :func olog:
     """
-    fig = save_pyplot_figure(**kwargs)
+    olog_args = ('msg', 'edit', 'logbooks', 'tags', 'attachments', 'wait')
+    fig = save_pyplot_figure(**dict((k, v) for k, v in kwargs.items()
+                                    if k not in olog_args))
     if 'attachments' in kwargs:
         if isinstance(kwargs['attachments'], list):
-            kwargs['attachments'].append(fig)
+            kwargs['attachments'].extend(fig)
         else:
-            kwargs['attachments'] = [kwargs['attatchments'], fig]
+            kwargs['attachments'] = [kwargs['attachments']] + fig
     else:
         kwargs['attachments'] = fig
 
-    olog(**kwargs)
-    return
+    return olog(**kwargs)
 
 
 def olog_grab(root=False, **kwargs):
@@ -58,7 +130,7 @@ def olog_grab(root=False, **kwargs):
 
     The **kwargs are all passed onto the :func olog: function
 
-    :returns: None
+    :returns: As :func olog:
     """
     if not root:
         print("Select area of screen to grab .........")
@@ -67,40 +139,45 @@ def olog_grab(root=False, **kwargs):
         if isinstance(kwargs['attachments'], list):
             kwargs['attachments'].append(a)
         else:
-            kwargs['attachments'] = [kwargs['attatchments'], a]
+            kwargs['attachments'] = [kwargs['attachments'], a]
     else:
         kwargs['attachments'] = a
 
-    olog(**kwargs)
-    return
+    return olog(**kwargs)
 
 
 @magics_class
 class OlogMagics(Magics):
-    msg_store = ''
+    def __init__(self, shell=None, **kwargs):
+        super(OlogMagics, self).__init__(shell=shell, **kwargs)
+        self.capture = CaptureBuffer()
 
     @line_magic
     def log_add(self, line):
         """Run the line and capture the output for the Olog"""
-        self.msg_store += ">>>{}\n".format(line)
-        self.msg_store += "\n"
+        self.capture.write(">>>{}\n\n".format(line))
         with capture_output() as c:
             self.shell.run_cell(line)
         c.show()
-        self.msg_store += c.stdout
-        self.msg_store += '\n'
+        self.capture.write(c.stdout)
+        self.capture.write('\n')
 
     @line_magic
     def log_end(self, line):
-        """Store the captured lines in the Olog"""
-        text = get_text_from_editor(prepend=self.msg_store)
-        olog(text)
-        self.msg_store = ''
+        """Store the captured lines in the Olog
+
+        Large captures are attached compressed, only their start is
+        added to the text of the entry.
+        """
+        text = get_text_from_editor(prepend=self.capture.text())
+        attachment = self.capture.attachment()
+        self.capture.clear()
+        olog(text, attachments=[attachment] if attachment else None)
 
     @line_magic
     def log_clear(self, line):
         """Clear the store of captured lines"""
-        self.msg_store = ''
+        self.capture.clear()
 
     @line_magic
     def log_line(self, line):
@@ -1,13 +1,23 @@
 #!/usr/bin/python
 from __future__ import print_function
 
+import os
 import sys
+import base64
 
 import argparse
 
+import six
+
 from .. import Attachment
 from .. import SimpleOlogClient
+from ..images import ImagePipeline
 from .utils import get_screenshot, get_text_from_editor
+from . import archive
+from . import daemon
+from . import find
+from . import importer
+from . import watch
 
 description = """\
 Command line utility for making OLog entries.
@@ -30,13 +40,29 @@ Wil add the tags 'RF Area' and 'Bumps'
 
 Note : A password is requested on the command line unless the option
 '-p' is supplied with a valid password, the password is in the config
-file or it can be obtained from the keyring.
+file or it can be obtained from the keyring. With 'credential cache=true'
+in the config file the password and the server session are cached for
+later invocations.
 
 Optionally commands will take default from a config file located
 in the users home directory ~/.pyOlog.conf This can contain the base
 url for the Olog and also the default logbook to use. Administrators
 can use the /etc/pyOlog.conf file to specify system wide config.
 
+Further commands are available as '%(prog)s COMMAND --help':
+
+  find     Search for log entries
+  export   Export log entries as JSON Lines or CSV
+  tail     Print the latest log entries, '-f' to keep following
+  import   Import log entries from a JSON Lines file
+  archive  Export log entries with their attachments to a tar or zip file
+  watch    Make log entries of the files written to a directory
+
+Running '%(prog)s --daemon' keeps a client connected to the Olog in the
+background. While it runs, later invocations hand their entries to it
+rather than connecting to the Olog themselves ('--no-daemon' disables
+this).
+
 
 """
 
@@ -79,6 +105,27 @@ def olog():
                        help='Grab area of screen and add as attatchment.',
                        default=False,
                        action='store_true')
+    parser.add_argument('--max-size', dest='max_size', type=int,
+                        default=None,
+                        help="Shrink images to at most this many pixels")
+    parser.add_argument('--image-format', dest='image_format',
+                        choices=['jpeg', 'png', 'webp'], default=None,
+                        help="Re-encode images in this format")
+    parser.add_argument('--quality', dest='quality', type=int,
+                        default=None,
+                        help="Quality of JPEG and WEBP images (1-95)")
+    parser.add_argument('--thumbnail', dest='thumbnail',
+                        action='store_true', default=None,
+                        help="Also attach a thumbnail of each image")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--daemon', dest='daemon',
+                       help="Run the olog daemon",
+                       default=False,
+                       action='store_true')
+    group.add_argument('--no-daemon', dest='no_daemon',
+                       help="Do not forward the entry to the olog daemon",
+                       default=False,
+                       action='store_true')
     group = parser.add_mutually_exclusive_group()
     group.add_argument('-v', action='store_true', dest='verbose',
                        help="Verbose output", default=False)
@@ -87,8 +134,12 @@ def olog():
 
     args = parser.parse_args()
 
+    if args.daemon:
+        daemon.run_daemon(args.url, args.username, args.passwd, args.quiet)
+        return
+
     if args.attach is not None:
-        attachments = [Attachment(open(a)) for a in args.attach.split(',')]
+        attachments = [Attachment(open(a, 'rb')) for a in args.attach]
     else:
         attachments = []
 
@@ -101,21 +152,64 @@ def olog():
         screenshot = get_screenshot(args.screenshot)
         attachments.append(screenshot)
 
+    # Optimize the images while the text is written
+
+    pipeline = ImagePipeline(args.max_size, args.image_format, args.quality,
+                             args.thumbnail)
+    processed = pipeline.submit(attachments)
+
     # First create the log entry
 
     if args.text is None:
         text = get_text_from_editor()
     else:
-        text = args.text
+        text = args.text.read()
+
+    attachments = processed.result()
+
+    if not args.no_daemon:
+        request = daemon_request(args, text, attachments)
+        if daemon.forward(request) is not None:
+            return
 
     c = SimpleOlogClient(args.url, args.username, args.passwd)
     c.log(text, logbooks=args.logbooks, tags=args.tags,
           attachments=attachments)
 
 
+def daemon_request(args, text, attachments):
+    """Build the request forwarding a log entry to the olog daemon"""
+    files = []
+    for a in attachments:
+        if isinstance(getattr(a.file, 'name', None), six.string_types):
+            files.append({'path': os.path.abspath(a.file.name)})
+        else:
+            if isinstance(a.file, bytes):
+                data = a.file
+            else:
+                data = a.file.read()
+                a.file.seek(0)
+            files.append({'filename': a.filename,
+                          'data': base64.b64encode(data).decode('ascii')})
+    return {'url': args.url, 'username': args.username,
+            'text': text, 'logbooks': args.logbooks, 'tags': args.tags,
+            'attachments': files}
+
+
+commands = {'find': find.find,
+            'export': find.export,
+            'tail': find.tail,
+            'import': importer.import_entries,
+            'archive': archive.archive,
+            'watch': watch.watch}
+
+
 def main():
     try:
-        olog()
+        if len(sys.argv) > 1 and sys.argv[1] in commands:
+            commands[sys.argv[1]](sys.argv[2:])
+        else:
+            olog()
     except KeyboardInterrupt:
         print('\nAborted.\n')
         sys.exit()
@@ -1,8 +1,13 @@
+import io
 import os
 import subprocess
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import six
 
 from .. import Attachment
+from ..conf import _conf
 
 text_message = '''
 #
@@ -13,37 +18,126 @@ text_message = '''
 '''
 
 
-def save_pyplot_figure(**kwargs):
-    """Save a matplotlib figure to an Olog Attachment Object"""
-    import matplotlib.pyplot as plt
-    import StringIO
+#: Formats attached by save_pyplot_figure when none are configured
+default_figure_formats = ('pdf', 'thumbnail')
 
-    imgdata = StringIO.StringIO()
-    plt.savefig(imgdata, format='pdf', **kwargs)
-    imgdata.seek(0)
+#: Formats rendered by matplotlib's vector backends
+vector_formats = ('pdf', 'svg', 'eps', 'ps')
 
-    a = [Attachment(imgdata, 'plot.pdf')]
 
-    imgdata = StringIO.StringIO()
-    plt.savefig(imgdata, format='png', dpi=50,
-                **kwargs)
-    imgdata.seek(0)
+def figure_formats(formats=None):
+    """The figure formats to attach, from the config file key
+    'figure formats' (e.g. 'pdf, png, thumbnail') if not given"""
+    if formats is None:
+        formats = _conf.get_value('figure formats')
+    if formats is None:
+        return list(default_figure_formats)
+    if isinstance(formats, six.string_types):
+        formats = formats.replace(',', ' ').split()
+    return [f.lower() for f in formats]
 
-    a.append(Attachment(imgdata, 'thumbnail.png'))
 
-    return a
+def _downsample(png, factor):
+    """Shrink a PNG image by an integer factor, averaging the pixels"""
+    import matplotlib.image as mpimg
+
+    img = mpimg.imread(io.BytesIO(png), format='png')
+    if factor > 1:
+        h = img.shape[0] // factor * factor
+        w = img.shape[1] // factor * factor
+        img = img[:h, :w].reshape(h // factor, factor, w // factor, factor,
+                                  -1).mean(axis=(1, 3))
+    out = io.BytesIO()
+    mpimg.imsave(out, img, format='png')
+    out.seek(0)
+    return out
+
+
+def save_pyplot_figure(formats=None, thumbnail_dpi=None, figure=None,
+                       **kwargs):
+    '''
+    Save a matplotlib figure to Olog Attachment Objects
+
+    :param formats: The formats to attach, any of 'pdf', 'svg', 'eps',
+                    'ps', 'png' and 'thumbnail' (a low resolution PNG).
+                    See :func figure_formats:
+    :param thumbnail_dpi: Resolution of the thumbnail, by default read
+                          from the config file key 'thumbnail dpi' or 50.
+    :param figure: The figure, defaults to the current pyplot figure.
+
+    The other keyword arguments are passed on to :func savefig:
+
+    The figure is rendered to a raster only once, the thumbnail is made
+    by downsampling that image in the background while the vector
+    formats are rendered. Matplotlib is not thread safe, so each vector
+    format is still a further render of the figure on the calling
+    thread, one after the other.
+
+    :returns: List of Attachment, in the order of :param formats:
+    '''
+    import matplotlib.pyplot as plt
+
+    if figure is None:
+        figure = plt.gcf()
+    formats = figure_formats(formats)
+    thumbnail_dpi = _conf.get_float('thumbnail dpi', thumbnail_dpi, 50)
+    dpi = kwargs.pop('dpi', None) or figure.dpi
+
+    def attachment(data, name):
+        data.seek(0)
+        return Attachment(data, name)
+
+    for fmt in formats:
+        if fmt not in vector_formats and fmt not in ('png', 'thumbnail'):
+            raise ValueError("Unknown figure format {}".format(fmt))
+
+    results = dict()
+    with ThreadPoolExecutor(1) as pool:
+        if 'png' in formats or 'thumbnail' in formats:
+            # Matplotlib is not thread safe, so only this thread renders
+            # the figure. Without a full size PNG to attach the image is
+            # rendered at the resolution of the thumbnail.
+            render_dpi = dpi if 'png' in formats else thumbnail_dpi
+            png = io.BytesIO()
+            figure.savefig(png, format='png', dpi=render_dpi, **kwargs)
+            if 'png' in formats:
+                results['png'] = attachment(png, 'plot.png')
+            if 'thumbnail' in formats:
+                factor = max(int(round(render_dpi / thumbnail_dpi)), 1)
+                if factor > 1:
+                    results['thumbnail'] = pool.submit(_downsample,
+                                                       png.getvalue(), factor)
+                else:
+                    # Already rendered at the resolution of the thumbnail
+                    results['thumbnail'] = attachment(
+                        io.BytesIO(png.getvalue()), 'thumbnail.png')
+
+        for fmt in formats:
+            if fmt in vector_formats:
+                data = io.BytesIO()
+                figure.savefig(data, format=fmt, **kwargs)
+                results[fmt] = attachment(data, 'plot.' + fmt)
+
+        if hasattr(results.get('thumbnail'), 'result'):
+            results['thumbnail'] = attachment(results['thumbnail'].result(),
+                                              'thumbnail.png')
+
+    return [results[fmt] for fmt in formats]
 
 
 def get_screenshot(root=False, itype='png'):
-    """Open ImageMagick and get screngrab as png."""
+    """Open ImageMagick and get screngrab as png.
+
+    The image is written to a temporary file rather than held in memory.
+    """
     if root:
         opts = '-window root'
     else:
         opts = ''
-    image = subprocess.Popen('import {0} {1}:-'.format(opts, itype),
-                             shell=True,
-                             stdout=subprocess.PIPE)
-    img = image.communicate()[0]
+    img = tempfile.TemporaryFile()
+    subprocess.call('import {0} {1}:-'.format(opts, itype), shell=True,
+                    stdout=img)
+    img.seek(0)
 
     return Attachment(img, 'screenshot.' + itype)
 
@@ -84,9 +178,8 @@ def get_text_from_editor(prepend=None, postpend=None):
 def get_pyplot_fig(self, *args, **kwargs):
     """Save a matplotlib figure as an Attachment"""
     import matplotlib.pyplot as plt
-    import StringIO
 
-    imgdata = StringIO.StringIO()
+    imgdata = io.BytesIO()
     plt.savefig(imgdata, format='png', **kwargs)
     imgdata.seek(0)
 
@@ -0,0 +1,318 @@
+"""
+The 'olog watch' command.
+
+Watches a directory and makes a log entry with the files written to it
+as attachments. Files arriving within a few seconds of each other are
+grouped into a single entry, and the entries are uploaded concurrently
+through one client which stays connected to the Olog.
+
+A file is picked up once it is complete: with inotify (when the
+inotify_simple module is installed) when the writer closes it or it is
+moved into the directory, otherwise when its size and modification time
+stop changing between two scans of the directory.
+
+The files uploaded are recorded in a state file (by default
+.olog-watch.json in the watched directory), so a restarted watch only
+uploads the files which are new or were rewritten since. Files which
+failed to upload are uploaded again after a delay.
+
+inotify_simple is an optional dependency, installed with
+pip install pyOlog[watch].
+"""
+from __future__ import print_function
+
+import os
+import sys
+import json
+import time
+import fnmatch
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .. import OlogClient, LogEntry, Logbook, Tag, Attachment
+
+logger = logging.getLogger(__name__)
+
+try:
+    import inotify_simple
+except ImportError:
+    inotify_simple = None
+
+STATE_FILE = '.olog-watch.json'
+
+
+class DirectoryWatcher(object):
+    """Upload the files written to a directory as log entries"""
+
+    def __init__(self, client, directory, pattern='*', text=None,
+                 logbooks=None, tags=None, group=2., max_files=10, jobs=4,
+                 interval=1., state=None, use_inotify=True, retry=30.):
+        '''
+        :param client: The OlogClient to make the entries with.
+        :param directory: The directory to watch.
+        :param pattern: Only upload files matching this glob pattern.
+        :param text: Text of the entries, '{files}' is replaced by the
+                     filenames and '{directory}' by the directory.
+        :param logbooks: Names of the logbooks of the entries.
+        :param tags: Names of the tags of the entries.
+        :param group: Files arriving less than this many seconds apart
+                      are attached to the same entry.
+        :param max_files: Maximum number of files of an entry.
+        :param jobs: Maximum number of concurrent uploads.
+        :param interval: Seconds between scans when polling.
+        :param state: The state file, defaults to .olog-watch.json in
+                      the directory.
+        :param use_inotify: Use inotify if available.
+        :param retry: Seconds after which files which failed to upload
+                      are uploaded again.
+        '''
+        self.client = client
+        self.directory = os.path.abspath(directory)
+        self.pattern = pattern
+        self.text = text or "New files in {directory}:\n{files}"
+        self.logbooks = logbooks
+        self.tags = tags
+        self.group = group
+        self.max_files = max_files
+        self.jobs = jobs
+        self.interval = interval
+        self.retry = retry
+        self.state_file = state or os.path.join(self.directory, STATE_FILE)
+        self.inotify = None
+        if use_inotify and inotify_simple is not None:
+            self.inotify = inotify_simple.INotify()
+            flags = inotify_simple.flags
+            self.inotify.add_watch(self.directory,
+                                   flags.CLOSE_WRITE | flags.MOVED_TO)
+
+        self._lock = threading.Lock()
+        self._state = self._load_state()
+        self._queued = set()
+        self._failed = dict()
+        self._scanned = dict()
+
+    def _load_state(self):
+        try:
+            with open(self.state_file) as f:
+                return json.load(f)
+        except IOError:
+            return dict()
+        except ValueError as e:
+            logger.warning("Ignoring damaged state file %s: %s",
+                           self.state_file, e)
+            return dict()
+
+    def _save_state(self):
+        # Called with the lock held
+        tmp = self.state_file + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self._state, f)
+        os.rename(tmp, self.state_file)
+
+    def _signature(self, name):
+        """Size and modification time of a file, None if it is gone"""
+        try:
+            st = os.stat(os.path.join(self.directory, name))
+        except OSError:
+            return None
+        return [st.st_size, st.st_mtime]
+
+    def _wanted(self, name, sig):
+        if name.startswith('.') or sig is None:
+            return False
+        if not fnmatch.fnmatch(name, self.pattern):
+            return False
+        with self._lock:
+            if name in self._queued or name in self._failed:
+                return False
+            entry = self._state.get(name)
+        # Rewritten files are uploaded again
+        return entry is None or entry['signature'] != sig
+
+    def _scan(self):
+        """Files whose size and modification time did not change since
+        the previous scan"""
+        current = dict()
+        for name in os.listdir(self.directory):
+            if os.path.isfile(os.path.join(self.directory, name)):
+                current[name] = self._signature(name)
+        stable = [name for name, sig in current.items()
+                  if self._scanned.get(name) == sig and
+                  self._wanted(name, sig)]
+        self._scanned = current
+        return sorted(stable)
+
+    def _wait(self, timeout):
+        """Wait up to timeout seconds for completed files"""
+        if self.inotify is None:
+            time.sleep(timeout)
+            return self._scan()
+        names = []
+        for event in self.inotify.read(timeout=int(timeout * 1000)):
+            if event.name and event.name not in names and \
+                    self._wanted(event.name, self._signature(event.name)):
+                names.append(event.name)
+        return names
+
+    def _retries(self):
+        """Files which failed to upload and are due to be retried"""
+        now = time.time()
+        with self._lock:
+            due = sorted(name for name, t in self._failed.items()
+                         if t <= now)
+            for name in due:
+                del self._failed[name]
+        return [name for name in due
+                if self._wanted(name, self._signature(name))]
+
+    def upload(self, names):
+        '''
+        Make a log entry with files of the directory attached
+
+        :returns: The id of the entry.
+        '''
+        signatures = [self._signature(name) for name in names]
+        files = [open(os.path.join(self.directory, name), 'rb')
+                 for name in names]
+        try:
+            text = self.text.format(directory=self.directory,
+                                    files='\n'.join(names))
+            log = LogEntry(text=text,
+                           logbooks=[Logbook(n) for n in self.logbooks]
+                           if self.logbooks else None,
+                           tags=[Tag(n) for n in self.tags]
+                           if self.tags else None,
+                           attachments=[Attachment(f) for f in files])
+            id = self.client.log(log)
+        finally:
+            for f in files:
+                f.close()
+
+        with self._lock:
+            for name, sig in zip(names, signatures):
+                self._state[name] = {'signature': sig, 'id': id}
+            self._save_state()
+        return id
+
+    def _uploaded(self, names, future):
+        try:
+            id = future.result()
+        except Exception as e:
+            logger.error("Failed to upload %s, retrying in %g s: %s",
+                         ', '.join(names), self.retry, e)
+            with self._lock:
+                self._queued.difference_update(names)
+                for name in names:
+                    self._failed[name] = time.time() + self.retry
+        else:
+            with self._lock:
+                self._queued.difference_update(names)
+            logger.info("Uploaded %s as log entry %s", ', '.join(names), id)
+
+    def run(self, duration=None):
+        '''
+        Watch the directory
+
+        :param duration: Stop after this many seconds, by default run
+                         until interrupted.
+        '''
+        stop = None if duration is None else time.time() + duration
+        pool = ThreadPoolExecutor(self.jobs)
+        group, last = [], None
+
+        def submit(names):
+            with self._lock:
+                self._queued.update(names)
+            future = pool.submit(self.upload, names)
+            future.add_done_callback(
+                lambda f: self._uploaded(names, f))
+
+        try:
+            # Files written while we were not watching
+            self._scan()
+            time.sleep(self.interval)
+            group = self._scan()
+            last = time.time() if group else None
+
+            while stop is None or time.time() < stop:
+                timeout = self.interval
+                if last is not None:
+                    timeout = max(min(timeout, last + self.group -
+                                      time.time()), 0.01)
+                for name in self._wait(timeout) + self._retries():
+                    if name not in group:
+                        group.append(name)
+                        last = time.time()
+
+                while len(group) >= self.max_files:
+                    submit(group[:self.max_files])
+                    group = group[self.max_files:]
+                if group and time.time() - last >= self.group:
+                    submit(group)
+                    group, last = [], None
+        finally:
+            if group:
+                submit(group)
+            pool.shutdown(wait=True)
+            if self.inotify is not None:
+                self.inotify.close()
+
+
+def watch(argv):
+    """Make log entries of the files written to a directory"""
+    parser = argparse.ArgumentParser(
+        prog='olog watch', description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('directory', help="Directory to watch")
+    parser.add_argument('--pattern', dest='pattern', default='*',
+                        help="Only upload files matching this pattern, "
+                             "e.g. '*.png'")
+    parser.add_argument('-l', '--logbooks', dest='logbooks', nargs='*',
+                        default=None, help="Logbook Name(s)")
+    parser.add_argument('-t', '--tags', dest='tags', nargs='*',
+                        default=None, help="OLog Tag Name(s)")
+    parser.add_argument('--text', dest='text', default=None,
+                        help="Text of the entries, '{files}' is replaced "
+                             "by the filenames")
+    parser.add_argument('--group', dest='group', type=float, default=2.,
+                        help="Files arriving less than this many seconds "
+                             "apart make a single entry")
+    parser.add_argument('--max-files', dest='max_files', type=int,
+                        default=10, help="Maximum number of files per entry")
+    parser.add_argument('-j', '--jobs', dest='jobs', type=int, default=4,
+                        help="Number of concurrent uploads")
+    parser.add_argument('--interval', dest='interval', type=float,
+                        default=1., help="Seconds between directory scans")
+    parser.add_argument('--poll', dest='poll', action='store_true',
+                        default=False,
+                        help="Scan the directory rather than use inotify")
+    parser.add_argument('--state', dest='state', default=None,
+                        help="State file, default DIRECTORY/" + STATE_FILE)
+    parser.add_argument('-u', '--user', dest='username', default=None,
+                        help="Username for Olog Access")
+    parser.add_argument('--url', dest='url', default=None,
+                        help="Base URL for Olog Access")
+    parser.add_argument('-p', '--passwd', dest='passwd', default=None,
+                        help="Password for Olog Access")
+    parser.add_argument('-q', action='store_true', dest='quiet',
+                        help="Suppress all output", default=False)
+    args = parser.parse_args(argv)
+
+    if not args.quiet:
+        logging.basicConfig(level=logging.INFO,
+                            format='%(asctime)s %(message)s')
+
+    client = OlogClient(args.url, args.username, args.passwd)
+    watcher = DirectoryWatcher(client, args.directory, args.pattern,
+                               args.text, args.logbooks, args.tags,
+                               args.group, args.max_files, args.jobs,
+                               args.interval, args.state,
+                               use_inotify=not args.poll)
+    if not args.quiet:
+        print("Watching {} ({})".format(
+            watcher.directory,
+            'inotify' if watcher.inotify is not None else 'polling'),
+            file=sys.stderr)
+    watcher.run()
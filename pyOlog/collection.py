@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+In-memory collections of log entries.
+
+A LogEntryCollection wraps the result of a search and refines it locally
+without another request to the server. Inverted indexes (tag, logbook,
+owner, property and property attribute to entry ids) and a sorted time
+index are built the first time they are needed:
+
+>> logs = client.find(start=time.time() - 86400, as_collection=True)
+>> logs.filter(tag=['magnets', 'RF'], logbook='Operations')
+>> logs.between(start=time.time() - 3600)
+>> logs.group_by('owner')
+"""
+
+import bisect
+from collections import OrderedDict
+
+import six
+
+
+class LogEntryCollection(object):
+    """A sequence of log entries with inverted indexes"""
+
+    def __init__(self, entries=None):
+        '''
+        :param entries: The log entries of the collection.
+        :type entries: list of LogEntry
+        '''
+        if entries is None:
+            entries = []
+        self._entries = list(entries)
+        self._position = None
+        self._indexes = dict()
+        self._times = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __getitem__(self, n):
+        if isinstance(n, slice):
+            return LogEntryCollection(self._entries[n])
+        return self._entries[n]
+
+    def __repr__(self):
+        return "<LogEntryCollection of {} entries>".format(len(self))
+
+    @property
+    def ids(self):
+        """Ids of the entries in the collection"""
+        return [e.id for e in self._entries]
+
+    def _positions(self):
+        if self._position is None:
+            self._position = dict((e.id, n)
+                                  for n, e in enumerate(self._entries))
+        return self._position
+
+    def get(self, id, default=None):
+        """Return the entry with id :param id:"""
+        n = self._positions().get(id)
+        if n is None:
+            return default
+        return self._entries[n]
+
+    def _subset(self, ids):
+        """Collection of the entries in ids, keeping the order of self"""
+        pos = self._positions()
+        return LogEntryCollection([self._entries[n]
+                                   for n in sorted(pos[i] for i in ids)])
+
+    def _keys(self, entry, field):
+        if field == 'tag':
+            return [t.name for t in entry.tags]
+        elif field == 'logbook':
+            return [l.name for l in entry.logbooks]
+        elif field == 'owner':
+            return [entry.owner]
+        elif field == 'property':
+            return [p.name for p in entry.properties]
+        elif '.' in field:
+            name, attribute = field.split('.', 1)
+            return ["{}".format(p.attributes[attribute])
+                    for p in entry.properties
+                    if p.name == name and attribute in (p.attributes or {})]
+        raise ValueError("Unknown field {}".format(field))
+
+    def index(self, field):
+        '''
+        Return the inverted index of a field
+
+        :param field: One of 'tag', 'logbook', 'owner', 'property' or
+                      'property.attribute' for the values of an attribute
+                      of a property.
+
+        :returns: Dictionary of field value to set of entry ids.
+        '''
+        try:
+            return self._indexes[field]
+        except KeyError:
+            pass
+        idx = dict()
+        for e in self._entries:
+            for key in self._keys(e, field):
+                idx.setdefault(key, set()).add(e.id)
+        self._indexes[field] = idx
+        return idx
+
+    def filter(self, **criteria):
+        '''
+        Select the entries matching all the criteria
+
+        Each keyword is a field as accepted by :func index: and its value
+        is either a single value or a list of values of which any may
+        match.
+
+        >> logs.filter(tag='magnets')
+        entries tagged 'magnets'
+        >> logs.filter(tag=['magnets', 'RF'], logbook='Operations')
+        entries tagged 'magnets' OR 'RF' AND in logbook 'Operations'
+        >> logs.filter(**{'Ticket.Id': '1234'})
+        entries with property 'Ticket' with attribute 'Id' equal '1234'
+
+        Criteria can also be combined with the set operators & and |
+        of collections.
+
+        :returns: A new LogEntryCollection.
+        '''
+        ids = None
+        for field, values in criteria.items():
+            if isinstance(values, six.string_types) or \
+                    not hasattr(values, '__iter__'):
+                values = [values]
+            idx = self.index(field)
+            match = set()
+            for v in values:
+                match.update(idx.get("{}".format(v), ()))
+            ids = match if ids is None else ids & match
+            if not ids:
+                break
+        if ids is None:
+            return LogEntryCollection(self._entries)
+        return self._subset(ids)
+
+    def _time_index(self):
+        if self._times is None:
+            self._times = sorted((e.create_time, e.id)
+                                 for e in self._entries
+                                 if e.create_time is not None)
+        return self._times
+
+    def between(self, start=None, end=None):
+        '''
+        Select the entries created between two times
+
+        :param start: Start time in seconds since the epoch (inclusive).
+        :param end: End time in seconds since the epoch (inclusive).
+
+        :returns: A new LogEntryCollection.
+        '''
+        times = self._time_index()
+        keys = [t for t, _ in times]
+        lo = 0 if start is None else bisect.bisect_left(keys, start * 1000)
+        hi = len(keys) if end is None else bisect.bisect_right(keys,
+                                                               end * 1000)
+        return self._subset(i for _, i in times[lo:hi])
+
+    def group_by(self, field):
+        '''
+        Group the entries by a field
+
+        :param field: A field as accepted by :func index:
+
+        Entries with several values for the field (for example several
+        tags) appear in each of their groups.
+
+        :returns: OrderedDict of field value to LogEntryCollection,
+                  sorted by value.
+        '''
+        idx = self.index(field)
+        return OrderedDict((k, self._subset(idx[k])) for k in sorted(idx))
+
+    def __and__(self, other):
+        ids = set(self._positions()) & set(other._positions())
+        return self._subset(ids)
+
+    def __or__(self, other):
+        entries = list(self._entries)
+        pos = self._positions()
+        entries.extend(e for e in other if e.id not in pos)
+        return LogEntryCollection(entries)
@@ -10,6 +10,39 @@ url=http://localhost:8000/Olog
 username=swilkins
 logbooks=Commissioning
 tags=pyOlog
+
+The connections made by the client can be tuned with:
+
+[DEFAULT]
+pool connections=10
+pool maxsize=32
+pool block=false
+keepalive timeout=60
+prewarm connections=2
+max workers=8
+transport=requests
+
+Setting transport=httpx makes the requests over HTTP/2 with httpx.
+
+The figures attached by olog_savefig are set with:
+
+[DEFAULT]
+figure formats=pdf, thumbnail
+thumbnail dpi=50
+
+The output captured by %log_add is attached compressed above a size, in
+characters, and dropped above a maximum size:
+
+[DEFAULT]
+capture spill size=1048576
+capture max size=104857600
+
+The log browser of ologgui fetches and caches pages of entries with:
+
+[DEFAULT]
+gui page size=200
+gui cache pages=100
+gui thumbnail size=128
 """
 
 import os
@@ -62,6 +95,29 @@ class Config(object):
         else:
             return value
 
+    def get_int(self, arg, value=None, default=None):
+        """Get an integer from the config file, see :func get_value:"""
+        value = self.get_value(arg, value)
+        if value is None:
+            return default
+        return int(value)
+
+    def get_float(self, arg, value=None, default=None):
+        """Get a float from the config file, see :func get_value:"""
+        value = self.get_value(arg, value)
+        if value is None:
+            return default
+        return float(value)
+
+    def get_bool(self, arg, value=None, default=None):
+        """Get a boolean from the config file, see :func get_value:"""
+        value = self.get_value(arg, value)
+        if value is None:
+            return default
+        if isinstance(value, bool):
+            return value
+        return value.strip().lower() in ('1', 'yes', 'true', 'on')
+
     def get_username(self, value=None):
         """Get the username to be used"""
         if value is None:
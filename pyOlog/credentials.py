@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+Per-user cache of Olog credentials and session cookies.
+
+Looking up a password in the keyring (or asking for it) and making the
+server authenticate every request is slow for short lived processes
+such as the olog command. When enabled in the config file, the client
+stores the resolved password and the server's session cookies in a
+file only readable by the user, and later clients reuse them until the
+entry expires:
+
+[DEFAULT]
+credential cache=true
+credential cache ttl=28800
+
+The cache file defaults to ~/.pyOlog.credentials and can be set with
+the key 'credential cache file'. Files readable by other users are
+ignored.
+"""
+
+import os
+import os.path
+import json
+import time
+import stat
+import logging
+import tempfile
+
+from .conf import _conf
+
+logger = logging.getLogger(__name__)
+
+
+class CredentialCache(object):
+    """A file holding credentials and cookies per (url, username)"""
+
+    def __init__(self, path=None, ttl=None):
+        '''
+        :param path: Filename of the cache.
+        :param ttl: Seconds for which an entry is valid.
+
+        If :param path: or :param ttl: are None they are read from the
+        config file, defaulting to ~/.pyOlog.credentials and 8 hours.
+        '''
+        if path is None:
+            path = _conf.get_value('credential cache file')
+        if path is None:
+            path = os.path.expanduser('~/.pyOlog.credentials')
+        self.path = path
+        self.ttl = _conf.get_float('credential cache ttl', ttl, 8 * 3600)
+
+    @staticmethod
+    def _key(url, username):
+        return "{} {}".format(url, username)
+
+    def _read(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return dict()
+        if st.st_mode & (stat.S_IRWXG | stat.S_IRWXO):
+            logger.warning("Ignoring credential cache %s, it is accessible "
+                           "by other users", self.path)
+            return dict()
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (IOError, ValueError) as e:
+            logger.info("Unable to read credential cache: %s", e)
+            return dict()
+
+    def _write(self, data):
+        # Write to a private temporary file and move it into place so
+        # the cache is never readable by others nor half written.
+        dirname = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(dir=dirname, prefix='.pyOlog')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f)
+            os.rename(tmp, self.path)
+        except Exception:
+            os.unlink(tmp)
+            raise
+
+    def load(self, url, username):
+        '''
+        Get the cached credentials
+
+        :returns: dict with the keys 'password' and 'cookies', or None if
+                  there is no valid entry.
+        '''
+        entry = self._read().get(self._key(url, username))
+        if entry is None or entry.get('expires', 0) < time.time():
+            return None
+        return entry
+
+    def store(self, url, username, password, cookies=None):
+        '''
+        Store credentials and session cookies
+
+        The expiry time of an entry is kept when it is updated, so
+        credentials are looked up again at least every ttl seconds.
+        '''
+        data = dict((k, v) for k, v in self._read().items()
+                    if v.get('expires', 0) >= time.time())
+        key = self._key(url, username)
+        expires = data.get(key, {}).get('expires', time.time() + self.ttl)
+        data[key] = {'password': password,
+                     'cookies': list(cookies or []),
+                     'expires': expires}
+        try:
+            self._write(data)
+        except (IOError, OSError) as e:
+            logger.warning("Unable to write credential cache: %s", e)
+
+    def clear(self, url=None, username=None):
+        '''
+        Remove an entry, or all entries if url and username are None
+        '''
+        if url is None and username is None:
+            data = dict()
+        else:
+            data = self._read()
+            data.pop(self._key(url, username), None)
+        try:
+            self._write(data)
+        except (IOError, OSError) as e:
+            logger.warning("Unable to write credential cache: %s", e)
@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""
+Columnar result sets for Olog searches.
+
+A LogEntryFrame holds the result of a search as NumPy arrays rather than
+as a list of LogEntry objects, which makes statistics over tens of
+thousands of entries cheap. Ids and times are stored as int64 arrays,
+owners, logbooks and tags are dictionary encoded and selected property
+attributes are stored as columns.
+
+NumPy is required for this module. pandas and pyarrow are optional and
+only imported by the corresponding export methods.
+"""
+
+import numpy as np
+
+#: Sentinel used for missing times, maps onto NaT in datetime64 views
+NAT = np.iinfo(np.int64).min
+
+
+class _Dictionary(object):
+    """Build a dictionary encoding of string values"""
+    def __init__(self):
+        self.categories = []
+        self._codes = {}
+
+    def encode(self, value):
+        try:
+            return self._codes[value]
+        except KeyError:
+            code = len(self.categories)
+            self._codes[value] = code
+            self.categories.append(value)
+            return code
+
+
+def _time(value):
+    if value is None:
+        return NAT
+    return int(value)
+
+
+class LogEntryFrame(object):
+    """Columnar representation of a set of log entries
+
+    :param id: Log entry ids
+    :type id: int64 array
+    :param create_time: Creation times in ms since the epoch
+    :type create_time: int64 array
+    :param modify_time: Modification times in ms since the epoch
+    :type modify_time: int64 array
+    :param owner_codes: Index of each entries owner in :param owners:
+    :type owner_codes: int32 array
+    :param owners: Owner names
+    :type owners: list of strings
+    :param logbook_offsets: Start of each entries logbooks in
+                            :param logbook_codes:
+    :type logbook_offsets: int32 array of length len(id) + 1
+    :param logbook_codes: Index of each logbook in :param logbooks:
+    :type logbook_codes: int32 array
+    :param logbooks: Logbook names
+    :type logbooks: list of strings
+    :param tag_offsets: As :param logbook_offsets: for tags
+    :param tag_codes: As :param logbook_codes: for tags
+    :param tags: Tag names
+    :param columns: Property attribute columns keyed by
+                    'property.attribute'
+    :type columns: dict of object arrays
+
+    Frames are normally created by :func OlogClient.find: with
+    as_frame=True or by :func from_json: and :func from_entries:.
+    """
+    def __init__(self, id, create_time, modify_time,
+                 owner_codes, owners,
+                 logbook_offsets, logbook_codes, logbooks,
+                 tag_offsets, tag_codes, tags, columns=None):
+        self.id = id
+        self.create_time = create_time
+        self.modify_time = modify_time
+        self.owner_codes = owner_codes
+        self.owners = owners
+        self.logbook_offsets = logbook_offsets
+        self.logbook_codes = logbook_codes
+        self.logbooks = logbooks
+        self.tag_offsets = tag_offsets
+        self.tag_codes = tag_codes
+        self.tags = tags
+        if columns is None:
+            columns = dict()
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.id)
+
+    @classmethod
+    def _build(cls, rows, columns):
+        """Build a frame from tuples of (id, create, modify, owner,
+        logbook names, tag names, {(property, attribute): value})"""
+        if columns is None:
+            columns = []
+        ids, created, modified, owner_codes = [], [], [], []
+        owners, logbooks, tags = _Dictionary(), _Dictionary(), _Dictionary()
+        logbook_offsets, logbook_codes = [0], []
+        tag_offsets, tag_codes = [0], []
+        values = dict((c, []) for c in columns)
+
+        for lid, create, modify, owner, lbs, tgs, props in rows:
+            ids.append(lid)
+            created.append(_time(create))
+            modified.append(_time(modify))
+            owner_codes.append(owners.encode(owner))
+            logbook_codes.extend(logbooks.encode(n) for n in lbs)
+            logbook_offsets.append(len(logbook_codes))
+            tag_codes.extend(tags.encode(n) for n in tgs)
+            tag_offsets.append(len(tag_codes))
+            for c in columns:
+                values[c].append(props.get(c))
+
+        cols = dict()
+        for c in columns:
+            arr = np.empty(len(ids), dtype=object)
+            arr[:] = values[c]
+            cols['.'.join(c)] = arr
+
+        return cls(np.array(ids, dtype=np.int64),
+                   np.array(created, dtype=np.int64),
+                   np.array(modified, dtype=np.int64),
+                   np.array(owner_codes, dtype=np.int32), owners.categories,
+                   np.array(logbook_offsets, dtype=np.int32),
+                   np.array(logbook_codes, dtype=np.int32),
+                   logbooks.categories,
+                   np.array(tag_offsets, dtype=np.int32),
+                   np.array(tag_codes, dtype=np.int32), tags.categories,
+                   cols)
+
+    @classmethod
+    def from_json(cls, records, columns=None):
+        '''
+        Create a frame from decoded Olog JSON log entries
+
+        :param records: Log entries as returned by the Olog resources
+        :type records: list of dicts
+        :param columns: Property attributes to store as columns
+        :type columns: list of (property name, attribute name) tuples
+
+        This skips the creation of LogEntry objects and is what
+        :func OlogClient.find: uses.
+        '''
+        def rows():
+            for r in records:
+                props = dict()
+                for p in r.get('properties') or []:
+                    for k, v in (p.get('attributes') or {}).items():
+                        props[(p['name'], k)] = v
+                yield (r['id'], r.get('createdDate'), r.get('modifiedDate'),
+                       r.get('owner'),
+                       [l['name'] for l in r.get('logbooks') or []],
+                       [t['name'] for t in r.get('tags') or []],
+                       props)
+        return cls._build(rows(), columns)
+
+    @classmethod
+    def from_entries(cls, entries, columns=None):
+        '''
+        Create a frame from LogEntry objects
+
+        :param entries: Log entries
+        :type entries: list of LogEntry
+        :param columns: Property attributes to store as columns
+        :type columns: list of (property name, attribute name) tuples
+        '''
+        def rows():
+            for e in entries:
+                props = dict()
+                for p in e.properties:
+                    for k, v in (p.attributes or {}).items():
+                        props[(p.name, k)] = v
+                yield (e.id, e.create_time, e.modify_time, e.owner,
+                       [l.name for l in e.logbooks],
+                       [t.name for t in e.tags],
+                       props)
+        return cls._build(rows(), columns)
+
+    @property
+    def owner(self):
+        """Owner of each entry as an object array"""
+        return np.asarray(self.owners, dtype=object)[self.owner_codes]
+
+    def _contains(self, offsets, codes, categories, name):
+        mask = np.zeros(len(self), dtype=bool)
+        try:
+            code = categories.index(name)
+        except ValueError:
+            return mask
+        rows = np.repeat(np.arange(len(self)), np.diff(offsets))
+        mask[rows[codes == code]] = True
+        return mask
+
+    def has_tag(self, name):
+        """Boolean mask of the entries tagged with :param name:"""
+        return self._contains(self.tag_offsets, self.tag_codes,
+                              self.tags, name)
+
+    def in_logbook(self, name):
+        """Boolean mask of the entries in the logbook :param name:"""
+        return self._contains(self.logbook_offsets, self.logbook_codes,
+                              self.logbooks, name)
+
+    def _lists(self, offsets, codes, categories):
+        names = np.asarray(categories, dtype=object)[codes]
+        out = np.empty(len(self), dtype=object)
+        out[:] = [list(names[offsets[i]:offsets[i + 1]])
+                  for i in range(len(self))]
+        return out
+
+    def to_pandas(self):
+        '''
+        Convert to a pandas DataFrame indexed by log entry id
+
+        The ids and times are handed to pandas without copying, the times
+        viewed as datetime64. The owners become a Categorical, whose codes
+        pandas narrows to the smallest integer type so they are copied,
+        and logbooks and tags are materialised as lists of names.
+        '''
+        import pandas as pd
+
+        data = [('create_time', self.create_time.view('M8[ms]')),
+                ('modify_time', self.modify_time.view('M8[ms]')),
+                ('owner', pd.Categorical.from_codes(self.owner_codes,
+                                                    self.owners)),
+                ('logbooks', self._lists(self.logbook_offsets,
+                                         self.logbook_codes, self.logbooks)),
+                ('tags', self._lists(self.tag_offsets,
+                                     self.tag_codes, self.tags))]
+        data.extend(sorted(self.columns.items()))
+        index = pd.Index(self.id, name='id', copy=False)
+        # Without copy=False the columns of a dict are copied
+        return pd.DataFrame(dict(data), index=index,
+                            columns=[n for n, _ in data], copy=False)
+
+    def to_arrow(self):
+        '''
+        Convert to a pyarrow Table
+
+        Numeric columns share their buffers with the frame, owners are
+        stored as a DictionaryArray and logbooks and tags as lists of
+        dictionary encoded strings.
+        '''
+        import pyarrow as pa
+
+        def dictionary(codes, categories):
+            return pa.DictionaryArray.from_arrays(
+                pa.array(codes), pa.array(categories, type=pa.string()))
+
+        def nested(offsets, codes, categories):
+            return pa.ListArray.from_arrays(pa.array(offsets),
+                                            dictionary(codes, categories))
+
+        def times(t):
+            return pa.array(t, type=pa.timestamp('ms'), mask=(t == NAT))
+
+        arrays = [pa.array(self.id),
+                  times(self.create_time), times(self.modify_time),
+                  dictionary(self.owner_codes, self.owners),
+                  nested(self.logbook_offsets, self.logbook_codes,
+                         self.logbooks),
+                  nested(self.tag_offsets, self.tag_codes, self.tags)]
+        names = ['id', 'create_time', 'modify_time', 'owner',
+                 'logbooks', 'tags']
+        for name, values in sorted(self.columns.items()):
+            arrays.append(pa.array(values, type=pa.string()))
+            names.append(name)
+        return pa.Table.from_arrays(arrays, names=names)
+
+    def to_parquet(self, where, **kwargs):
+        '''
+        Write the frame to a Parquet file
+
+        :param where: Filename or file object to write to.
+
+        Any other keyword arguments are passed on to
+        :func pyarrow.parquet.write_table:
+        '''
+        import pyarrow.parquet as pq
+        pq.write_table(self.to_arrow(), where, **kwargs)
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+Local full-text index of log entries.
+
+The index uses the SQLite FTS5 extension to index the description and
+the property values of log entries. It is filled from the results of
+:func OlogClient.find: and answers ranked searches locally:
+
+>> index = FullTextIndex('olog.idx')
+>> index.add(client.find(logbook='Operations'))
+>> index.search('timing AND magnet*')
+
+Queries use the FTS5 syntax: words are ANDed together, "..." searches
+for a phrase, a trailing '*' matches a prefix and AND, OR, NOT and
+parentheses combine terms.
+"""
+
+import sqlite3
+import logging
+
+logger = logging.getLogger(__name__)
+
+_schema = """
+CREATE VIRTUAL TABLE IF NOT EXISTS fulltext USING fts5(
+    description, properties, tokenize = 'porter unicode61'
+);
+CREATE TABLE IF NOT EXISTS fulltext_state (
+    id INTEGER PRIMARY KEY,
+    modified INTEGER
+);
+"""
+
+
+def _property_text(entry):
+    return "\n".join("{} {}".format(k, v)
+                     for p in entry.properties
+                     for k, v in (p.attributes or {}).items()
+                     if v is not None)
+
+
+class FullTextIndex(object):
+    """Full-text index over log entry descriptions and property values"""
+
+    def __init__(self, path=':memory:', db=None):
+        '''
+        Open (or create) an index
+
+        :param path: Filename of the SQLite database holding the index.
+        :param db: An open sqlite3 connection to use instead of
+                   :param path:, the index tables are added to it.
+        '''
+        if db is None:
+            db = sqlite3.connect(path)
+        self._db = db
+        try:
+            self._db.executescript(_schema)
+        except sqlite3.OperationalError as e:
+            raise RuntimeError("SQLite FTS5 is not available ({})".format(e))
+        self._db.commit()
+
+    def __len__(self):
+        return self._db.execute("SELECT count(*) FROM fulltext_state") \
+            .fetchone()[0]
+
+    @property
+    def last_modified(self):
+        """Latest modification time of the indexed entries or None"""
+        return self._db.execute("SELECT max(modified) FROM fulltext_state") \
+            .fetchone()[0]
+
+    def add(self, entries, commit=True):
+        '''
+        Add log entries to the index
+
+        :param entries: Log entries as returned by :func OlogClient.find:
+        :type entries: list of LogEntry
+
+        Entries already in the index are only re-indexed if they were
+        modified since, so overlapping results can be added repeatedly.
+
+        :returns: Number of entries (re-)indexed.
+        '''
+        count = 0
+        for e in entries:
+            row = self._db.execute("SELECT modified FROM fulltext_state "
+                                   "WHERE id = ?", (e.id,)).fetchone()
+            if row is not None:
+                if (row[0] or 0) >= (e.modify_time or 0):
+                    continue
+                self._db.execute("DELETE FROM fulltext WHERE rowid = ?",
+                                 (e.id,))
+            self._db.execute("INSERT INTO fulltext (rowid, description, "
+                             "properties) VALUES (?, ?, ?)",
+                             (e.id, e.text, _property_text(e)))
+            self._db.execute("INSERT OR REPLACE INTO fulltext_state "
+                             "VALUES (?, ?)", (e.id, e.modify_time))
+            count += 1
+        if commit:
+            self._db.commit()
+        return count
+
+    def remove(self, ids, commit=True):
+        '''
+        Remove log entries from the index
+
+        :param ids: Ids of the log entries to remove.
+        '''
+        for i in ids:
+            self._db.execute("DELETE FROM fulltext WHERE rowid = ?", (i,))
+            self._db.execute("DELETE FROM fulltext_state WHERE id = ?", (i,))
+        if commit:
+            self._db.commit()
+
+    def search(self, query, limit=100):
+        '''
+        Search the index
+
+        :param query: FTS5 query string.
+        :param limit: Maximum number of ids to return, None for all.
+
+        >> index.search('"beam dump"')
+        find entries containing the phrase 'beam dump'
+        >> index.search('magnet* NOT quench')
+        find entries with a word starting with 'magnet' but without the
+        word 'quench'
+        >> index.search('properties: 1234')
+        only search the property values
+
+        :returns: Log entry ids, best match first.
+        '''
+        sql = "SELECT rowid FROM fulltext WHERE fulltext MATCH ? ORDER BY rank"
+        args = [query]
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(int(limit))
+        return [r[0] for r in self._db.execute(sql, args)]
@@ -0,0 +1,406 @@
+"""
+Browser of the log entries in the Olog.
+
+The :class LogEntryModel: shows the results of :func OlogClient.find: a
+page at a time. Pages are fetched by a :class PageFetcher: on a worker
+thread when the view scrolls to the last loaded row, and the page after
+it is prefetched so scrolling rarely waits for the server. The decoded
+pages are kept in an LRU cache, a page dropped from it is fetched again
+when its rows are shown, so the memory used stays bounded however many
+entries are browsed.
+
+The thumbnails of the image attachments of the selected entry are made
+by a :class ThumbnailLoader: on a second worker thread and cached.
+
+The sizes are read from the config file:
+
+[DEFAULT]
+gui page size=200
+gui cache pages=100
+gui thumbnail size=128
+"""
+
+import io
+import time
+import mimetypes
+
+from .qt import QtCore, QtGui, QtWidgets
+
+from ..conf import _conf
+from ..utils import LRUCache
+
+#: The columns of the browser and their headers
+columns = ['Id', 'Created', 'Owner', 'Logbooks', 'Tags', 'Text']
+
+
+class PageFetcher(QtCore.QObject):
+    """Fetch pages of search results, lives on a worker thread"""
+
+    pageReady = QtCore.pyqtSignal(int, int, object)
+    pageFailed = QtCore.pyqtSignal(int, int, str)
+
+    def __init__(self, client):
+        super(PageFetcher, self).__init__()
+        self.client = client
+
+    @QtCore.pyqtSlot(int, int, int, object)
+    def fetch(self, generation, page, page_size, criteria):
+        '''
+        Fetch a page of log entries
+
+        :param generation: Passed back, to tell results of an earlier
+                           search from those of the current one.
+        :param page: The page, counted from 0.
+        '''
+        try:
+            entries = self.client.find(page=page + 1, limit=page_size,
+                                       **criteria)
+        except Exception as e:
+            self.pageFailed.emit(generation, page, str(e))
+        else:
+            self.pageReady.emit(generation, page, entries)
+
+
+class ThumbnailLoader(QtCore.QObject):
+    """Make thumbnails of image attachments, lives on a worker thread"""
+
+    thumbnailReady = QtCore.pyqtSignal(object, object, object)
+
+    def __init__(self, client, size=128):
+        super(ThumbnailLoader, self).__init__()
+        self.client = client
+        self.size = size
+
+    @QtCore.pyqtSlot(object)
+    def load(self, log_entry_id):
+        '''
+        Load the thumbnails of the images attached to a log entry
+
+        thumbnailReady is emitted with the id, the filename and a QImage
+        for each image, and with the filename None when all are done.
+        '''
+        try:
+            names = self.client.list_attachment_names(log_entry_id)
+        except Exception:
+            names = []
+        for name in names:
+            mtype = mimetypes.guess_type(name)[0]
+            if mtype is None or not mtype.startswith('image/'):
+                continue
+            data = io.BytesIO()
+            try:
+                self.client.download_attachment(log_entry_id, name, data)
+            except Exception:
+                continue
+            image = QtGui.QImage.fromData(data.getvalue())
+            if image.isNull():
+                continue
+            # QImage, unlike QPixmap, may be scaled outside the GUI thread
+            image = image.scaled(self.size, self.size,
+                                 QtCore.Qt.KeepAspectRatio,
+                                 QtCore.Qt.SmoothTransformation)
+            self.thumbnailReady.emit(log_entry_id, name, image)
+        self.thumbnailReady.emit(log_entry_id, None, None)
+
+
+class LogEntryModel(QtCore.QAbstractTableModel):
+    """Table of the log entries found by a search, loaded lazily"""
+
+    #: Seconds before a page which failed is fetched again, doubled for
+    #: each failure in a row up to max_backoff
+    min_backoff = 1.
+    max_backoff = 60.
+
+    requestPage = QtCore.pyqtSignal(int, int, int, object)
+    error = QtCore.pyqtSignal(str)
+
+    def __init__(self, client, page_size=None, cache_pages=None,
+                 parent=None):
+        '''
+        :param client: The OlogClient used to search.
+        :param page_size: Number of entries fetched per request.
+        :param cache_pages: Number of decoded pages kept in memory.
+        '''
+        super(LogEntryModel, self).__init__(parent)
+        self.page_size = _conf.get_int('gui page size', page_size, 200)
+        self.criteria = {}
+        self._pages = LRUCache(_conf.get_int('gui cache pages',
+                                             cache_pages, 100))
+        self._generation = 0
+        self._pending = set()
+        self._rows = 0
+        self._at_end = False
+        self._wanted = False
+        self._failed = dict()
+        self._backoff = self.min_backoff
+
+        self._thread = QtCore.QThread(self)
+        self._fetcher = PageFetcher(client)
+        self._fetcher.moveToThread(self._thread)
+        self.requestPage.connect(self._fetcher.fetch)
+        self._fetcher.pageReady.connect(self._page_ready)
+        self._fetcher.pageFailed.connect(self._page_failed)
+        self._thread.start()
+
+    def close(self):
+        """Stop the worker thread"""
+        self._thread.quit()
+        self._thread.wait()
+
+    def search(self, **criteria):
+        '''
+        Show the log entries matching the criteria of :func OlogClient.find:
+
+        The results of earlier searches still on their way are ignored.
+        '''
+        self.beginResetModel()
+        self.criteria = criteria
+        self._generation += 1
+        self._pages.clear()
+        self._pending.clear()
+        self._failed.clear()
+        self._backoff = self.min_backoff
+        self._rows = 0
+        self._at_end = False
+        self._wanted = True
+        self.endResetModel()
+        self._request(0)
+
+    def refresh(self):
+        """Search again with the current criteria"""
+        self.search(**self.criteria)
+
+    def _request(self, page):
+        if page in self._pending or page in self._pages:
+            return
+        if time.time() < self._failed.get(page, 0):
+            return
+        self._pending.add(page)
+        self.requestPage.emit(self._generation, page, self.page_size,
+                              self.criteria)
+
+    def _loaded_pages(self):
+        return (self._rows + self.page_size - 1) // self.page_size
+
+    def _append(self, page, entries):
+        """Add the rows of the page after the last loaded one"""
+        self._wanted = False
+        if len(entries) < self.page_size:
+            self._at_end = True
+        if entries:
+            first = page * self.page_size
+            self.beginInsertRows(QtCore.QModelIndex(), first,
+                                 first + len(entries) - 1)
+            self._rows = first + len(entries)
+            self.endInsertRows()
+        if not self._at_end:
+            # Prefetch, it is only shown by the next fetchMore
+            self._request(page + 1)
+
+    @QtCore.pyqtSlot(int, int, object)
+    def _page_ready(self, generation, page, entries):
+        if generation != self._generation:
+            return
+        self._pending.discard(page)
+        self._failed.pop(page, None)
+        self._backoff = self.min_backoff
+        self._pages.put(page, entries)
+        if page == self._loaded_pages() and self._wanted:
+            self._append(page, entries)
+        elif page < self._loaded_pages():
+            # A page dropped from the cache was fetched again
+            first = page * self.page_size
+            last = min(first + self.page_size, self._rows) - 1
+            self.dataChanged.emit(self.index(first, 0),
+                                  self.index(last, len(columns) - 1))
+
+    @QtCore.pyqtSlot(int, int, str)
+    def _page_failed(self, generation, page, message):
+        if generation != self._generation:
+            return
+        self._pending.discard(page)
+        self._failed[page] = time.time() + self._backoff
+        if page == self._loaded_pages() and self._wanted:
+            # Fetched again by the timer, canFetchMore stays False so the
+            # view does not retry it in a loop
+            QtCore.QTimer.singleShot(int(self._backoff * 1000),
+                                     lambda: self._retry(generation, page))
+        self._backoff = min(self._backoff * 2, self.max_backoff)
+        self.error.emit(message)
+
+    def _retry(self, generation, page):
+        if generation != self._generation or not self._wanted or \
+                page != self._loaded_pages():
+            return
+        self._failed.pop(page, None)
+        self._request(page)
+
+    def canFetchMore(self, parent):
+        if parent.isValid():
+            return False
+        return not self._at_end and not self._wanted
+
+    def fetchMore(self, parent):
+        if parent.isValid():
+            return
+        page = self._loaded_pages()
+        self._wanted = True
+        entries = self._pages.get(page)
+        if entries is None:
+            self._request(page)
+        else:
+            self._append(page, entries)
+
+    def entry(self, row):
+        '''
+        The log entry shown in a row
+
+        :returns: The LogEntry, or None while its page is being fetched
+                  or after fetching it failed.
+        '''
+        page, i = divmod(row, self.page_size)
+        entries = self._pages.get(page)
+        if entries is None:
+            self._request(page)
+            return None
+        if i >= len(entries):
+            # The page got shorter when it was fetched again
+            return None
+        return entries[i]
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._rows
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(columns)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if (orientation == QtCore.Qt.Horizontal and
+                role == QtCore.Qt.DisplayRole):
+            return columns[section]
+        return None
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid() or role != QtCore.Qt.DisplayRole:
+            return None
+        log = self.entry(index.row())
+        column = index.column()
+        if log is None:
+            return 'Loading...' if column == 0 else None
+        if column == 0:
+            return log.id
+        elif column == 1:
+            if log.create_time is None:
+                return ''
+            return time.strftime('%Y-%m-%d %H:%M:%S',
+                                 time.localtime(log.create_time / 1000.))
+        elif column == 2:
+            return log.owner
+        elif column == 3:
+            return ', '.join(l.name for l in log.logbooks)
+        elif column == 4:
+            return ', '.join(t.name for t in log.tags)
+        elif column == 5:
+            return log.text.splitlines()[0] if log.text else ''
+
+
+class LogBrowser(QtWidgets.QWidget):
+    """Search field, list of log entries and the selected entry"""
+
+    thumbnailRequested = QtCore.pyqtSignal(object)
+
+    def __init__(self, client, parent=None):
+        super(LogBrowser, self).__init__(parent)
+        self.model = LogEntryModel(client, parent=self)
+        self._thumbnails = LRUCache(200)
+        self._current = None
+
+        self.search_edit = QtWidgets.QLineEdit(self)
+        self.search_edit.setPlaceholderText('Search')
+        self.search_edit.returnPressed.connect(self.search)
+
+        self.view = QtWidgets.QTreeView(self)
+        self.view.setRootIsDecorated(False)
+        # Lets the view lay out 100k+ rows without asking for each height
+        self.view.setUniformRowHeights(True)
+        self.view.setAlternatingRowColors(True)
+        self.view.setModel(self.model)
+        self.view.selectionModel().currentRowChanged.connect(self._show)
+
+        self.text_area = QtWidgets.QTextEdit(self)
+        self.text_area.setReadOnly(True)
+        size = _conf.get_int('gui thumbnail size', None, 128)
+        self.attachment_list = QtWidgets.QListWidget(self)
+        self.attachment_list.setViewMode(QtWidgets.QListView.IconMode)
+        self.attachment_list.setIconSize(QtCore.QSize(size, size))
+        self.attachment_list.setMaximumHeight(size + 40)
+
+        self._thread = QtCore.QThread(self)
+        self._loader = ThumbnailLoader(client, size)
+        self._loader.moveToThread(self._thread)
+        self.thumbnailRequested.connect(self._loader.load)
+        self._loader.thumbnailReady.connect(self._thumbnail_ready)
+        self._thread.start()
+
+        detail = QtWidgets.QWidget(self)
+        detail_layout = QtWidgets.QVBoxLayout(detail)
+        detail_layout.setContentsMargins(0, 0, 0, 0)
+        detail_layout.addWidget(self.text_area)
+        detail_layout.addWidget(self.attachment_list)
+
+        splitter = QtWidgets.QSplitter(QtCore.Qt.Vertical, self)
+        splitter.addWidget(self.view)
+        splitter.addWidget(detail)
+        splitter.setStretchFactor(0, 3)
+
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.addWidget(self.search_edit)
+        layout.addWidget(splitter)
+
+    def close(self):
+        """Stop the worker threads"""
+        self.model.close()
+        self._thread.quit()
+        self._thread.wait()
+
+    def search(self):
+        """Search for the text of the search field"""
+        text = self.search_edit.text().strip()
+        if text:
+            self.model.search(search='*{}*'.format(text))
+        else:
+            self.model.search()
+
+    def _show(self, current, previous):
+        self.text_area.clear()
+        self.attachment_list.clear()
+        log = self.model.entry(current.row()) if current.isValid() else None
+        self._current = None if log is None else log.id
+        if log is None:
+            return
+        self.text_area.setPlainText(log.text)
+        thumbnails = self._thumbnails.get(log.id)
+        if thumbnails is None:
+            self._thumbnails.put(log.id, [])
+            self.thumbnailRequested.emit(log.id)
+        else:
+            for name, image in thumbnails:
+                self._add_thumbnail(name, image)
+
+    def _add_thumbnail(self, name, image):
+        icon = QtGui.QIcon(QtGui.QPixmap.fromImage(image))
+        self.attachment_list.addItem(QtWidgets.QListWidgetItem(icon, name))
+
+    @QtCore.pyqtSlot(object, object, object)
+    def _thumbnail_ready(self, log_entry_id, name, image):
+        if image is None:
+            return
+        thumbnails = self._thumbnails.get(log_entry_id)
+        if thumbnails is not None:
+            thumbnails.append((name, image))
+        if log_entry_id == self._current:
+            self._add_thumbnail(name, image)
@@ -1,21 +1,30 @@
 import sys
-from PyQt4 import QtGui
-from scribble import ScribbleArea
+from .qt import QtWidgets
+from .. import OlogClient
+from .scribble import ScribbleArea
+from .browser import LogBrowser
 
 
-class MainWindow(QtGui.QMainWindow):
-    def __init__(self, parent=None):
-        QtGui.QMainWindow.__init__(self, parent)
+class MainWindow(QtWidgets.QMainWindow):
+    def __init__(self, client, parent=None):
+        QtWidgets.QMainWindow.__init__(self, parent)
         self.scribble_area = ScribbleArea()
-        self.text_area = QtGui.QTextEdit(self)
-        self.setCentralWidget(self.text_area)
+        self.browser = LogBrowser(client, self)
+        self.browser.model.error.connect(self.statusBar().showMessage)
+        self.setCentralWidget(self.browser)
         self.setGeometry(20, 20, 1030, 800)
         self.setWindowTitle("Olog Gui Client")
+        self.browser.search()
+
+    def closeEvent(self, event):
+        self.browser.close()
+        QtWidgets.QMainWindow.closeEvent(self, event)
 
 
 def main():
-    app = QtGui.QApplication(sys.argv)
-    main = MainWindow()
+    app = QtWidgets.QApplication(sys.argv)
+    # Browsing needs no password, so never block asking for one
+    main = MainWindow(OlogClient(ask=False))
     main.show()
 
     sys.exit(app.exec_())
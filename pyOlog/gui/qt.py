@@ -0,0 +1,12 @@
+"""
+The Qt bindings used by the gui, PyQt4 or else PyQt5.
+
+The widgets are in QtWidgets and printing in QtPrintSupport, as in
+PyQt5. With PyQt4 both are QtGui.
+"""
+
+try:
+    from PyQt4 import QtCore, QtGui
+    QtWidgets = QtPrintSupport = QtGui
+except ImportError:
+    from PyQt5 import QtCore, QtGui, QtWidgets, QtPrintSupport
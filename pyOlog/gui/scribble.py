@@ -1,7 +1,7 @@
-from PyQt4 import QtCore, QtGui
+from .qt import QtCore, QtGui, QtWidgets, QtPrintSupport
 
 
-class ScribbleArea(QtGui.QWidget):
+class ScribbleArea(QtWidgets.QWidget):
     def __init__(self, parent=None):
         super(ScribbleArea, self).__init__(parent)
 
@@ -98,10 +98,10 @@ class ScribbleArea(QtGui.QWidget):
         self.image = newImage
 
     def print_(self):
-        printer = QtGui.QPrinter(QtGui.QPrinter.HighResolution)
+        printer = QtPrintSupport.QPrinter(QtPrintSupport.QPrinter.HighResolution)
 
-        printDialog = QtGui.QPrintDialog(printer, self)
-        if printDialog.exec_() == QtGui.QDialog.Accepted:
+        printDialog = QtPrintSupport.QPrintDialog(printer, self)
+        if printDialog.exec_() == QtWidgets.QDialog.Accepted:
             painter = QtGui.QPainter(printer)
             rect = painter.viewport()
             size = self.image.size()
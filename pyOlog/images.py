@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+Optimization of image attachments before upload.
+
+Screenshots of large screens are many megabytes as lossless PNG. The
+:class ImagePipeline: shrinks image attachments to a maximum size,
+re-encodes them with a chosen format and quality, strips their metadata
+(EXIF, ICC profiles, text chunks) and can add a thumbnail of each. The
+work is done in a worker thread, so it overlaps with e.g. editing the
+text of the log entry.
+
+The pipeline needs Pillow; without it attachments are uploaded as they
+are. Images are also left as they are unless a maximum size, format or
+thumbnail is set, by argument or in the config file:
+
+[DEFAULT]
+image max size=1920
+image format=jpeg
+image quality=85
+image thumbnail=true
+image thumbnail size=256
+"""
+
+import io
+import os
+import logging
+import mimetypes
+from concurrent.futures import ThreadPoolExecutor
+
+import six
+
+from .OlogDataTypes import Attachment
+from .conf import _conf
+
+logger = logging.getLogger(__name__)
+
+#: File extensions of the formats images can be encoded in
+extensions = {'JPEG': '.jpg', 'PNG': '.png', 'WEBP': '.webp'}
+
+
+def _pil():
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    return Image
+
+
+def is_image(attachment):
+    """Whether an attachment is an image, judged by its filename"""
+    name = attachment.filename or getattr(attachment.file, 'name', None)
+    if not isinstance(name, six.string_types):
+        return False
+    mtype = mimetypes.guess_type(name)[0]
+    return mtype is not None and mtype.startswith('image/')
+
+
+def _open(attachment):
+    """Open the image of an attachment with PIL"""
+    data = attachment.file
+    if isinstance(data, bytes):
+        data = io.BytesIO(data)
+    elif hasattr(data, 'seek'):
+        data.seek(0)
+    img = _pil().open(data)
+    img.load()
+    return img
+
+
+def _filename(attachment, format, prefix=''):
+    name = attachment.filename or os.path.basename(attachment.file.name)
+    return prefix + os.path.splitext(name)[0] + extensions[format]
+
+
+def _encode(img, format, quality, keep_metadata=False, info=None):
+    kwargs = {}
+    if format in ('JPEG', 'WEBP'):
+        kwargs['quality'] = quality
+    if format in ('JPEG', 'PNG'):
+        kwargs['optimize'] = True
+    if format == 'JPEG' and img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+    if keep_metadata and info:
+        for key in ('exif', 'icc_profile'):
+            if info.get(key):
+                kwargs[key] = info[key]
+    out = io.BytesIO()
+    img.save(out, format=format, **kwargs)
+    out.seek(0)
+    return out
+
+
+def optimize_image(attachment, max_size=None, format=None, quality=85,
+                   strip=True):
+    '''
+    Downscale and re-encode an image attachment
+
+    :param attachment: The Attachment holding the image.
+    :param max_size: Shrink the image so neither side is larger than
+                     this many pixels, keeping its aspect ratio.
+    :param format: Encode as 'jpeg', 'png' or 'webp', by default in the
+                   format of the image.
+    :param quality: The quality of JPEG and WEBP images (1-95).
+    :param strip: Drop the metadata of the image.
+
+    :returns: A new Attachment, or :param attachment: if Pillow is not
+              installed.
+    '''
+    if _pil() is None:
+        logger.info("Pillow is not installed, image %s not optimized",
+                    attachment.filename)
+        return attachment
+    img = _open(attachment)
+    info = dict(img.info)
+    format = (format or img.format or 'PNG').upper()
+    if format == 'JPG':
+        format = 'JPEG'
+    if format not in extensions:
+        raise ValueError("Unsupported image format {}".format(format))
+
+    if max_size and max(img.size) > max_size:
+        img.thumbnail((max_size, max_size), _pil().LANCZOS)
+    data = _encode(img, format, quality, not strip, info)
+    return Attachment(data, _filename(attachment, format))
+
+
+def make_thumbnail(attachment, size=256, format='PNG'):
+    '''
+    Make a thumbnail of an image attachment
+
+    :param size: Neither side of the thumbnail is larger than this.
+
+    :returns: An Attachment named thumbnail_<name of the image>
+    '''
+    img = _open(attachment)
+    img.thumbnail((size, size), _pil().LANCZOS)
+    format = format.upper()
+    return Attachment(_encode(img, format, 85),
+                      _filename(attachment, format, 'thumbnail_'))
+
+
+class ImagePipeline(object):
+    """Optimize the image attachments of a log entry in the background"""
+
+    def __init__(self, max_size=None, format=None, quality=None,
+                 thumbnail=None, thumbnail_size=None, strip=True):
+        '''
+        :param max_size: See :func optimize_image:
+        :param format: See :func optimize_image:
+        :param quality: See :func optimize_image:
+        :param thumbnail: Also attach a thumbnail of each image.
+        :param thumbnail_size: See :func make_thumbnail:
+        :param strip: See :func optimize_image:
+
+        Arguments which are None are read from the config file keys
+        'image max size', 'image format', 'image quality', 'image
+        thumbnail' and 'image thumbnail size'.
+        '''
+        self.max_size = _conf.get_int('image max size', max_size)
+        self.format = _conf.get_value('image format', format)
+        self.quality = _conf.get_int('image quality', quality, 85)
+        self.thumbnail = _conf.get_bool('image thumbnail', thumbnail, False)
+        self.thumbnail_size = _conf.get_int('image thumbnail size',
+                                            thumbnail_size, 256)
+        self.strip = strip
+        self._pool = ThreadPoolExecutor(1)
+
+    @property
+    def enabled(self):
+        """Whether the pipeline changes any attachment, images are only
+        re-encoded when a maximum size, format or thumbnail is set"""
+        return _pil() is not None and bool(
+            self.max_size or self.format or self.thumbnail)
+
+    def process(self, attachments):
+        '''
+        Optimize the images among attachments
+
+        :returns: List of Attachment, other attachments are unchanged and
+                  each image is followed by its thumbnail if enabled.
+        '''
+        if not self.enabled:
+            return list(attachments)
+        result = []
+        for a in attachments:
+            if not is_image(a):
+                result.append(a)
+                continue
+            try:
+                image = optimize_image(a, self.max_size, self.format,
+                                       self.quality, self.strip)
+            except Exception as e:
+                # Better the original than no attachment at all
+                logger.warning("Unable to optimize image %s: %s",
+                               a.filename, e)
+                result.append(a)
+                continue
+            result.append(image)
+            if self.thumbnail:
+                result.append(make_thumbnail(image, self.thumbnail_size))
+        return result
+
+    def submit(self, attachments):
+        '''
+        Optimize the images among attachments in a worker thread
+
+        :returns: A Future of the result of :func process:
+        '''
+        return self._pool.submit(self.process, list(attachments))
@@ -0,0 +1,431 @@
+# -*- coding: utf-8 -*-
+"""
+Local SQLite mirror of an Olog instance.
+
+The mirror keeps a replica of the log entries, tags, logbooks and
+properties of an Olog in a SQLite database. It is kept up to date with
+:func OlogMirror.sync: which fetches the entries created since the last
+sync through :func OlogClient.find: in fixed time windows, and it
+answers :func OlogClient.find: compatible queries locally:
+
+>> mirror = OlogMirror(OlogClient())
+>> mirror.sync(start=time.time() - 30 * 86400)
+>> mirror.find(logbook='Operations', search='*Timing*')
+
+The Olog can only be searched by creation time, so a sync can not ask
+for the entries modified since the last one. Instead each sync fetches
+again the entries created in the last :param refresh: seconds, which
+brings in the edits of recent entries. Edits of entries older than that
+only reach the mirror with a sync given an explicit start, until then
+the mirror returns the old version of them.
+
+The location of the database can be set in the config file with the
+key 'mirror'.
+"""
+
+import os
+import os.path
+import time
+import json
+import sqlite3
+import logging
+
+from .OlogDataTypes import LogEntry, Logbook, Tag, Property
+from .collection import LogEntryCollection
+from .fulltext import FullTextIndex
+from .conf import _conf
+
+logger = logging.getLogger(__name__)
+
+_schema = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    owner TEXT,
+    description TEXT,
+    created INTEGER,
+    modified INTEGER
+);
+CREATE TABLE IF NOT EXISTS entry_logbooks (
+    entry_id INTEGER, name TEXT, owner TEXT
+);
+CREATE TABLE IF NOT EXISTS entry_tags (
+    entry_id INTEGER, name TEXT, state TEXT
+);
+CREATE TABLE IF NOT EXISTS entry_properties (
+    entry_id INTEGER, name TEXT, attribute TEXT, value TEXT
+);
+CREATE TABLE IF NOT EXISTS logbooks (name TEXT PRIMARY KEY, owner TEXT);
+CREATE TABLE IF NOT EXISTS tags (name TEXT PRIMARY KEY, state TEXT);
+CREATE TABLE IF NOT EXISTS properties (name TEXT PRIMARY KEY,
+                                       attributes TEXT);
+CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value);
+CREATE INDEX IF NOT EXISTS entries_created ON entries (created);
+CREATE INDEX IF NOT EXISTS entries_modified ON entries (modified);
+CREATE INDEX IF NOT EXISTS entry_logbooks_name
+    ON entry_logbooks (name, entry_id);
+CREATE INDEX IF NOT EXISTS entry_logbooks_entry ON entry_logbooks (entry_id);
+CREATE INDEX IF NOT EXISTS entry_tags_name ON entry_tags (name, entry_id);
+CREATE INDEX IF NOT EXISTS entry_tags_entry ON entry_tags (entry_id);
+CREATE INDEX IF NOT EXISTS entry_properties_name
+    ON entry_properties (name, attribute, entry_id);
+CREATE INDEX IF NOT EXISTS entry_properties_entry
+    ON entry_properties (entry_id);
+"""
+
+
+def _like(pattern):
+    """Convert an Olog wildcard pattern to a SQL LIKE pattern"""
+    pattern = "{}".format(pattern)
+    for c in ('\\', '%', '_'):
+        pattern = pattern.replace(c, '\\' + c)
+    return pattern.replace('*', '%').replace('?', '_')
+
+
+class OlogMirror(object):
+    """A local replica of an Olog instance"""
+
+    #: Child tables holding the logbooks, tags and properties of entries
+    entry_tables = ('entry_logbooks', 'entry_tags', 'entry_properties')
+
+    def __init__(self, client=None, path=None, window=86400, overlap=60,
+                 refresh=7 * 86400):
+        '''
+        Open (or create) a mirror
+
+        :param client: The OlogClient used to synchronize the mirror.
+        :param path: Filename of the SQLite database.
+        :param window: Length in seconds of the time windows fetched
+                       from the server during a sync.
+        :param overlap: Seconds by which each sync goes back before the
+                        end of the previous one.
+        :param refresh: Each sync fetches again the entries created in
+                        this many seconds before its end, to pick up
+                        their modifications.
+
+        If :param path: is None, then the path is read from the config
+        file (key 'mirror') and defaults to ~/.pyOlog.mirror.sqlite.
+        The client is only needed for :func sync:, a mirror opened
+        without one can only be queried.
+        '''
+        if path is None:
+            path = _conf.get_value('mirror')
+        if path is None:
+            path = os.path.expanduser('~/.pyOlog.mirror.sqlite')
+        self.client = client
+        self.path = path
+        self.window = window
+        self.overlap = overlap
+        self.refresh = refresh
+        self._db = sqlite3.connect(path)
+        self._db.executescript(_schema)
+        self._db.commit()
+
+        try:
+            self.index = FullTextIndex(db=self._db)
+        except RuntimeError as e:
+            logger.warning("Full-text search disabled: %s", e)
+            self.index = None
+
+    def close(self):
+        """Close the database"""
+        self._db.close()
+
+    def _get_state(self, key, default=None):
+        row = self._db.execute("SELECT value FROM sync_state WHERE key = ?",
+                               (key,)).fetchone()
+        if row is None:
+            return default
+        return row[0]
+
+    def _set_state(self, key, value):
+        self._db.execute("INSERT OR REPLACE INTO sync_state VALUES (?, ?)",
+                         (key, value))
+
+    @property
+    def last_sync(self):
+        """End of the last synchronized time window (seconds since the
+        epoch) or None if the mirror was never synchronized"""
+        return self._get_state('last_sync')
+
+    @property
+    def last_modified(self):
+        """Newest modification time (ms since the epoch) of the entries
+        in the mirror, or None if the mirror is empty"""
+        return self._get_state('last_modified')
+
+    def sync(self, start=None, end=None):
+        '''
+        Synchronize the mirror with the server
+
+        :param start: Start of the first window (seconds since the epoch).
+        :param end: End of the last window, defaults to now.
+
+        If :param start: is None, the sync carries on from the end of the
+        previous sync less :param overlap:, or from :param refresh:
+        before :param end: if that is earlier. The first sync of an empty
+        mirror needs a start. Each time window is committed on its own,
+        so an interrupted sync carries on where it stopped.
+
+        Only entries created inside the synchronized range are fetched,
+        later modifications of entries created before it need a sync with
+        an explicit :param start:.
+
+        :returns: Number of entries added or updated.
+        '''
+        if self.client is None:
+            raise ValueError("A client is needed to synchronize the mirror")
+
+        self.sync_metadata()
+
+        if end is None:
+            end = time.time()
+        if start is None:
+            last = self.last_sync
+            if last is None:
+                raise ValueError("The first sync of an empty mirror needs "
+                                 "a start")
+            start = max(0, min(last - self.overlap, end - self.refresh))
+
+        count = 0
+        t = start
+        while t < end:
+            stop = min(t + self.window, end)
+            entries = self.client.find(start=t, end=stop)
+            logger.info("Fetched %d entries between %s and %s",
+                        len(entries), t, stop)
+            count += self.update(entries, commit=False)
+            self._set_state('last_sync', max(stop, self.last_sync or 0))
+            self._db.commit()
+            t = stop
+
+        return count
+
+    def sync_metadata(self):
+        """Replace the tags, logbooks and properties with the server's"""
+        with self._db:
+            self._db.execute("DELETE FROM logbooks")
+            self._db.executemany("INSERT INTO logbooks VALUES (?, ?)",
+                                 [(l.name, l.owner)
+                                  for l in self.client.list_logbooks()])
+            self._db.execute("DELETE FROM tags")
+            self._db.executemany("INSERT INTO tags VALUES (?, ?)",
+                                 [(t.name, t.state)
+                                  for t in self.client.list_tags()])
+            self._db.execute("DELETE FROM properties")
+            self._db.executemany("INSERT INTO properties VALUES (?, ?)",
+                                 [(p.name, json.dumps(p.attributes))
+                                  for p in self.client.list_properties()])
+
+    def update(self, entries, commit=True):
+        '''
+        Add or update log entries in the mirror
+
+        :param entries: Log entries as returned by :func OlogClient.find:
+        :type entries: list of LogEntry
+
+        Entries are applied in order of their modification time and an
+        entry is only replaced by a more recently modified version of
+        itself.
+
+        :returns: Number of entries added or updated.
+        '''
+        updated = []
+        entries = sorted(entries, key=lambda e: e.modify_time or 0)
+        for e in entries:
+            row = self._db.execute("SELECT modified FROM entries "
+                                   "WHERE id = ?", (e.id,)).fetchone()
+            if row is not None and (row[0] or 0) >= (e.modify_time or 0):
+                continue
+
+            for table in self.entry_tables:
+                self._db.execute("DELETE FROM {} WHERE entry_id = ?"
+                                 .format(table), (e.id,))
+            self._db.execute("INSERT OR REPLACE INTO entries "
+                             "VALUES (?, ?, ?, ?, ?)",
+                             (e.id, e.owner, e.text,
+                              e.create_time, e.modify_time))
+            self._db.executemany("INSERT INTO entry_logbooks "
+                                 "VALUES (?, ?, ?)",
+                                 [(e.id, l.name, l.owner)
+                                  for l in e.logbooks])
+            self._db.executemany("INSERT INTO entry_tags VALUES (?, ?, ?)",
+                                 [(e.id, t.name, t.state) for t in e.tags])
+            self._db.executemany("INSERT INTO entry_properties "
+                                 "VALUES (?, ?, ?, ?)",
+                                 [(e.id, p.name, k, v)
+                                  for p in e.properties
+                                  for k, v in (p.attributes or {}).items()])
+            updated.append(e)
+
+        if updated:
+            newest = max(e.modify_time or 0 for e in updated)
+            self._set_state('last_modified',
+                            max(newest, self.last_modified or 0))
+        if self.index is not None:
+            self.index.add(updated, commit=False)
+        if commit:
+            self._db.commit()
+        return len(updated)
+
+    def list_tags(self):
+        """List all tags in the mirror"""
+        rows = self._db.execute("SELECT name, state FROM tags")
+        return [Tag(name, active=(state == 'Active')) for name, state in rows]
+
+    def list_logbooks(self):
+        """List all logbooks in the mirror"""
+        rows = self._db.execute("SELECT name, owner FROM logbooks")
+        return [Logbook(name, owner) for name, owner in rows]
+
+    def list_properties(self):
+        """List all properties in the mirror"""
+        rows = self._db.execute("SELECT name, attributes FROM properties")
+        return [Property(name, json.loads(attrs)) for name, attrs in rows]
+
+    def _query(self, kwds):
+        """Build the SQL selecting the ids of the entries matching kwds"""
+        where, args = [], []
+
+        def child(table, column, value):
+            where.append("id IN (SELECT entry_id FROM {} WHERE {} "
+                         "LIKE ? ESCAPE '\\')".format(table, column))
+            args.append(_like(value))
+
+        page = kwds.pop('page', None)
+        limit = kwds.pop('limit', None)
+
+        for key, value in kwds.items():
+            if key == 'id':
+                where.append("id = ?")
+                args.append(int(value))
+            elif key == 'search':
+                where.append("description LIKE ? ESCAPE '\\'")
+                args.append(_like(value))
+            elif key == 'owner':
+                where.append("owner LIKE ? ESCAPE '\\'")
+                args.append(_like(value))
+            elif key == 'tag':
+                child('entry_tags', 'name', value)
+            elif key == 'logbook':
+                child('entry_logbooks', 'name', value)
+            elif key == 'property':
+                child('entry_properties', 'name', value)
+            elif key == 'start':
+                where.append("created >= ?")
+                args.append(int(float(value) * 1000))
+            elif key == 'end':
+                where.append("created <= ?")
+                args.append(int(float(value) * 1000))
+            elif '.' in key:
+                # property.attribute=value
+                name, attribute = key.split('.', 1)
+                where.append("id IN (SELECT entry_id FROM entry_properties "
+                             "WHERE name = ? AND attribute = ? AND value "
+                             "LIKE ? ESCAPE '\\')")
+                args.extend([name, attribute, _like(value)])
+            else:
+                raise ValueError("Unknown search key {}".format(key))
+
+        sql = "SELECT id FROM entries"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY created DESC, id DESC"
+        if limit is not None:
+            sql += " LIMIT {:d}".format(int(limit))
+            if page is not None:
+                sql += " OFFSET {:d}".format((int(page) - 1) * int(limit))
+        return sql, args
+
+    def find(self, query=None, **kwds):
+        '''
+        Search the mirror for log entries
+
+        Takes the same search criteria as :func OlogClient.find: and
+        returns the matching LogEntry objects, newest first. Criteria
+        with wildcards ('*' and '?') are matched as patterns.
+
+        >> mirror.find(tag='magnets', start=time.time() - 3600)
+        >> mirror.find(logbook='controls', as_frame=True)
+        >> mirror.find(Query(tag=['magnets', 'RF']), logbook='controls')
+        '''
+        as_frame = kwds.pop('as_frame', False)
+        frame_columns = kwds.pop('frame_columns', None)
+        as_collection = kwds.pop('as_collection', False)
+
+        if query is None:
+            sql, args = self._query(kwds)
+            ids = [r[0] for r in self._db.execute(sql, args)]
+        else:
+            found = set()
+            for q in query.plan(**kwds):
+                sql, args = self._query(q)
+                found.update(r[0] for r in self._db.execute(sql, args))
+            ids = sorted(found, reverse=True)
+        logs = self.get_entries(ids)
+        if query is not None:
+            logs.sort(key=lambda e: (e.create_time or 0, e.id), reverse=True)
+
+        if as_frame:
+            from .frame import LogEntryFrame
+            return LogEntryFrame.from_entries(logs, frame_columns)
+        if as_collection:
+            return LogEntryCollection(logs)
+        return logs
+
+    def search(self, query, limit=100):
+        '''
+        Full-text search of the mirror
+
+        :param query: FTS5 query, see :func FullTextIndex.search:
+        :param limit: Maximum number of entries to return.
+
+        :returns: LogEntry objects, best match first.
+        '''
+        if self.index is None:
+            raise RuntimeError("Full-text search is not available")
+        return self.get_entries(self.index.search(query, limit))
+
+    def get_entries(self, ids):
+        '''
+        Get log entries by id
+
+        :param ids: Ids of the entries
+        :returns: LogEntry objects in the order of :param ids:, ids not
+                  in the mirror are left out.
+        '''
+        entries = dict()
+        # Keep well below SQLITE_MAX_VARIABLE_NUMBER
+        for n in range(0, len(ids), 500):
+            chunk = ids[n:n + 500]
+            marks = ",".join("?" * len(chunk))
+
+            logbooks, tags, properties = {}, {}, {}
+            for lid, name, owner in self._db.execute(
+                    "SELECT entry_id, name, owner FROM entry_logbooks "
+                    "WHERE entry_id IN ({})".format(marks), chunk):
+                logbooks.setdefault(lid, []).append(Logbook(name, owner))
+            for lid, name, state in self._db.execute(
+                    "SELECT entry_id, name, state FROM entry_tags "
+                    "WHERE entry_id IN ({})".format(marks), chunk):
+                tags.setdefault(lid, []).append(
+                    Tag(name, active=(state == 'Active')))
+            for lid, name, attr, value in self._db.execute(
+                    "SELECT entry_id, name, attribute, value "
+                    "FROM entry_properties "
+                    "WHERE entry_id IN ({})".format(marks), chunk):
+                properties.setdefault(lid, {}).setdefault(name, {})[attr] \
+                    = value
+
+            for lid, owner, text, created, modified in self._db.execute(
+                    "SELECT id, owner, description, created, modified "
+                    "FROM entries WHERE id IN ({})".format(marks), chunk):
+                props = [Property(name, attrs) for name, attrs
+                         in properties.get(lid, {}).items()]
+                entries[lid] = LogEntry(text=text, owner=owner,
+                                        logbooks=logbooks.get(lid, []),
+                                        tags=tags.get(lid, []),
+                                        properties=props, id=lid,
+                                        create_time=created,
+                                        modify_time=modified)
+
+        return [entries[i] for i in ids if i in entries]
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Multi-valued and OR queries for :func OlogClient.find:
+
+The Olog resources AND the search criteria of a request and only take a
+single value per criterion. A Query accepts lists of values and OR
+groups and plans them into the smallest set of server requests whose
+merged results answer it:
+
+>> q = Query(tag=['A', 'B'], logbook=['X', 'Y'])
+entries tagged A or B in logbook X or Y (four server requests)
+>> q = Query(tag='A') | Query(logbook='X', search='*beam*')
+entries tagged A or in logbook X containing 'beam' (two requests)
+>> client.find(q, start=time.time() - 86400)
+"""
+
+import itertools
+
+import six
+
+#: Criteria which only take a single value
+single_valued = ('start', 'end', 'page', 'limit')
+
+
+def _values(key, value):
+    if isinstance(value, six.string_types) or \
+            not hasattr(value, '__iter__'):
+        return (value,)
+    if key in single_valued:
+        raise ValueError("Only a single value is allowed for {}".format(key))
+    values = tuple(value)
+    if not values:
+        raise ValueError("No values given for {}".format(key))
+    return values
+
+
+class Query(object):
+    """A search made of OR groups of criteria"""
+
+    def __init__(self, **criteria):
+        '''
+        :param criteria: Search criteria as for :func OlogClient.find:,
+                         a list of values matches any of the values.
+        '''
+        self.groups = [dict((k, _values(k, v))
+                            for k, v in criteria.items())]
+
+    @classmethod
+    def any_of(cls, *queries):
+        '''
+        Query matching any of the queries
+
+        >> Query.any_of(Query(tag='A'), Query(logbook='X'))
+        '''
+        q = cls()
+        q.groups = [g for query in queries for g in query.groups]
+        return q
+
+    def __or__(self, other):
+        return Query.any_of(self, other)
+
+    def __repr__(self):
+        return " | ".join("Query({})".format(
+            ", ".join("{}={!r}".format(k, list(v) if len(v) > 1 else v[0])
+                      for k, v in sorted(g.items())))
+            for g in self.groups)
+
+    def plan(self, **extra):
+        '''
+        Plan the server requests answering the query
+
+        :param extra: Criteria ANDed with every group of the query.
+
+        Each group is expanded into one request per combination of its
+        values. Duplicate requests are dropped, as are requests whose
+        criteria include all the criteria of another request, whose
+        results they are a subset of.
+
+        :returns: List of dicts of criteria, one per request.
+        '''
+        requests = []
+        for group in self.groups:
+            group = dict(group)
+            for k, v in extra.items():
+                if k in group:
+                    raise ValueError("{} is given in the query and as a "
+                                     "keyword".format(k))
+                group[k] = _values(k, v)
+            keys = sorted(group)
+            for values in itertools.product(*[group[k] for k in keys]):
+                r = frozenset(zip(keys, values))
+                if r not in requests:
+                    requests.append(r)
+
+        plan = [r for r in requests
+                if not any(other < r for other in requests)]
+        return [dict(r) for r in plan]
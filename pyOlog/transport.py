@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+"""
+HTTP transports used by the OlogClient.
+
+A transport makes the HTTP requests of an OlogClient. Two are provided:
+
+RequestsTransport
+    The default, based on a requests Session.
+HTTPXTransport
+    Based on httpx with HTTP/2 enabled, so that concurrent requests are
+    multiplexed over a single TLS connection. Needs httpx installed with
+    its http2 extra.
+
+The transport is chosen with the transport argument of the OlogClient
+or the 'transport' key of the config file. Both transports re-create
+their connections in forked children and after the connections were
+idle for longer than the keep-alive timeout.
+"""
+
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Guards creating the clients of transports, so concurrent first
+# requests share one client.
+_lock = threading.Lock()
+
+
+def _reset_lock():
+    global _lock
+    _lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    # Another thread may have held it when the process forked
+    os.register_at_fork(after_in_child=_reset_lock)
+
+
+class Transport(object):
+    """Base class of transports
+
+    Subclasses implement :func _new_client: and :func _request:. The
+    responses returned must provide status_code, headers, content,
+    json(), raise_for_status() and close() like a requests Response.
+    """
+
+    def __init__(self, auth=None, verify=True, pool_connections=10,
+                 pool_maxsize=10, pool_block=False, keepalive_timeout=None,
+                 cookies=None, lazy_auth=False):
+        '''
+        :param auth: Tuple of (username, password) for basic
+                     authentication or None.
+        :param verify: Verify the servers certificate.
+        :param pool_connections: Number of hosts to keep pools for.
+        :param pool_maxsize: Maximum number of connections per host.
+        :param pool_block: Block when all connections are in use rather
+                           than opening extra ones.
+        :param keepalive_timeout: Seconds after which idle connections
+                                  are closed, None to keep them.
+        :param cookies: Cookies to start the session with, as returned
+                        by :attr cookies:
+        :param lazy_auth: Only send the credentials when the server
+                          answers 401, so an authenticated session
+                          cookie is not re-authenticated every request.
+        '''
+        self.auth = auth
+        self.verify = verify
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keepalive_timeout = keepalive_timeout
+        self.lazy_auth = lazy_auth
+        self._cookies = list(cookies or [])
+        self._lock = threading.Lock()
+        self._client = None
+        self._pid = None
+        self._last_used = None
+        self._in_flight = 0
+
+    def _new_client(self):
+        raise NotImplementedError
+
+    def _close_client(self, client):
+        client.close()
+
+    def _request(self, client, method, url, **kwargs):
+        raise NotImplementedError
+
+    def _cookie_jar(self, client):
+        return client.cookies
+
+    def _get_cookies(self, client):
+        return sorted([c.name, c.value, c.domain, c.path]
+                      for c in self._cookie_jar(client))
+
+    def _set_cookies(self, client, cookies):
+        for name, value, domain, path in cookies:
+            client.cookies.set(name, value, domain=domain, path=path)
+
+    @property
+    def cookies(self):
+        """The current session cookies as a list of
+        [name, value, domain, path]"""
+        if self._client is not None and self._pid == os.getpid():
+            return self._get_cookies(self._client)
+        return list(self._cookies)
+
+    def _make_client(self):
+        client = self._new_client()
+        self._set_cookies(client, self._cookies)
+        return client
+
+    @property
+    def client(self):
+        """The underlying client, re-created in forked children and after
+        the connections were idle for longer than keepalive_timeout"""
+        return self._get_client()
+
+    def _get_client(self, acquire=False):
+        if self._pid != os.getpid():
+            with _lock:
+                if self._pid != os.getpid():
+                    # Never touch the parents connections, and its lock
+                    # may have been held by another thread when we
+                    # forked.
+                    if self._pid is not None:
+                        logger.debug("Process forked, creating a new client")
+                    self._lock = threading.Lock()
+                    self._in_flight = 0
+                    self._client = self._make_client()
+                    self._last_used = time.time()
+                    self._pid = os.getpid()
+        with self._lock:
+            # Only reset when no request is using the connections
+            if self.keepalive_timeout is not None and \
+                    self._in_flight == 0 and \
+                    time.time() - self._last_used > self.keepalive_timeout:
+                logger.debug("Connections idle, creating a new client")
+                old = self._client
+                self._cookies = self._get_cookies(old)
+                self._client = self._make_client()
+                self._close_client(old)
+            if acquire:
+                self._in_flight += 1
+            return self._client
+
+    def _release(self):
+        """Mark a request as completed"""
+        with self._lock:
+            self._in_flight = max(self._in_flight - 1, 0)
+            self._last_used = time.time()
+
+    def request(self, method, url, **kwargs):
+        '''
+        Make an HTTP request
+
+        :param method: HTTP method e.g. 'GET'
+        :param url: The full url
+        :param kwargs: params, headers, data, files and stream as for
+                       :func requests.request:
+
+        :returns: The response. The body of a response requested with
+                  stream=True is read with :func iter_content:, the
+                  request counts as in flight until it was read. A
+                  streamed response with an error status is closed.
+        '''
+        stream = kwargs.get('stream', False)
+        client = self._get_client(acquire=True)
+        try:
+            resp = self._send(client, method, url, **kwargs)
+        except Exception:
+            self._release()
+            raise
+        if stream and resp.status_code >= 400:
+            # The caller raises for the status and never reads the body
+            resp.close()
+            stream = False
+        if not stream:
+            self._release()
+        return resp
+
+    def _send(self, client, method, url, **kwargs):
+        if not self.lazy_auth or self.auth is None or 'files' in kwargs:
+            return self._request(client, method, url, auth=self.auth,
+                                 **kwargs)
+        resp = self._request(client, method, url, **kwargs)
+        if resp.status_code == 401:
+            logger.debug("Session not authenticated, sending credentials")
+            resp.close()
+            resp = self._request(client, method, url, auth=self.auth,
+                                 **kwargs)
+        return resp
+
+    def iter_content(self, resp, chunk_size=65536):
+        """Iterate over the body of a streamed response in chunks"""
+        try:
+            for chunk in self._iter_content(resp, chunk_size):
+                yield chunk
+        finally:
+            self._release()
+
+    def _iter_content(self, resp, chunk_size):
+        return resp.iter_content(chunk_size)
+
+    def prewarm(self, url, n):
+        '''
+        Open connections to a server ahead of the first request
+
+        :param url: The url to make HEAD requests to.
+        :param n: Number of connections to open.
+        '''
+        def connect(_):
+            try:
+                self.request('HEAD', url)
+            except Exception as e:
+                logger.info("Failed to pre-warm connection: %s", e)
+
+        with ThreadPoolExecutor(min(n, self.pool_maxsize)) as pool:
+            list(pool.map(connect, range(n)))
+
+    def close(self):
+        """Close all connections"""
+        if self._client is not None and self._pid == os.getpid():
+            self._close_client(self._client)
+        self._client = None
+        self._pid = None
+
+
+class RequestsTransport(Transport):
+    """Transport using a requests Session"""
+
+    def _new_client(self):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        session.verify = self.verify
+        adapter = HTTPAdapter(pool_connections=self.pool_connections,
+                              pool_maxsize=self.pool_maxsize,
+                              pool_block=self.pool_block)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def _request(self, client, method, url, **kwargs):
+        return client.request(method, url, **kwargs)
+
+
+class HTTPXTransport(Transport):
+    """Transport using an httpx Client with HTTP/2"""
+
+    def __init__(self, *args, **kwargs):
+        self.http2 = kwargs.pop('http2', True)
+        super(HTTPXTransport, self).__init__(*args, **kwargs)
+
+    def _new_client(self):
+        import httpx
+
+        limits = httpx.Limits(max_connections=self.pool_maxsize,
+                              max_keepalive_connections=self.pool_maxsize,
+                              keepalive_expiry=self.keepalive_timeout)
+        return httpx.Client(http2=self.http2, verify=self.verify,
+                            limits=limits)
+
+    def _cookie_jar(self, client):
+        return client.cookies.jar
+
+    def _request(self, client, method, url, **kwargs):
+        if kwargs.get('auth') is None:
+            kwargs.pop('auth', None)
+        data = kwargs.pop('data', None)
+        if data is not None:
+            # httpx takes raw bodies as content and form fields as data
+            if isinstance(data, (bytes, type(u''))):
+                kwargs['content'] = data
+            else:
+                kwargs['data'] = data
+        if kwargs.pop('stream', False):
+            send = dict()
+            if 'auth' in kwargs:
+                send['auth'] = kwargs.pop('auth')
+            request = client.build_request(method, url, **kwargs)
+            return client.send(request, stream=True, **send)
+        return client.request(method, url, **kwargs)
+
+    def _iter_content(self, resp, chunk_size):
+        return resp.iter_bytes(chunk_size)
+
+
+#: Transports available by name
+transports = {'requests': RequestsTransport,
+              'httpx': HTTPXTransport}
+
+
+def get_transport(name, **kwargs):
+    '''
+    Create a transport by name
+
+    :param name: A key of :data transports:
+    :param kwargs: Passed on to the transport
+    '''
+    try:
+        cls = transports[name]
+    except KeyError:
+        raise ValueError("Unknown transport {}".format(name))
+    return cls(**kwargs)
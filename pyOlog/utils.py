@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+Helpers shared by the Olog clients.
+"""
+
+import threading
+from collections import OrderedDict, namedtuple
+
+#: Outcome of one item of a bulk operation, either value or error is set
+BulkResult = namedtuple('BulkResult', ['key', 'value', 'error'])
+
+
+class LRUCache(object):
+    """A thread-safe mapping holding at most maxsize items, the least
+    recently used items are dropped first"""
+
+    def __init__(self, maxsize=1000):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                return default
+            self._data[key] = value
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class _Call(object):
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """Coalesce concurrent calls with the same key
+
+    While a call for a key is running, further calls with the same key
+    wait for it and receive its result (or exception) instead of making
+    the call again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = dict()
+
+    def do(self, key, func, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
+
+
+def entry_to_record(log):
+    '''
+    Convert a LogEntry to a dict of JSON types
+
+    The record holds the id, create_time, modify_time, owner and text of
+    the entry, the names of its logbooks and tags and its properties as a
+    dict of property name to attributes.
+    '''
+    return OrderedDict([('id', log.id),
+                        ('create_time', log.create_time),
+                        ('modify_time', log.modify_time),
+                        ('owner', log.owner),
+                        ('logbooks', [l.name for l in log.logbooks]),
+                        ('tags', [t.name for t in log.tags]),
+                        ('properties', dict((p.name, p.attributes)
+                                            for p in log.properties)),
+                        ('text', log.text)])
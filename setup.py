@@ -7,15 +7,30 @@ Created on Jan 10, 2013
 @author: shroffk
 '''
 
+import sys
 from setuptools import setup
 
+requires = ['requests (>=2.0.0)', 'urllib3 (>=1.7.1)', 'six (>=1.9.0)']
+install_requires = ['requests>=2.0.0', 'urllib3>=1.7.1', 'six>=1.9.0']
+if sys.version_info < (3, 2):
+    requires.append('futures (>=2.1.6)')
+    install_requires.append('futures>=2.1.6')
+
+# Optional backends, each imported only by the code which needs it
+extras_require = {'watch': ['inotify_simple'],
+                  'images': ['Pillow'],
+                  'frame': ['numpy', 'pandas', 'pyarrow'],
+                  'httpx': ['httpx']}
+
 setup(name='pyOlog',
       version='0.3.0',
       description='Python Olog Client Lib',
       author='Kunal Shroff',
       author_email='shroffk@bnl.gov',
-      packages=['pyOlog', 'pyOlog.cli'],
-      requires=['requests (>=2.0.0)', 'urllib3 (>=1.7.1)'],
+      packages=['pyOlog', 'pyOlog.cli', 'pyOlog.gui'],
+      requires=requires,
+      install_requires=install_requires,
+      extras_require=extras_require,
       entry_points={'console_scripts': [
                     'olog = pyOlog.cli:main'],
                     'gui_scripts': [
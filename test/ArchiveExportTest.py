@@ -0,0 +1,112 @@
+'''
+Tests for the archive export
+'''
+import os
+import json
+import shutil
+import tarfile
+import zipfile
+import tempfile
+import unittest
+from pyOlog.archive import ArchiveExport, archive_format
+from fakes import FakeOlogClient, make_record
+
+
+def make_client(fail=()):
+    """Client with three entries, entry 2 has two attachments, failing
+    the downloads of the attachments of the entries in fail"""
+    def fail_download(method, path, body):
+        if any(path.startswith('/resources/attachments/{}/'.format(id))
+               for id in fail):
+            raise IOError("Download failed")
+
+    client = FakeOlogClient([make_record(i, i, text='Entry {}'.format(i))
+                             for i in (3, 2, 1)],
+                            attachments={2: {'a.txt': b'2 a.txt',
+                                             'b.png': b'2 b.png'}},
+                            fail=fail_download)
+    client.max_workers = 2
+    return client
+
+
+class TestArchiveExport(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def read(self, path):
+        if archive_format(path) == 'zip':
+            with zipfile.ZipFile(path) as z:
+                return dict((n, z.read(n)) for n in z.namelist())
+        with tarfile.open(path) as t:
+            return dict((m.name, t.extractfile(m).read())
+                        for m in t.getmembers())
+
+    def testFormat(self):
+        self.assertEqual(archive_format('a.TAR'), 'tar')
+        self.assertEqual(archive_format('a.tgz'), 'tar.gz')
+        self.assertEqual(archive_format('a.tar.bz2'), 'tar.bz2')
+        self.assertEqual(archive_format('a.zip'), 'zip')
+
+    def testExport(self):
+        for name in ('ops.tar', 'ops.tar.gz', 'ops.zip'):
+            path = os.path.join(self.dir, name)
+            self.assertEqual(ArchiveExport(make_client(), path).run(), 3)
+            self.assertFalse(os.path.exists(path + '.partial'))
+
+            files = self.read(path)
+            self.assertEqual(files['attachments/2/b.png'], b'2 b.png')
+            records = [json.loads(l) for l in
+                       files['manifest.jsonl'].decode().splitlines()]
+            self.assertEqual([r['id'] for r in records], [3, 2, 1])
+            self.assertEqual(records[1]['attachments'],
+                             ['attachments/2/a.txt', 'attachments/2/b.png'])
+
+    def testResume(self):
+        for name in ('ops.tar', 'ops.zip'):
+            path = os.path.join(self.dir, name)
+            self.assertRaises(IOError,
+                              ArchiveExport(make_client(fail=[2]), path).run)
+            self.assertTrue(os.path.exists(path + '.partial'))
+
+            self.assertEqual(ArchiveExport(make_client(), path).run(), 2)
+            files = self.read(path)
+            self.assertEqual(sorted(files),
+                             ['attachments/2/a.txt', 'attachments/2/b.png',
+                              'manifest.jsonl'])
+            self.assertEqual(len(files['manifest.jsonl'].splitlines()), 3)
+
+    @unittest.skipIf(not hasattr(os, 'fork'), "Needs os.fork")
+    def testResumeAfterKill(self):
+        # A killed zip export has no central directory and starts again
+        for name, remaining in (('ops.tar', 1), ('ops.zip', 3)):
+            path = os.path.join(self.dir, name)
+
+            def kill(count):
+                if count == 2:
+                    # Die without flushing any buffers
+                    os._exit(0)
+
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    ArchiveExport(make_client(), path, progress=kill).run()
+                finally:
+                    os._exit(1)
+            os.waitpid(pid, 0)
+            self.assertTrue(os.path.exists(path + '.partial'))
+
+            self.assertEqual(ArchiveExport(make_client(), path).run(),
+                             remaining)
+            files = self.read(path)
+            self.assertEqual(files['attachments/2/a.txt'], b'2 a.txt')
+            records = [json.loads(l) for l in
+                       files['manifest.jsonl'].decode().splitlines()]
+            self.assertEqual([r['id'] for r in records], [3, 2, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+'''
+Tests for the buffer of output captured by %log_add
+'''
+import gzip
+import unittest
+from pyOlog.cli.capture import CaptureBuffer
+
+
+class TestCaptureBuffer(unittest.TestCase):
+
+    def testSmall(self):
+        buf = CaptureBuffer(spill_size=100, max_size=1000)
+        buf.write('>>>print(1)\n\n')
+        buf.write('1\n')
+        self.assertFalse(buf.spilled)
+        self.assertEqual(buf.text(), '>>>print(1)\n\n1\n')
+        self.assertIsNone(buf.attachment())
+
+    def testSpill(self):
+        buf = CaptureBuffer(spill_size=100, max_size=1000, head_size=10)
+        lines = ['line {}\n'.format(i) for i in range(50)]
+        for line in lines:
+            buf.write(line)
+        self.assertTrue(buf.spilled)
+        self.assertEqual(len(buf), 390)
+        text = buf.text()
+        self.assertTrue(text.startswith('line 0\nlin'))
+        self.assertIn('380 more characters', text)
+        a = buf.attachment()
+        self.assertEqual(a.filename, 'capture.txt.gz')
+        data = gzip.GzipFile(fileobj=a.file).read().decode('utf-8')
+        self.assertEqual(data, ''.join(lines))
+        self.assertEqual(len(buf), 0)
+        self.assertFalse(buf.spilled)
+
+    def testMaxSize(self):
+        buf = CaptureBuffer(spill_size=100, max_size=10)
+        buf.write('0123456')
+        buf.write('789abc')
+        buf.write('def')
+        self.assertEqual(len(buf), 10)
+        self.assertEqual(buf.dropped, 6)
+        self.assertTrue(buf.text().startswith('0123456789\n'))
+        self.assertIn('6 characters of output dropped', buf.text())
+        buf.clear()
+        self.assertEqual(buf.text(), '')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+'''
+Tests for the credential and session cookie cache
+'''
+import os
+import stat
+import shutil
+import tempfile
+import unittest
+from pyOlog.credentials import CredentialCache
+
+
+class TestCredentialCache(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'credentials')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def testStoreLoad(self):
+        cache = CredentialCache(self.path, ttl=60)
+        self.assertIsNone(cache.load('http://olog', 'swilkins'))
+        cache.store('http://olog', 'swilkins', 'secret',
+                    [['JSESSIONID', 'a', 'olog', '/']])
+        entry = cache.load('http://olog', 'swilkins')
+        self.assertEqual(entry['password'], 'secret')
+        self.assertEqual(entry['cookies'], [['JSESSIONID', 'a', 'olog', '/']])
+        self.assertIsNone(cache.load('http://olog', 'shroffk'))
+        mode = stat.S_IMODE(os.stat(self.path).st_mode)
+        self.assertEqual(mode & (stat.S_IRWXG | stat.S_IRWXO), 0)
+
+    def testExpiry(self):
+        cache = CredentialCache(self.path, ttl=-1)
+        cache.store('http://olog', 'swilkins', 'secret')
+        self.assertIsNone(cache.load('http://olog', 'swilkins'))
+
+    def testClear(self):
+        cache = CredentialCache(self.path, ttl=60)
+        cache.store('http://olog', 'swilkins', 'secret')
+        cache.clear('http://olog', 'swilkins')
+        self.assertIsNone(cache.load('http://olog', 'swilkins'))
+
+    def testIgnoreReadableByOthers(self):
+        cache = CredentialCache(self.path, ttl=60)
+        cache.store('http://olog', 'swilkins', 'secret')
+        os.chmod(self.path, 0o644)
+        self.assertIsNone(cache.load('http://olog', 'swilkins'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+'''
+Tests of 'olog watch' which do not need an Olog server
+'''
+import os
+import json
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+from pyOlog.cli import watch
+from pyOlog.cli.watch import DirectoryWatcher
+from fakes import FakeOlogClient
+
+
+def fail_first(n):
+    """Fail the first n entries made"""
+    calls = []
+
+    def fail(method, path, body):
+        if (method, path) == ('POST', '/resources/logs'):
+            calls.append(path)
+            if len(calls) <= n:
+                raise IOError("Upload failed")
+    return fail
+
+
+def uploads(client):
+    """The sorted filenames attached to each entry"""
+    attachments = client.server.attachments
+    return [sorted(attachments.get(r['id'], ()))
+            for r in client.server.records]
+
+
+class TestDirectoryWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, name, data=b'data'):
+        with open(os.path.join(self.dir, name), 'wb') as f:
+            f.write(data)
+
+    def watcher(self, client, **kwargs):
+        kwargs.setdefault('use_inotify', False)
+        return DirectoryWatcher(client, self.dir, logbooks=['ops'],
+                                interval=0.05, group=0.1, **kwargs)
+
+    def testGroupAndState(self):
+        for name in ('a.png', 'b.png', 'c.png', 'notes.txt'):
+            self.write(name)
+        client = FakeOlogClient()
+        self.watcher(client, pattern='*.png', max_files=2).run(duration=0.3)
+        self.assertEqual(uploads(client), [['a.png', 'b.png'], ['c.png']])
+        with open(os.path.join(self.dir, watch.STATE_FILE)) as f:
+            state = json.load(f)
+        self.assertEqual(sorted(state), ['a.png', 'b.png', 'c.png'])
+        self.assertEqual(state['c.png']['id'], 2)
+
+        # Only rewritten files are uploaded again after a restart
+        self.write('b.png', b'new data')
+        client = FakeOlogClient()
+        self.watcher(client, pattern='*.png').run(duration=0.3)
+        self.assertEqual(uploads(client), [['b.png']])
+
+    def testPolling(self):
+        client = FakeOlogClient()
+        watcher = self.watcher(client)
+        self.assertIsNone(watcher.inotify)
+        thread = threading.Thread(target=watcher.run, args=(0.6,))
+        thread.start()
+        time.sleep(0.15)
+        self.write('a.png')
+        self.write('b.png')
+        thread.join()
+        self.assertEqual(uploads(client), [['a.png', 'b.png']])
+
+    def testRetry(self):
+        modes = [False]
+        if watch.inotify_simple is not None:
+            modes.append(True)
+        for use_inotify in modes:
+            # A new file for each mode
+            self.write('a.png', str(use_inotify).encode())
+            client = FakeOlogClient(fail=fail_first(1))
+            self.watcher(client, retry=0.1,
+                         use_inotify=use_inotify).run(duration=0.5)
+            self.assertEqual(len(client.server.requested(
+                'POST', '/resources/logs')), 2)
+            self.assertEqual(uploads(client), [['a.png']])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+'''
+Tests of attaching matplotlib figures, on the Agg backend
+'''
+import io
+import unittest
+from pyOlog.cli import utils
+from pyOlog.cli.utils import figure_formats, save_pyplot_figure
+
+try:
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.image as mpimg
+    import matplotlib.pyplot as plt
+except ImportError:
+    plt = None
+
+
+class TestFigureFormats(unittest.TestCase):
+
+    def testFormats(self):
+        self.assertEqual(figure_formats('PDF, png thumbnail'),
+                         ['pdf', 'png', 'thumbnail'])
+        self.assertEqual(figure_formats(['SVG']), ['svg'])
+
+
+@unittest.skipIf(plt is None, "matplotlib is not installed")
+class TestSavePyplotFigure(unittest.TestCase):
+
+    def setUp(self):
+        self.figure = plt.figure(figsize=(4, 3), dpi=100)
+        self.figure.gca().plot([0, 1], [0, 1])
+        self.downsampled = []
+        self._downsample = utils._downsample
+
+        def downsample(png, factor):
+            self.downsampled.append(factor)
+            return self._downsample(png, factor)
+        utils._downsample = downsample
+
+    def tearDown(self):
+        utils._downsample = self._downsample
+        plt.close(self.figure)
+
+    def save(self, formats, **kwargs):
+        return save_pyplot_figure(formats, thumbnail_dpi=25,
+                                  figure=self.figure, **kwargs)
+
+    def image(self, attachment):
+        return mpimg.imread(attachment.file, format='png')
+
+    def testThumbnail(self):
+        png, pdf, thumbnail = self.save('png, pdf, thumbnail')
+        self.assertEqual([a.filename for a in (png, pdf, thumbnail)],
+                         ['plot.png', 'plot.pdf', 'thumbnail.png'])
+        self.assertEqual(self.image(png).shape[:2], (300, 400))
+        self.assertEqual(self.image(thumbnail).shape[:2], (75, 100))
+        self.assertEqual(self.downsampled, [4])
+        self.assertTrue(pdf.file.read().startswith(b'%PDF'))
+
+    def testThumbnailOnly(self):
+        # Rendered at the resolution of the thumbnail, so not downsampled
+        pdf, thumbnail = self.save(None)
+        self.assertEqual(self.image(thumbnail).shape[:2], (75, 100))
+        self.assertEqual(self.downsampled, [])
+
+    def testDownsample(self):
+        png = io.BytesIO()
+        self.figure.savefig(png, format='png', dpi=30)
+        out = self._downsample(png.getvalue(), 4)
+        # Partial blocks at the edges are dropped
+        self.assertEqual(mpimg.imread(out, format='png').shape[:2], (22, 30))
+
+    def testUnknownFormat(self):
+        self.assertRaises(ValueError, self.save, ['pdf', 'jpeg'])
+
+
+if __name__ == '__main__':
+    unittest.main()
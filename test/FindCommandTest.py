@@ -0,0 +1,108 @@
+'''
+Tests of 'olog find', 'olog export' and 'olog tail' which do not need an
+Olog server
+'''
+import csv
+import sys
+import json
+import time
+import datetime
+import argparse
+import unittest
+from six.moves import StringIO
+from pyOlog import OlogClient
+from pyOlog.cli import find
+from pyOlog.cli.find import parse_time, write_entries
+from fakes import FakeOlogClient, make_entry, make_record
+
+
+class TestParseTime(unittest.TestCase):
+
+    def testFormats(self):
+        self.assertEqual(parse_time('1422700000.5'), 1422700000.5)
+        day = time.mktime(datetime.datetime(2015, 1, 31).timetuple())
+        self.assertEqual(parse_time('2015-01-31'), day)
+        self.assertEqual(parse_time('2015-01-31 14:30'), day + 52200)
+        self.assertEqual(parse_time('2015-01-31T14:30:15'), day + 52215)
+        self.assertRaises(argparse.ArgumentTypeError, parse_time, '31/01/2015')
+
+
+class TestWriteEntries(unittest.TestCase):
+
+    def setUp(self):
+        self.entries = [make_entry(i, i * 100, 'entry {}\nmore'.format(i),
+                                   logbooks=['controls', 'ops'],
+                                   tags=['magnets']) for i in (1, 2)]
+
+    def write(self, format, **kwargs):
+        out = StringIO()
+        n = write_entries(iter(self.entries), out, format, **kwargs)
+        return n, out.getvalue()
+
+    def testJSONLines(self):
+        n, out = self.write('jsonl')
+        self.assertEqual(n, 2)
+        records = [json.loads(line) for line in out.splitlines()]
+        self.assertEqual(records[1], {'id': 2, 'create_time': 200000,
+                                      'modify_time': 200000,
+                                      'owner': 'swilkins',
+                                      'logbooks': ['controls', 'ops'],
+                                      'tags': ['magnets'], 'properties': {},
+                                      'text': 'entry 2\nmore'})
+
+    def testCSV(self):
+        n, out = self.write('csv')
+        rows = list(csv.DictReader(StringIO(out)))
+        self.assertEqual([r['id'] for r in rows], ['1', '2'])
+        self.assertEqual(rows[0]['logbooks'], 'controls|ops')
+        self.assertEqual(rows[0]['tags'], 'magnets')
+        self.assertEqual(rows[0]['text'], 'entry 1\nmore')
+        self.assertNotIn('properties', rows[0])
+
+    def testText(self):
+        n, out = self.write('text', max=1)
+        self.assertEqual(n, 1)
+        created = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(100))
+        self.assertEqual(out, '1 {} swilkins [controls, ops] entry 1\n'
+                         .format(created))
+
+
+class TestTail(unittest.TestCase):
+
+    def setUp(self):
+        self.stdout = sys.stdout
+        sys.stdout = StringIO()
+
+    def tearDown(self):
+        sys.stdout = self.stdout
+        find.OlogClient = OlogClient
+
+    def tail(self, client, argv):
+        def stop(method, path, body):
+            # Interrupt following once all the searches are answered
+            if not client.server.searches:
+                raise KeyboardInterrupt()
+
+        client.server.fail = stop
+        find.OlogClient = lambda *args: client
+        self.assertRaises(KeyboardInterrupt, find.tail,
+                          ['-F', 'jsonl'] + argv)
+        return [json.loads(line)['id']
+                for line in sys.stdout.getvalue().splitlines()]
+
+    def testFollow(self):
+        client = FakeOlogClient(searches=[
+            [make_record(4, 400), make_record(3, 300)],
+            # The newest entry shown is found again
+            [make_record(4, 400), make_record(5, 450)],
+            [make_record(4, 400, modified=500), make_record(5, 450)]])
+        ids = self.tail(client, ['-n', '2', '-f', '--interval', '0'])
+        # Shown once, and again when modified
+        self.assertEqual(ids, [3, 4, 5, 4])
+        searches = [c for _, c in client.server.requested('GET')]
+        self.assertEqual((searches[0]['page'], searches[0]['limit']), (1, 2))
+        self.assertEqual(searches[1]['start'], 340)
+
+
+if __name__ == '__main__':
+    unittest.main()
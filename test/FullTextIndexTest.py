@@ -0,0 +1,39 @@
+'''
+Tests for the local full-text index
+'''
+import unittest
+from pyOlog.fulltext import FullTextIndex
+from fakes import make_entry
+
+
+class TestFullTextIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = FullTextIndex()
+        self.index.add([make_entry(1, 1,
+                                   'Timing system reset after beam dump'),
+                        make_entry(2, 1, 'Magnet timing timing adjusted'),
+                        make_entry(3, 1, 'Magnets quenched',
+                                   properties={'Ticket': {'Id': '4711'}})])
+
+    def testSearch(self):
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.index.search('"beam dump"'), [1])
+        self.assertEqual(self.index.search('timing'), [2, 1])
+        self.assertEqual(sorted(self.index.search('magnet*')), [2, 3])
+        self.assertEqual(self.index.search('magnet* NOT quench*'), [2])
+        self.assertEqual(self.index.search('4711'), [3])
+
+    def testUpdate(self):
+        self.assertEqual(self.index.add([make_entry(1, 1, 'Replaced')]), 0)
+        self.assertEqual(self.index.add([make_entry(1, 1, 'Replaced',
+                                                     modified=2)]), 1)
+        self.assertEqual(self.index.search('dump'), [])
+        self.assertEqual(self.index.search('replaced'), [1])
+        self.assertEqual(self.index.last_modified, 2000)
+        self.index.remove([1])
+        self.assertEqual(self.index.search('replaced'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+'''
+Tests for the image attachment pipeline
+'''
+import io
+import unittest
+from pyOlog import Attachment
+from pyOlog.images import ImagePipeline, optimize_image, is_image
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+def make_png(size=(3840, 2160)):
+    img = Image.new('RGBA', size, (200, 10, 10, 255))
+    exif = Image.Exif()
+    exif[0x010f] = 'Camera'
+    data = io.BytesIO()
+    img.save(data, format='PNG', exif=exif)
+    return data.getvalue()
+
+
+@unittest.skipIf(Image is None, "Pillow is not installed")
+class TestImagePipeline(unittest.TestCase):
+
+    def testOptimize(self):
+        a = optimize_image(Attachment(make_png(), 'screenshot.png'),
+                           max_size=1920, format='jpeg', quality=70)
+        self.assertEqual(a.filename, 'screenshot.jpg')
+        img = Image.open(a.file)
+        self.assertEqual(img.format, 'JPEG')
+        self.assertEqual(img.size, (1920, 1080))
+        self.assertNotIn('exif', img.info)
+
+    def testKeepFormat(self):
+        a = optimize_image(Attachment(make_png((100, 50)), 'plot.png'))
+        img = Image.open(a.file)
+        self.assertEqual((img.format, img.size), ('PNG', (100, 50)))
+        self.assertNotIn('exif', img.info)
+
+    def testPipeline(self):
+        text = Attachment(b'data', 'notes.txt')
+        pipeline = ImagePipeline(max_size=800, format='png', thumbnail=True,
+                                 thumbnail_size=64)
+        result = pipeline.submit([text, Attachment(make_png(),
+                                                    'grab.png')]).result()
+        self.assertEqual([a.filename for a in result],
+                         ['notes.txt', 'grab.png', 'thumbnail_grab.png'])
+        self.assertIs(result[0], text)
+        self.assertEqual(Image.open(result[2].file).size, (64, 36))
+
+    def testIsImage(self):
+        self.assertTrue(is_image(Attachment(b'', 'a.JPG')))
+        self.assertFalse(is_image(Attachment(b'', 'a.pdf')))
+        self.assertFalse(is_image(Attachment(b'')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+'''
+Tests of 'olog import' which do not need an Olog server
+'''
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from pyOlog.cli.importer import Checkpoint, Importer
+from fakes import FakeOlogClient
+
+
+def fail_once(names):
+    """Fail the first upload of each entry text and attachment filename
+    in names"""
+    names = set(names)
+
+    def fail(method, path, body):
+        if method != 'POST':
+            return
+        for name in [r['description'] for r in body] \
+                if isinstance(body, list) else [body]:
+            if name in names:
+                names.discard(name)
+                raise IOError(name)
+    return fail
+
+
+class TestCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'entries.jsonl.checkpoint')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def testRanges(self):
+        c = Checkpoint(self.path)
+        c.add(5, 8)
+        c.add(10, 12, [(10, 3, 'a.png')])
+        self.assertEqual(c.done, 0)
+        self.assertTrue(c.imported(6))
+        self.assertFalse(c.imported(9))
+        c.add(0, 5)
+        self.assertEqual((c.done, c.ranges), (8, [(10, 12)]))
+        c.save()
+
+        c = Checkpoint(self.path)
+        self.assertEqual((c.done, c.ranges), (8, [(10, 12)]))
+        self.assertEqual(c.uploads, [(10, 3, 'a.png')])
+        c.uploaded((10, 3, 'a.png'))
+        self.assertEqual(c.uploads, [])
+        c.remove()
+        self.assertFalse(os.path.exists(self.path))
+
+
+class TestImporter(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'entries.jsonl')
+        with open(os.path.join(self.dir, 'beam.png'), 'wb') as f:
+            f.write(b'png')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, records):
+        with open(self.path, 'w') as f:
+            for r in records:
+                f.write(json.dumps(r) + '\n' if r else '\n')
+
+    def run_import(self, client, **kwargs):
+        return Importer(client, self.path, quiet=True, **kwargs).run()
+
+    def testBlankLinesAndProperties(self):
+        self.write([{'text': 'a', 'logbooks': ['ops']}, None,
+                    {'text': 'b', 'properties': {'Ticket': {'Id': '1'}}},
+                    {'text': 'c'}, None])
+        client = FakeOlogClient()
+        self.assertEqual(self.run_import(client, batch_size=10), 3)
+        posted = client.server.records
+        self.assertEqual([r['description'] for r in posted], ['a', 'b', 'c'])
+        self.assertEqual(posted[1]['properties'],
+                         [{'name': 'Ticket', 'attributes': {'Id': '1'}}])
+        self.assertEqual([url for url, _ in client.server.requested('PUT')],
+                         ['/resources/logbooks/ops',
+                          '/resources/properties/Ticket'])
+        self.assertFalse(os.path.exists(self.path + '.checkpoint'))
+
+    def testResume(self):
+        self.write([{'text': str(i)} for i in range(7)])
+        client = FakeOlogClient(fail=fail_once(['3']))
+        self.assertRaises(IOError, self.run_import, client, batch_size=2,
+                          jobs=1)
+        self.assertTrue(os.path.exists(self.path + '.checkpoint'))
+        self.assertNotIn('3', [r['description']
+                               for r in client.server.records])
+
+        self.run_import(client, batch_size=2, jobs=1)
+        self.assertEqual(sorted(r['description']
+                                for r in client.server.records),
+                         [str(i) for i in range(7)])
+        self.assertFalse(os.path.exists(self.path + '.checkpoint'))
+
+    def testFailedAttachment(self):
+        self.write([{'text': 'a', 'attachments': ['beam.png']},
+                    {'text': 'b'}])
+        client = FakeOlogClient(fail=fail_once(['beam.png']))
+        self.assertEqual(self.run_import(client), 2)
+        self.assertEqual(client.server.attachments, {})
+        self.assertEqual(Checkpoint(self.path + '.checkpoint').uploads,
+                         [(0, 1, 'beam.png')])
+
+        # Only the attachment is uploaded again, not the entries
+        self.assertEqual(self.run_import(client), 0)
+        self.assertEqual(len(client.server.records), 2)
+        self.assertEqual(client.server.attachments, {1: {'beam.png': b'png'}})
+        self.assertFalse(os.path.exists(self.path + '.checkpoint'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+'''
+Tests of the paging of the gui log browser, with a fake client
+'''
+import time
+import unittest
+from fakes import FakeOlogClient, make_record
+
+try:
+    from pyOlog.gui.qt import QtCore
+    from pyOlog.gui.browser import LogEntryModel
+except ImportError:
+    QtCore = None
+
+
+def make_client(n, fail=0):
+    """Client with n entries, failing the first fail searches"""
+    def fail_search(method, path, body):
+        if len(client.server.requested('GET', '/resources/logs')) <= fail:
+            raise IOError("Olog unavailable")
+
+    client = FakeOlogClient([make_record(i, i, 'entry {}\nmore'.format(i),
+                                         logbooks=['controls'],
+                                         tags=['magnets'])
+                             for i in range(1, n + 1)], fail=fail_search)
+    return client
+
+
+def pages(client):
+    return [c['page'] for _, c in
+            client.server.requested('GET', '/resources/logs')]
+
+
+@unittest.skipIf(QtCore is None, "PyQt is not installed")
+class TestLogEntryModel(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QtCore.QCoreApplication.instance() or \
+            QtCore.QCoreApplication([])
+
+    def setUp(self):
+        self.models = []
+
+    def tearDown(self):
+        for model in self.models:
+            model.close()
+
+    def model(self, client, **kwargs):
+        model = LogEntryModel(client, page_size=10, **kwargs)
+        self.models.append(model)
+        return model
+
+    def wait(self, condition, timeout=2.):
+        end = time.time() + timeout
+        while not condition():
+            self.assertLess(time.time(), end, "Timed out")
+            self.app.processEvents()
+            time.sleep(0.005)
+
+    def testPaging(self):
+        client = make_client(35)
+        model = self.model(client)
+        model.search(logbook='controls')
+        self.wait(lambda: model.rowCount() == 10)
+        root = QtCore.QModelIndex()
+        self.assertTrue(model.canFetchMore(root))
+        # The next page is prefetched, so it is shown at once
+        self.wait(lambda: 1 in model._pages)
+        model.fetchMore(root)
+        self.assertEqual(model.rowCount(), 20)
+
+        while model.canFetchMore(root) or model._wanted:
+            if model.canFetchMore(root):
+                model.fetchMore(root)
+            self.app.processEvents()
+        self.assertEqual(model.rowCount(), 35)
+        self.assertEqual(model.data(model.index(0, 0)), 35)
+        self.assertEqual(model.data(model.index(34, 5)), 'entry 1')
+        self.assertEqual(sorted(set(pages(client))), [1, 2, 3, 4])
+
+    def testEviction(self):
+        client = make_client(50)
+        model = self.model(client, cache_pages=2)
+        model.search()
+        root = QtCore.QModelIndex()
+        while model.rowCount() < 50:
+            if model.canFetchMore(root):
+                model.fetchMore(root)
+            self.app.processEvents()
+        self.wait(lambda: not model._pending)
+        self.assertNotIn(0, model._pages)
+
+        changed = []
+        model.dataChanged.connect(
+            lambda first, last: changed.append((first.row(), last.row())))
+        self.assertEqual(model.data(model.index(3, 0)), 'Loading...')
+        self.wait(lambda: changed)
+        self.assertEqual(changed, [(0, 9)])
+        self.assertEqual(model.data(model.index(3, 0)), 47)
+
+    def testFailure(self):
+        client = make_client(5, fail=2)
+        model = self.model(client)
+        model.min_backoff = model._backoff = 0.1
+        errors = []
+        model.error.connect(errors.append)
+        model.search()
+        self.wait(lambda: errors)
+        self.assertEqual(errors, ['Olog unavailable'])
+        # The view is not asked to fetch the failed page again
+        self.assertFalse(model.canFetchMore(QtCore.QModelIndex()))
+        self.assertIsNone(model.entry(0))
+        self.assertEqual(len(pages(client)), 1)
+
+        # It is fetched again after a growing delay
+        started = time.time()
+        self.wait(lambda: model.rowCount() == 5)
+        self.assertGreater(time.time() - started, 0.25)
+        self.assertEqual(len(pages(client)), 3)
+        self.assertFalse(model.canFetchMore(QtCore.QModelIndex()))
+
+    def testNewSearch(self):
+        client = make_client(5)
+        model = self.model(client)
+        model.search()
+        model.search(tag='magnets')
+        self.wait(lambda: model.rowCount() == 5)
+        self.assertEqual(model.criteria, {'tag': 'magnets'})
+
+
+if __name__ == '__main__':
+    unittest.main()
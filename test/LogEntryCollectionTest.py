@@ -0,0 +1,55 @@
+'''
+Tests for client side refinement with LogEntryCollection
+'''
+import unittest
+from pyOlog import LogEntryCollection
+from fakes import make_entry
+
+
+def ticket(id):
+    return {'Ticket': {'Id': id}}
+
+
+class TestLogEntryCollection(unittest.TestCase):
+
+    def setUp(self):
+        self.logs = LogEntryCollection([
+            make_entry(4, 400, owner='swilkins', logbooks=['Operations'],
+                       tags=['RF']),
+            make_entry(3, 300, owner='shroffk', logbooks=['Controls'],
+                       tags=['magnets'], properties=ticket('12')),
+            make_entry(2, 200, owner='swilkins',
+                       logbooks=['Operations', 'Controls'],
+                       tags=['magnets', 'RF']),
+            make_entry(1, 100, owner='shroffk', logbooks=['Operations'],
+                       properties=ticket('7'))])
+
+    def testFilter(self):
+        self.assertEqual(self.logs.filter(tag='magnets').ids, [3, 2])
+        self.assertEqual(self.logs.filter(tag=['magnets', 'RF'],
+                                          logbook='Operations').ids, [4, 2])
+        self.assertEqual(self.logs.filter(owner='shroffk',
+                                          property='Ticket').ids, [3, 1])
+        self.assertEqual(self.logs.filter(**{'Ticket.Id': 7}).ids, [1])
+        self.assertEqual(self.logs.filter(tag='missing').ids, [])
+        self.assertRaises(ValueError, self.logs.filter, colour='red')
+
+    def testSetOperations(self):
+        a = self.logs.filter(tag='RF')
+        b = self.logs.filter(logbook='Controls')
+        self.assertEqual((a & b).ids, [2])
+        self.assertEqual((a | b).ids, [4, 2, 3])
+
+    def testBetween(self):
+        self.assertEqual(self.logs.between(200, 300).ids, [3, 2])
+        self.assertEqual(self.logs.between(start=301).ids, [4])
+        self.assertEqual(self.logs.between(end=100).ids, [1])
+
+    def testGroupBy(self):
+        groups = self.logs.group_by('owner')
+        self.assertEqual(list(groups), ['shroffk', 'swilkins'])
+        self.assertEqual(groups['swilkins'].ids, [4, 2])
+        self.assertEqual(self.logs.get(3).owner, 'shroffk')
+
+if __name__ == '__main__':
+    unittest.main()
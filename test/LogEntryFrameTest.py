@@ -0,0 +1,78 @@
+'''
+Tests for the columnar LogEntryFrame result type
+'''
+import unittest
+import numpy as np
+from pyOlog.frame import LogEntryFrame
+
+
+def make_records():
+    return [{'id': 1, 'owner': 'swilkins',
+             'createdDate': 1420070400000, 'modifiedDate': 1420070400000,
+             'logbooks': [{'name': 'Operations', 'owner': 'ops'}],
+             'tags': [{'name': 'Data', 'state': 'Active'},
+                      {'name': 'RF', 'state': 'Active'}],
+             'properties': [{'name': 'Ticket',
+                             'attributes': {'Id': '1234'}}]},
+            {'id': 2, 'owner': 'shroffk',
+             'createdDate': 1420070460000, 'modifiedDate': None,
+             'logbooks': [{'name': 'Operations', 'owner': 'ops'},
+                          {'name': 'Controls', 'owner': 'ops'}],
+             'tags': [],
+             'properties': []}]
+
+
+class TestLogEntryFrame(unittest.TestCase):
+
+    def testFromJson(self):
+        frame = LogEntryFrame.from_json(make_records(),
+                                        columns=[('Ticket', 'Id')])
+        self.assertEqual(len(frame), 2)
+        self.assertEqual(frame.id.dtype, np.int64)
+        self.assertEqual(list(frame.id), [1, 2])
+        self.assertEqual(list(frame.owner), ['swilkins', 'shroffk'])
+        self.assertEqual(frame.logbooks, ['Operations', 'Controls'])
+        self.assertEqual(list(frame.logbook_offsets), [0, 1, 3])
+        self.assertEqual(list(frame.columns['Ticket.Id']), ['1234', None])
+
+    def testMasks(self):
+        frame = LogEntryFrame.from_json(make_records())
+        self.assertEqual(list(frame.has_tag('RF')), [True, False])
+        self.assertEqual(list(frame.in_logbook('Controls')), [False, True])
+        self.assertEqual(list(frame.has_tag('Missing')), [False, False])
+
+    def testToPandas(self):
+        try:
+            import pandas  # noqa
+        except ImportError:
+            self.skipTest('pandas is not installed')
+        df = LogEntryFrame.from_json(make_records()).to_pandas()
+        self.assertEqual(list(df.index), [1, 2])
+        self.assertEqual(list(df.tags[1]), ['Data', 'RF'])
+        self.assertTrue(df.modify_time.isnull()[2])
+
+    def testToPandasNoCopy(self):
+        try:
+            import pandas  # noqa
+        except ImportError:
+            self.skipTest('pandas is not installed')
+        frame = LogEntryFrame.from_json(make_records())
+        df = frame.to_pandas()
+        self.assertTrue(np.shares_memory(df.index.values, frame.id))
+        self.assertTrue(np.shares_memory(df.create_time.values,
+                                         frame.create_time))
+        self.assertTrue(np.shares_memory(df.modify_time.values,
+                                         frame.modify_time))
+
+    def testToArrow(self):
+        try:
+            import pyarrow  # noqa
+        except ImportError:
+            self.skipTest('pyarrow is not installed')
+        table = LogEntryFrame.from_json(make_records()).to_arrow()
+        self.assertEqual(table.num_rows, 2)
+        self.assertEqual(table.column('logbooks').to_pylist(),
+                         [['Operations'], ['Operations', 'Controls']])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,295 @@
+'''
+Tests of OlogClient which do not need an Olog server
+'''
+import itertools
+import threading
+import unittest
+from pyOlog import OlogClient, SimpleOlogClient, Logbook, Property, Query
+from fakes import URL, FakeOlogClient, FakeOlogTransport, make_record
+
+
+class TestFindSharded(unittest.TestCase):
+
+    def testOrderAndDuplicates(self):
+        client = FakeOlogClient([make_record(i, t) for i, t in enumerate(
+            [5, 10, 10, 20, 35, 40, 41, 42, 43, 99])])
+        found = list(client.find_sharded(start=0, end=100, window=10,
+                                         max_results=3, max_workers=3))
+        self.assertEqual([e.id for e in found], list(range(10)))
+        # The window from 40 to 50 must have been split
+        self.assertTrue(any(c['end'] - c['start'] < 10 for _, c in
+                            client.server.requested('GET', '/resources/logs')))
+
+    def testCriteriaPassedOn(self):
+        client = FakeOlogClient()
+        list(client.find_sharded(start=0, end=30, window=10, tag='magnets'))
+        searches = client.server.requested('GET', '/resources/logs')
+        self.assertEqual(len(searches), 3)
+        self.assertTrue(all(c['tag'] == 'magnets' for _, c in searches))
+
+    def testStopEarly(self):
+        client = FakeOlogClient([make_record(i, i * 10) for i in range(100)])
+        threads = threading.active_count()
+        found = client.find_sharded(start=0, end=1000, window=10,
+                                    max_workers=2)
+        self.assertEqual(next(found).id, 0)
+        found.close()
+        # The pool is shut down and no more windows are searched
+        self.assertEqual(threading.active_count(), threads)
+        searches = len(client.server.requested('GET'))
+        self.assertLessEqual(searches, 3)
+
+
+class TestFindQuery(unittest.TestCase):
+
+    def testMergedAndSorted(self):
+        client = FakeOlogClient([make_record(1, 100, tags=['A']),
+                                 make_record(2, 300, tags=['A', 'B']),
+                                 make_record(3, 200, tags=['B'])])
+        logs = client.find(Query(tag=['A', 'B']))
+        self.assertEqual(len(client.server.requested('GET')), 2)
+        self.assertEqual([e.id for e in logs], [2, 3, 1])
+
+
+class TestIterFind(unittest.TestCase):
+
+    def testShiftedPages(self):
+        # A new entry pushes 4 onto the second page too
+        client = FakeOlogClient(searches=[
+            [make_record(5), make_record(4)],
+            [make_record(4), make_record(3)],
+            [make_record(2), make_record(1)], []])
+        found = list(client.iter_find(page_size=2, tag='magnets'))
+        self.assertEqual([e.id for e in found], [5, 4, 3, 2, 1])
+        self.assertEqual([(c['page'], c['limit'], c['tag']) for _, c in
+                          client.server.requested('GET')],
+                         [(1, 2, 'magnets'), (2, 2, 'magnets'),
+                          (3, 2, 'magnets'), (4, 2, 'magnets')])
+
+    def testFullLastPage(self):
+        client = FakeOlogClient([make_record(1, 1), make_record(2, 2)])
+        self.assertEqual([e.id for e in client.iter_find(page_size=2)],
+                         [2, 1])
+        self.assertEqual(len(client.server.requested('GET')), 2)
+
+    def testNoPaging(self):
+        records = [make_record(i) for i in range(5, 0, -1)]
+        client = FakeOlogClient(searches=[records] * 10)
+        found = list(itertools.islice(client.iter_find(page_size=2), 10))
+        self.assertEqual([e.id for e in found], [5, 4, 3, 2, 1])
+        self.assertEqual(len(client.server.requested('GET')), 2)
+
+
+class TestGetMany(unittest.TestCase):
+
+    def testGetMany(self):
+        client = FakeOlogClient([make_record(i, i) for i in range(5)])
+        client.get(1)
+        results = client.get_many([3, 1, 9, 3, 2])
+        self.assertEqual([r.key for r in results], [3, 1, 9, 3, 2])
+        self.assertEqual([r.value.id for r in results if r.value],
+                         [3, 1, 3, 2])
+        self.assertIsInstance(results[2].error, IOError)
+        # 1 was cached and 3 only fetched once
+        self.assertEqual(sorted(path for path, _ in
+                                client.server.requested('GET')),
+                         ['/resources/logs/{}'.format(i)
+                          for i in (1, 2, 3, 9)])
+
+
+class TestGetParams(unittest.TestCase):
+
+    def testListParams(self):
+        client = FakeOlogClient()
+        self.assertEqual(client.find(tag=['a', 'b']), [])
+        self.assertEqual(client.find(tag={'a': 1}), [])
+        self.assertEqual([c for _, c in client.server.requested('GET')],
+                         [{'tag': ['a', 'b']}, {'tag': {'a': 1}}])
+
+
+class TestShared(unittest.TestCase):
+
+    def tearDown(self):
+        OlogClient.clear_shared()
+
+    def testShared(self):
+        a = OlogClient.shared(url='http://localhost/Olog', username='a',
+                              password='x')
+        self.assertIs(a, OlogClient.shared(url='http://localhost/Olog',
+                                           username='a'))
+        self.assertIsNot(a, OlogClient.shared(url='http://localhost/Olog',
+                                              username='b', password='x'))
+        self.assertIsNot(a, OlogClient.shared(url='http://otherhost/Olog',
+                                              username='a', password='x'))
+
+    def testPositionalPassword(self):
+        client = SimpleOlogClient(URL, 'a', 'x', shared=True).session
+        self.assertEqual(client._password, 'x')
+        self.assertIs(client, OlogClient.shared(URL, 'a'))
+
+    def testIgnoredArguments(self):
+        transport = FakeOlogTransport()
+        a = OlogClient.shared(URL, 'a', 'x', transport=transport)
+        with self.assertLogs('pyOlog.OlogClient', 'WARNING') as cm:
+            b = OlogClient.shared(URL, 'a', transport=FakeOlogTransport())
+        self.assertIs(a, b)
+        self.assertIs(b._transport, transport)
+        self.assertIn('ignoring the arguments transport', cm.output[0])
+
+    def testCreatedOutsideLock(self):
+        started = threading.Event()
+        release = threading.Event()
+        created = []
+
+        class SlowClient(OlogClient):
+            def __init__(self, **kwargs):
+                if kwargs['username'] == 'slow':
+                    started.set()
+                    release.wait(5)
+                created.append(kwargs['username'])
+                super(SlowClient, self).__init__(**kwargs)
+
+        clients = []
+
+        def shared():
+            clients.append(SlowClient.shared(URL, 'slow', 'x'))
+        threads = [threading.Thread(target=shared) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        started.wait(5)
+        # Creating another client is not held up
+        SlowClient.shared(URL, 'fast', 'x')
+        self.assertEqual(created, ['fast'])
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(created, ['fast', 'slow'])
+        self.assertIs(clients[0], clients[1])
+
+
+class TestFollow(unittest.TestCase):
+
+    def testFollow(self):
+        client = FakeOlogClient(searches=[
+            [make_record(1, 90), make_record(2, 110)],
+            [make_record(2, 110), make_record(3, 120)],
+            [],
+            [make_record(2, 110, modified=130), make_record(3, 120)]])
+        found = list(itertools.islice(
+            client.follow(start=100, interval=0, max_interval=0,
+                          overlap=10, tag='magnets'), 3))
+        self.assertEqual([e.id for e in found], [2, 3, 2])
+        searches = client.server.requested('GET')
+        self.assertEqual([c['start'] for _, c in searches],
+                         [90, 100, 110, 110])
+        self.assertTrue(all(c['tag'] == 'magnets' for _, c in searches))
+
+    def testOnlyNewEntries(self):
+        client = FakeOlogClient(searches=[
+            [make_record(1, 0)], [make_record(1, 0), make_record(2, 2e9)]])
+        found = next(client.follow(interval=0, overlap=1e10))
+        self.assertEqual(found.id, 2)
+
+
+def fail_deleting(name):
+    """Fail the DELETE requests of a name"""
+    def fail(method, path, body):
+        if method == 'DELETE' and path.endswith('/' + name):
+            raise IOError("HTTP error 404")
+    return fail
+
+
+class TestDeleteMany(unittest.TestCase):
+
+    def testDeleteMany(self):
+        client = FakeOlogClient([make_record(i, i) for i in range(3)],
+                                fail=fail_deleting('old'))
+        client.get_many([0, 1, 2])
+        results = client.delete_many(logEntryId=[1, 2], tagName=['old'],
+                                     logbookName='test')
+        self.assertEqual([r.key for r in results],
+                         [('logEntryId', 1), ('logEntryId', 2),
+                          ('logbookName', 'test'), ('tagName', 'old')])
+        self.assertEqual([r.value for r in results], [True, True, True, None])
+        self.assertIsInstance(results[3].error, IOError)
+        self.assertEqual(sorted(path for path, _ in
+                                client.server.requested('DELETE')
+                                if not path.endswith('/old')),
+                         ['/resources/logbooks/test', '/resources/logs/1',
+                          '/resources/logs/2'])
+        # Deleting a logbook changes the cached entries
+        self.assertEqual(len(client._entry_cache), 0)
+
+    def testDeleteEntries(self):
+        client = FakeOlogClient([make_record(i, i) for i in range(3)])
+        client.get_many([0, 1, 2])
+        client.delete_many(logEntryId=[1])
+        self.assertNotIn(1, client._entry_cache)
+        self.assertIn(0, client._entry_cache)
+
+    def testUnknownKey(self):
+        client = FakeOlogClient()
+        self.assertRaises(ValueError, client.delete_many, entries=[1])
+        self.assertRaises(ValueError, client.delete, tagName='a', id=1)
+        self.assertEqual(client.server.requests, [])
+
+
+def fail_entry(id):
+    """Fail adding to the log entry id"""
+    def fail(method, path, body):
+        if method == 'POST' and {'id': id} in body['logs'] or \
+                method == 'PUT' and path.endswith('/{}'.format(id)):
+            raise IOError("HTTP error 500")
+    return fail
+
+
+class TestAddToEntries(unittest.TestCase):
+
+    def testAddTag(self):
+        client = FakeOlogClient([make_record(i, i) for i in range(3)],
+                                fail=fail_entry(13))
+        client.get_many([0, 1, 2])
+        results = client.add_tag_to_entries('Fault', range(25),
+                                            chunk_size=10)
+        self.assertEqual([r.key for r in results], list(range(25)))
+        self.assertEqual([r.value for r in results],
+                         [True] * 10 + [None] * 10 + [True] * 5)
+        posts = client.server.requested('POST')
+        self.assertEqual(sorted(len(d['logs']) for _, d in posts),
+                         [5, 10, 10])
+        url, data = posts[0]
+        self.assertEqual(url, '/resources/tags/Fault')
+        self.assertEqual(data['name'], 'Fault')
+        self.assertEqual(len(client._entry_cache), 0)
+
+    def testAddLogbook(self):
+        client = FakeOlogClient()
+        results = client.add_logbook_to_entries(Logbook('ops', 'swilkins'),
+                                                [1, 2, 3])
+        self.assertEqual([r.value for r in results], [True] * 3)
+        url, data = client.server.requested('POST')[0]
+        self.assertEqual(url, '/resources/logbooks/ops')
+        self.assertEqual(data, {'name': 'ops', 'owner': 'swilkins',
+                                'logs': [{'id': 1}, {'id': 2}, {'id': 3}]})
+
+    def testAddProperty(self):
+        client = FakeOlogClient([make_record(i, i) for i in range(3)],
+                                fail=fail_entry(13))
+        client.get_many([0, 1, 2])
+        results = client.add_property_to_entries(
+            Property('Ticket', {'Id': '1'}), [1, 13, 2])
+        self.assertEqual([r.value for r in results], [True, None, True])
+        self.assertIsInstance(results[1].error, IOError)
+        puts = client.server.requested('PUT')
+        self.assertEqual(sorted(url for url, _ in puts),
+                         ['/resources/properties/Ticket/1',
+                          '/resources/properties/Ticket/13',
+                          '/resources/properties/Ticket/2'])
+        self.assertEqual(puts[0][1],
+                         {'name': 'Ticket', 'attributes': {'Id': '1'}})
+        self.assertNotIn(1, client._entry_cache)
+        self.assertIn(0, client._entry_cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
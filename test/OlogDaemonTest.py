@@ -0,0 +1,95 @@
+'''
+Tests of the olog daemon which do not need an Olog server
+'''
+import os
+import base64
+import shutil
+import tempfile
+import threading
+import unittest
+from pyOlog import SimpleOlogClient
+from pyOlog.cli.daemon import OlogDaemon, DaemonError, forward
+from fakes import URL, FakeOlogTransport
+
+
+def fail_text(text):
+    """Fail posting the entries with a text"""
+    def fail(method, path, body):
+        if path == '/resources/logs' and \
+                any(r['description'] == text for r in body):
+            raise IOError("HTTP error 500")
+    return fail
+
+
+class TestOlogDaemon(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'pyOlog.sock')
+        self.olog = FakeOlogTransport(logbooks=['ops'], tags=['magnets'],
+                                      fail=fail_text('fail'))
+        client = SimpleOlogClient(url=URL, username='', ask=False,
+                                  transport=self.olog)
+        self.server = OlogDaemon(self.path, url=URL, username='swilkins',
+                                 client=client)
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                                       kwargs={'poll_interval': 0.05})
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
+        shutil.rmtree(self.dir)
+
+    def forward(self, text, **kwargs):
+        request = {'url': URL, 'username': 'swilkins', 'text': text}
+        request.update(kwargs)
+        return forward(request, self.path, timeout=5)
+
+    def testForward(self):
+        with open(os.path.join(self.dir, 'beam.png'), 'wb') as f:
+            f.write(b'png')
+        attachments = [{'path': os.path.join(self.dir, 'beam.png')},
+                       {'filename': 'notes.txt',
+                        'data': base64.b64encode(b'notes').decode()}]
+        self.assertEqual(self.forward('Beam is back', logbooks=['ops'],
+                                      tags='magnets',
+                                      attachments=attachments), 1)
+        entry = self.olog.records[0]
+        self.assertEqual(entry['description'], 'Beam is back')
+        self.assertEqual([l['name'] for l in entry['logbooks']], ['ops'])
+        self.assertEqual([t['name'] for t in entry['tags']], ['magnets'])
+        self.assertEqual(self.olog.attachments,
+                         {1: {'beam.png': b'png', 'notes.txt': b'notes'}})
+        self.assertTrue(all(f.closed for f in self.olog.files))
+
+    def testUnserved(self):
+        self.assertIsNone(self.forward('a', username='other'))
+        self.assertIsNone(self.forward('a', url='http://other/Olog'))
+        self.assertEqual(self.olog.records, [])
+
+    def testError(self):
+        with self.assertRaises(DaemonError) as cm:
+            self.forward('fail', logbooks=['ops'])
+        self.assertTrue(str(cm.exception).endswith(': HTTP error 500'))
+        with self.assertRaises(DaemonError) as cm:
+            self.forward('a', logbooks=['controls'])
+        self.assertIn('Logbook controls does not exist', str(cm.exception))
+        self.assertRaises(DaemonError, self.forward, 'a',
+                          attachments=[{'path': os.path.join(self.dir,
+                                                             'missing')}])
+        self.assertEqual(self.olog.records, [])
+
+    def testNoDaemon(self):
+        self.assertIsNone(forward({'text': 'a'},
+                                  os.path.join(self.dir, 'other.sock')))
+
+    def testAlreadyRunning(self):
+        # No client is made, so no password is asked for
+        self.assertRaises(RuntimeError, OlogDaemon, self.path, url=URL)
+        self.assertEqual(self.forward('a', logbooks=['ops']), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
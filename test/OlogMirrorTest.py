@@ -0,0 +1,84 @@
+'''
+Tests for the local SQLite mirror
+'''
+import unittest
+from pyOlog import Query
+from pyOlog.mirror import OlogMirror
+from fakes import FakeOlogClient, make_entry, make_record
+
+
+def ticket(id):
+    return {'Ticket': {'Id': str(id)}}
+
+
+class TestOlogMirror(unittest.TestCase):
+
+    def setUp(self):
+        self.client = FakeOlogClient(
+            [make_record(1, 100, 'Timing is off', logbooks=['controls'],
+                         tags=['magnets'], properties=ticket(1)),
+             make_record(2, 200, 'Beam is back', logbooks=['controls'],
+                         properties=ticket(2))],
+            logbooks=['controls'], tags=['magnets'],
+            properties={'Ticket': {'Id': ''}})
+        self.mirror = OlogMirror(self.client, path=':memory:', window=50)
+
+    def searches(self):
+        return [(c['start'], c['end']) for _, c in
+                self.client.server.requested('GET', '/resources/logs')]
+
+    def testSync(self):
+        self.assertEqual(self.mirror.sync(start=0, end=300), 2)
+        self.assertEqual(len(self.searches()), 6)
+        self.assertEqual(self.mirror.last_sync, 300)
+        self.assertEqual([t.name for t in self.mirror.list_tags()],
+                         ['magnets'])
+
+    def testFind(self):
+        self.mirror.sync(start=0, end=300)
+        self.assertEqual([e.id for e in self.mirror.find()], [2, 1])
+        self.assertEqual([e.id for e in self.mirror.find(search='*Timing*')],
+                         [1])
+        self.assertEqual([e.id for e in self.mirror.find(tag='magnets')], [1])
+        self.assertEqual([e.id for e in self.mirror.find(start=150)], [2])
+        self.assertEqual([e.id for e in self.mirror.find(**{'Ticket.Id': 2})],
+                         [2])
+        entry = self.mirror.find(id=1)[0]
+        self.assertEqual(entry.logbooks[0].name, 'controls')
+        self.assertEqual(entry.properties[0].attributes, {'Id': '1'})
+        self.assertRaises(ValueError, self.mirror.find, color='red')
+
+    def testFindQuery(self):
+        self.mirror.sync(start=0, end=300)
+        q = Query(tag='magnets') | Query(search='*Beam*')
+        self.assertEqual([e.id for e in self.mirror.find(q)], [2, 1])
+        self.assertEqual([e.id for e in self.mirror.find(q, start=150)], [2])
+
+    def testSearch(self):
+        self.mirror.sync(start=0, end=300)
+        self.assertEqual([e.id for e in self.mirror.search('timing')], [1])
+
+    def testNeedsStart(self):
+        self.assertRaises(ValueError, self.mirror.sync)
+        self.assertEqual(self.searches(), [])
+
+    def testRefresh(self):
+        self.mirror.refresh = 250
+        self.mirror.sync(start=0, end=300)
+        self.assertEqual(self.mirror.last_modified, 200000)
+        self.client.server.records[1] = make_record(
+            2, 200, 'Beam is gone', logbooks=['controls'], modified=350)
+        del self.client.server.requests[:]
+        self.assertEqual(self.mirror.sync(end=400), 1)
+        self.assertEqual(self.searches()[0][0], 150)
+        self.assertEqual(self.mirror.find(id=2)[0].text, 'Beam is gone')
+        self.assertEqual(self.mirror.last_modified, 350000)
+
+    def testUpdateKeepsNewest(self):
+        self.mirror.update([make_entry(1, 100, 'new', modified=150)])
+        self.mirror.update([make_entry(1, 100, 'old', modified=120)])
+        self.assertEqual(self.mirror.find(id=1)[0].text, 'new')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+'''
+Tests for planning multi-valued and OR queries
+'''
+import unittest
+from pyOlog import Query
+
+
+def plan(query, **extra):
+    return sorted(sorted(r.items()) for r in query.plan(**extra))
+
+
+class TestQuery(unittest.TestCase):
+
+    def testSingle(self):
+        self.assertEqual(plan(Query(tag='A', logbook='X')),
+                         [[('logbook', 'X'), ('tag', 'A')]])
+
+    def testMultiValued(self):
+        self.assertEqual(plan(Query(tag=['A', 'B'], logbook=['X', 'Y'])),
+                         [[('logbook', 'X'), ('tag', 'A')],
+                          [('logbook', 'X'), ('tag', 'B')],
+                          [('logbook', 'Y'), ('tag', 'A')],
+                          [('logbook', 'Y'), ('tag', 'B')]])
+
+    def testOrGroups(self):
+        q = Query(tag='A') | Query(tag=['A', 'B'], logbook='X')
+        self.assertEqual(plan(q), [[('logbook', 'X'), ('tag', 'B')],
+                                   [('tag', 'A')]])
+        self.assertEqual(plan(Query(tag='A') | Query(tag='A')),
+                         [[('tag', 'A')]])
+
+    def testExtraCriteria(self):
+        self.assertEqual(plan(Query(tag=['A', 'B']), start=10),
+                         [[('start', 10), ('tag', 'A')],
+                          [('start', 10), ('tag', 'B')]])
+        self.assertRaises(ValueError, Query(tag='A').plan, tag='B')
+        self.assertRaises(ValueError, Query, start=[1, 2])
+        self.assertRaises(ValueError, Query, tag=[])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,209 @@
+'''
+Tests of the HTTP transports which do not need a server
+'''
+import io
+import time
+import unittest
+from pyOlog import OlogClient
+from pyOlog.transport import (Transport, RequestsTransport, HTTPXTransport,
+                               get_transport)
+from fakes import URL, FakeResponse, StubClient
+
+
+class StubTransport(Transport):
+    """Transport recording the clients made and requests sent"""
+    def __init__(self, responses=(), **kwargs):
+        super(StubTransport, self).__init__(**kwargs)
+        self.responses = list(responses)
+        self.clients = []
+        self.requests = []
+
+    def _new_client(self):
+        # Widen the window for concurrent first requests
+        time.sleep(0.01)
+        client = StubClient()
+        self.clients.append(client)
+        return client
+
+    def _set_cookies(self, client, cookies):
+        client.cookies = list(cookies)
+
+    def _get_cookies(self, client):
+        return list(client.cookies)
+
+    def _request(self, client, method, url, **kwargs):
+        self.requests.append((client, method, url, kwargs))
+        if self.responses:
+            return self.responses.pop(0)
+        return FakeResponse()
+
+
+class TestClientLifetime(unittest.TestCase):
+
+    def testPrewarmSharesClient(self):
+        t = StubTransport(pool_maxsize=8)
+        t.prewarm('http://localhost/Olog', 8)
+        self.assertEqual(len(t.clients), 1)
+        self.assertEqual(len(t.requests), 8)
+        self.assertTrue(all(r[0] is t.clients[0] for r in t.requests))
+
+    def testFork(self):
+        t = StubTransport()
+        t.request('GET', 'http://localhost/Olog')
+        # Pretend the client was made by the parent of this process
+        t._pid = -1
+        t.request('GET', 'http://localhost/Olog')
+        self.assertEqual(len(t.clients), 2)
+        # The parents connections are left alone
+        self.assertFalse(t.clients[0].closed)
+        self.assertIs(t.requests[1][0], t.clients[1])
+
+    def testIdle(self):
+        t = StubTransport(keepalive_timeout=0.05)
+        t.request('GET', 'http://localhost/Olog')
+        t.clients[0].cookies = [['JSESSIONID', 'abc', 'localhost', '/']]
+        time.sleep(0.1)
+        t.request('GET', 'http://localhost/Olog')
+        self.assertEqual(len(t.clients), 2)
+        self.assertTrue(t.clients[0].closed)
+        self.assertEqual(t.cookies, [['JSESSIONID', 'abc', 'localhost', '/']])
+
+    def testStreamKeepsClient(self):
+        t = StubTransport([FakeResponse(chunks=[b'a', b'b'])],
+                          keepalive_timeout=0.05)
+        resp = t.request('GET', 'http://localhost/Olog', stream=True)
+        time.sleep(0.1)
+        # The download is still going, so the client is not reset
+        t.request('GET', 'http://localhost/Olog')
+        self.assertEqual(len(t.clients), 1)
+        self.assertEqual(list(t.iter_content(resp)), [b'a', b'b'])
+        self.assertEqual(t._in_flight, 0)
+
+    def testStreamError(self):
+        missing = FakeResponse(status_code=404)
+        t = StubTransport([missing])
+        resp = t.request('GET', 'http://localhost/Olog', stream=True)
+        self.assertIs(resp, missing)
+        self.assertTrue(resp.closed)
+        self.assertEqual(t._in_flight, 0)
+
+    def testDownloadReleases(self):
+        missing = FakeResponse(status_code=404)
+        client = OlogClient(url=URL, username='', ask=False,
+                            transport=StubTransport(
+                                [missing, FakeResponse(chunks=[b'a'])]))
+        self.assertRaises(IOError, client.download_attachment, 1, 'a.png',
+                          io.BytesIO())
+        self.assertTrue(missing.closed)
+        self.assertEqual(client._transport._in_flight, 0)
+
+        # Writing fails half way through the download
+        self.assertRaises(AttributeError, client.download_attachment, 1,
+                          'a.png', None)
+        self.assertEqual(client._transport._in_flight, 0)
+
+
+class TestAuth(unittest.TestCase):
+
+    def testLazyAuth(self):
+        first = FakeResponse(status_code=401)
+        t = StubTransport([first], auth=('swilkins', 'x'), lazy_auth=True)
+        resp = t.request('GET', 'http://localhost/Olog')
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(first.closed)
+        self.assertEqual([r[3].get('auth') for r in t.requests],
+                         [None, ('swilkins', 'x')])
+
+    def testLazyAuthSession(self):
+        t = StubTransport(auth=('swilkins', 'x'), lazy_auth=True)
+        t.request('GET', 'http://localhost/Olog')
+        self.assertEqual(len(t.requests), 1)
+        self.assertNotIn('auth', t.requests[0][3])
+
+    def testUploadsSendAuth(self):
+        # A 401 would need the upload to be sent again
+        t = StubTransport(auth=('swilkins', 'x'), lazy_auth=True)
+        t.request('POST', 'http://localhost/Olog', files={'file': None})
+        self.assertEqual(t.requests[0][3]['auth'], ('swilkins', 'x'))
+
+    def testAuth(self):
+        t = StubTransport([FakeResponse(status_code=401)], auth=('swilkins', 'x'))
+        resp = t.request('GET', 'http://localhost/Olog')
+        self.assertEqual(resp.status_code, 401)
+        self.assertEqual(t.requests[0][3]['auth'], ('swilkins', 'x'))
+
+
+class TestCookies(unittest.TestCase):
+
+    def testRoundTrip(self):
+        cookies = [['JSESSIONID', 'abc', 'localhost.local', '/Olog']]
+        t = RequestsTransport(cookies=cookies)
+        self.assertEqual(t.cookies, cookies)
+        t.client.cookies.set('other', 'def', domain='localhost.local',
+                             path='/')
+        self.assertEqual(RequestsTransport(cookies=t.cookies).cookies,
+                         sorted(cookies +
+                                [['other', 'def', 'localhost.local', '/']]))
+        t.close()
+
+
+class RecordingClient(object):
+    """Stand-in for an httpx Client"""
+    def __init__(self):
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append(('request', method, url, kwargs))
+
+    def build_request(self, method, url, **kwargs):
+        self.calls.append(('build_request', method, url, kwargs))
+        return 'request'
+
+    def send(self, request, **kwargs):
+        self.calls.append(('send', request, kwargs))
+
+
+class TestHTTPXRequest(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = HTTPXTransport()
+        self.client = RecordingClient()
+
+    def request(self, **kwargs):
+        self.transport._request(self.client, 'POST', 'http://localhost/Olog',
+                                **kwargs)
+        return self.client.calls
+
+    def testRawBody(self):
+        calls = self.request(data='{"id": 1}', auth=None)
+        self.assertEqual(calls[0][3], {'content': '{"id": 1}'})
+
+    def testFormData(self):
+        calls = self.request(data={'a': '1'}, auth=('swilkins', 'x'))
+        self.assertEqual(calls[0][3], {'data': {'a': '1'},
+                                       'auth': ('swilkins', 'x')})
+
+    def testStream(self):
+        calls = self.request(stream=True, auth=('swilkins', 'x'),
+                             params={'a': 1})
+        self.assertEqual(calls, [('build_request', 'POST',
+                                  'http://localhost/Olog',
+                                  {'params': {'a': 1}}),
+                                 ('send', 'request',
+                                  {'stream': True,
+                                   'auth': ('swilkins', 'x')})])
+
+
+class TestGetTransport(unittest.TestCase):
+
+    def testNames(self):
+        self.assertIsInstance(get_transport('requests', verify=False),
+                              RequestsTransport)
+        t = get_transport('httpx', http2=False, pool_maxsize=4)
+        self.assertIsInstance(t, HTTPXTransport)
+        self.assertEqual((t.http2, t.pool_maxsize), (False, 4))
+        self.assertRaises(ValueError, get_transport, 'curl')
+
+
+if __name__ == '__main__':
+    unittest.main()
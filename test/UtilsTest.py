@@ -0,0 +1,57 @@
+'''
+Tests for the helpers in pyOlog.utils
+'''
+import threading
+import time
+import unittest
+from pyOlog.utils import LRUCache, SingleFlight
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def testEviction(self):
+        cache = LRUCache(2)
+        cache.put(1, 'a')
+        cache.put(2, 'b')
+        self.assertEqual(cache.get(1), 'a')
+        cache.put(3, 'c')
+        self.assertEqual(cache.get(2), None)
+        self.assertEqual(cache.get(1), 'a')
+        self.assertEqual(len(cache), 2)
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def testCoalesce(self):
+        flight = SingleFlight()
+        calls = []
+        results = []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'result'
+
+        threads = [threading.Thread(
+            target=lambda: results.append(flight.do('key', slow)))
+            for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['result'] * 5)
+        # Once finished the next call runs again
+        flight.do('key', slow)
+        self.assertEqual(len(calls), 2)
+
+    def testError(self):
+        flight = SingleFlight()
+
+        def fail():
+            raise KeyError('missing')
+
+        self.assertRaises(KeyError, flight.do, 'key', fail)
+
+if __name__ == '__main__':
+    unittest.main()
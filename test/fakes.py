@@ -0,0 +1,256 @@
+'''
+An Olog kept in memory, for the tests which do not need an Olog server
+
+FakeOlogClient is an OlogClient talking to a FakeOlogTransport, which
+answers the requests of the client as an Olog server would and records
+them. Only the transport is fake, so the requests go through all of the
+client code.
+'''
+import copy
+import json
+import fnmatch
+import threading
+from pyOlog import OlogClient, LogEntry, Logbook, Tag, Property
+from pyOlog.transport import Transport
+
+URL = 'http://localhost/Olog'
+
+
+def make_entry(id, created=0, text=None, owner='swilkins',
+               logbooks=('controls',), tags=(), properties=None,
+               modified=None):
+    '''
+    A LogEntry as decoded by the client
+
+    :param created: Creation time in seconds since the epoch.
+    :param properties: Dict of property name to attributes.
+    :param modified: Modification time, defaults to the creation time.
+    '''
+    if text is None:
+        text = 'entry {}'.format(id)
+    if modified is None:
+        modified = created
+    return LogEntry(text=text, owner=owner,
+                    logbooks=[Logbook(l, 'ops') for l in logbooks],
+                    tags=[Tag(t) for t in tags],
+                    properties=[Property(name, dict(attributes))
+                                for name, attributes in
+                                sorted((properties or {}).items())],
+                    id=id, create_time=created * 1000,
+                    modify_time=modified * 1000)
+
+
+def make_record(id, created=0, text=None, owner='swilkins', logbooks=(),
+                tags=(), properties=None, modified=None):
+    '''
+    The JSON record of a log entry as returned by the Olog
+
+    Takes the same arguments as :func make_entry:
+    '''
+    if text is None:
+        text = 'entry {}'.format(id)
+    if modified is None:
+        modified = created
+    return {'id': id, 'owner': owner, 'description': text,
+            'createdDate': created * 1000, 'modifiedDate': modified * 1000,
+            'logbooks': [{'name': l, 'owner': 'ops'} for l in logbooks],
+            'tags': [{'name': t, 'state': 'Active'} for t in tags],
+            'properties': [{'name': name, 'attributes': dict(attributes)}
+                           for name, attributes in
+                           sorted((properties or {}).items())]}
+
+
+class FakeResponse(object):
+    """Response with a JSON body or a streamed body of chunks"""
+    def __init__(self, data=None, status_code=200, chunks=()):
+        self.data = data
+        self.status_code = status_code
+        self.chunks = list(chunks)
+        self.closed = False
+
+    def json(self):
+        # The client decodes the records in place
+        return copy.deepcopy(self.data)
+
+    def iter_content(self, chunk_size):
+        return iter(self.chunks)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise IOError("HTTP error {}".format(self.status_code))
+
+    def close(self):
+        self.closed = True
+
+
+class StubClient(object):
+    """Stand-in for the HTTP client of a transport"""
+    def __init__(self):
+        self.cookies = []
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeOlogTransport(Transport):
+    """Transport answering requests from an Olog kept in memory"""
+    def __init__(self, records=(), searches=None, logbooks=(), tags=(),
+                 properties=None, attachments=None, fail=None):
+        '''
+        :param records: The JSON records of the log entries.
+        :param searches: Answer each search with the next of these lists
+                         of records, rather than searching the records.
+        :param logbooks: The names of the logbooks.
+        :param tags: The names of the tags.
+        :param properties: Dict of property name to attributes.
+        :param attachments: Dict of log entry id to a dict of filename
+                            to data.
+        :param fail: Called with the method, path and body of each
+                     request (see :attr requests:) before it is
+                     answered, raises to fail the request.
+        '''
+        super(FakeOlogTransport, self).__init__()
+        self.records = [copy.deepcopy(r) for r in records]
+        self.searches = None if searches is None else list(searches)
+        self.logbooks = list(logbooks)
+        self.tags = list(tags)
+        self.properties = dict(properties or {})
+        self.attachments = dict((id, dict(files)) for id, files in
+                                (attachments or {}).items())
+        self.fail = fail
+        #: (method, path, body) of each request. The body is the dict of
+        #: params of a GET, the decoded JSON data or the filename of an
+        #: upload.
+        self.requests = []
+        #: The file objects uploaded
+        self.files = []
+        self._olog_lock = threading.Lock()
+
+    def _new_client(self):
+        return StubClient()
+
+    def _set_cookies(self, client, cookies):
+        client.cookies = list(cookies)
+
+    def _get_cookies(self, client):
+        return list(client.cookies)
+
+    def requested(self, method, prefix=''):
+        """The (path, body) of the requests made with method to the
+        paths starting with prefix"""
+        with self._olog_lock:
+            return [(path, body) for m, path, body in self.requests
+                    if m == method and path.startswith(prefix)]
+
+    def _request(self, client, method, url, **kwargs):
+        path = url[len(URL):]
+        if kwargs.get('files'):
+            body = kwargs['files']['file'][0]
+        elif kwargs.get('data') is not None:
+            body = json.loads(kwargs['data'])
+        elif kwargs.get('params') is not None:
+            body = dict(kwargs['params'])
+        else:
+            body = None
+        with self._olog_lock:
+            self.requests.append((method, path, body))
+        if self.fail is not None:
+            self.fail(method, path, body)
+        with self._olog_lock:
+            return self._answer(method, path.split('/')[2:], kwargs)
+
+    def _answer(self, method, parts, kwargs):
+        resource, args = parts[0], parts[1:]
+        if method == 'GET' and resource == 'logs':
+            if not args:
+                return FakeResponse(self._search(kwargs.get('params') or {}))
+            for r in self.records:
+                if str(r['id']) == args[0]:
+                    return FakeResponse(r)
+            return FakeResponse(status_code=404)
+        if method == 'GET' and not args:
+            if resource == 'logbooks':
+                return FakeResponse({'logbook': [{'name': l, 'owner': 'ops'}
+                                                 for l in self.logbooks]})
+            if resource == 'tags':
+                return FakeResponse({'tag': [{'name': t, 'state': 'Active'}
+                                             for t in self.tags]})
+            if resource == 'properties':
+                return FakeResponse({'property': [
+                    {'name': name, 'attributes': attributes}
+                    for name, attributes in sorted(self.properties.items())]})
+        if method == 'GET' and resource == 'attachments':
+            files = self.attachments.get(int(args[0]), {})
+            if len(args) == 1:
+                return FakeResponse({'attachment': [{'filename': f}
+                                                    for f in sorted(files)]})
+            if args[1] not in files:
+                return FakeResponse(status_code=404)
+            return FakeResponse(chunks=[files[args[1]]])
+        if method == 'POST' and resource == 'logs':
+            records = json.loads(kwargs['data'])
+            for r in records:
+                r.update(id=max([0] + [e['id'] for e in self.records]) + 1,
+                         createdDate=0, modifiedDate=0)
+                self.records.append(copy.deepcopy(r))
+            return FakeResponse(records)
+        if method == 'POST' and resource == 'attachments':
+            filename, f, _ = kwargs['files']['file']
+            self.files.append(f)
+            data = f.read() if hasattr(f, 'read') else f
+            self.attachments.setdefault(int(args[0]), {})[filename] = data
+        return FakeResponse()
+
+    def _search(self, params):
+        if self.searches is not None:
+            return self.searches.pop(0)
+        records = [r for r in self.records if _matches(r, params)]
+        records.sort(key=lambda r: (r['createdDate'], r['id']), reverse=True)
+        if 'page' in params:
+            start = (params['page'] - 1) * params['limit']
+            records = records[start:start + params['limit']]
+        return records
+
+
+def _matches(record, params):
+    def any_of(value, names):
+        if not isinstance(value, (list, tuple)):
+            value = [value]
+        return any(v in names for v in value)
+
+    for key, value in params.items():
+        if key == 'tag':
+            if not any_of(value, [t['name'] for t in record['tags']]):
+                return False
+        elif key == 'logbook':
+            if not any_of(value, [l['name'] for l in record['logbooks']]):
+                return False
+        elif key == 'property':
+            if not any_of(value, [p['name'] for p in record['properties']]):
+                return False
+        elif key == 'owner':
+            if not any_of(value, [record['owner']]):
+                return False
+        elif key == 'search':
+            if not fnmatch.fnmatch(record['description'], value):
+                return False
+        elif key == 'start':
+            if record['createdDate'] < value * 1000:
+                return False
+        elif key == 'end':
+            if record['createdDate'] > value * 1000:
+                return False
+    return True
+
+
+class FakeOlogClient(OlogClient):
+    """OlogClient of an Olog kept in memory"""
+    def __init__(self, records=(), **kwargs):
+        '''
+        Takes the arguments of :class FakeOlogTransport:, which is kept
+        as :attr server:
+        '''
+        self.server = FakeOlogTransport(records, **kwargs)
+        super(FakeOlogClient, self).__init__(url=URL, username='', ask=False,
+                                             transport=self.server)